@@ -0,0 +1,61 @@
+'''
+Import time benchmark for tk_steroids modules.
+
+Every module is imported in a fresh interpreter so that nothing is
+cached between the measurements. Run from the repository root
+
+    python benchmarks/import_time.py
+'''
+
+import sys
+import subprocess
+
+MODULES = [
+        'tk_steroids',
+        'tk_steroids.elements',
+        'tk_steroids.matplotlib',
+        'tk_steroids.imagefeed',
+        'tk_steroids.settings',
+        'tk_steroids.dialogs',
+        ]
+
+# Heavy imports done by the widgets themselves (what was paid at import
+# time before the imports were made lazy)
+HEAVY = {
+        'tk_steroids.matplotlib': 'tk_steroids.matplotlib._import_matplotlib()',
+        'tk_steroids.imagefeed': 'tk_steroids.imagefeed._import_pil()',
+        }
+
+CODE = '''
+import time
+start = time.perf_counter()
+import {module}
+{extra}
+print(time.perf_counter() - start)
+'''
+
+
+def import_time(module, extra='', repeats=5):
+    '''Returns the best import time of the module in seconds.
+    '''
+    times = []
+    for i in range(repeats):
+        out = subprocess.check_output(
+                [sys.executable, '-c', CODE.format(module=module, extra=extra)])
+        times.append(float(out.decode().strip()))
+    return min(times)
+
+
+def main():
+    print('{:<28}{:>12}{:>16}'.format('module', 'import (ms)', 'eager (ms)'))
+    for module in MODULES:
+        lazy = import_time(module)
+        if module in HEAVY:
+            eager = '{:>16.1f}'.format(1000*import_time(module, HEAVY[module]))
+        else:
+            eager = '{:>16}'.format('-')
+        print('{:<28}{:>12.1f}{}'.format(module, 1000*lazy, eager))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+'''
+Timing of tk_steroids.search.SearchIndex on 100k items, simulating
+a user typing a query one character at a time.
+
+    python benchmarks/search_index.py
+'''
+
+import time
+import random
+import string
+
+from tk_steroids.search import SearchIndex, SEARCH_MODES
+
+
+def main(N=100000, query='chan_12'):
+    rng = random.Random(0)
+    items = ['Chan_{} {}'.format(i, ''.join(rng.choice(string.ascii_letters) for j in range(10)))
+            for i in range(N)]
+
+    for mode in SEARCH_MODES:
+        start = time.perf_counter()
+        index = SearchIndex(items, mode=mode)
+        print('Index {} items ({}): {:.1f} ms'.format(N, mode, 1000*(time.perf_counter()-start)))
+        
+        times = []
+        for i in range(1, len(query)+1):
+            start = time.perf_counter()
+            matches = index.search(query[:i], mode)
+            times.append(1000*(time.perf_counter()-start))
+        print('{:<10} per keystroke (ms): {}  -> {} matches'.format(mode,
+            ' '.join('{:.1f}'.format(t) for t in times), len(matches)))
+
+
+if __name__ == "__main__":
+    main()
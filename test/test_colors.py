@@ -0,0 +1,96 @@
+import colorsys
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from tk_steroids import colors
+from tk_test_helpers import tk_root
+
+
+def read_ppm(data):
+    '''
+    (height, width, 3) uint8 array from the P6 data
+    '''
+    magic, width, height, maxval, pixels = data.split(b' ', 4)
+    return np.frombuffer(pixels, dtype=np.uint8).reshape(int(height), int(width), 3)
+
+
+class TestColormapData(unittest.TestCase):
+
+    def setUp(self):
+        colors._COLORMAP_CACHE.clear()
+
+
+    def test_ppm(self):
+        rgb = np.zeros((2, 3, 3))
+        rgb[1, 2] = [1, 0.5, 0]
+        data = colors._ppm_data(rgb)
+        self.assertTrue(data.startswith(b'P6 3 2 255 '))
+        np.testing.assert_array_equal(read_ppm(data)[1, 2], [255, 128, 0])
+
+
+    def test_hsv_plane(self):
+        width, height = 12, 5
+        image = read_ppm(colors._colormap_data(width, height, 'hsv', 80))
+        self.assertEqual(image.shape, (height, width, 3))
+
+        for y in range(height):
+            for x in range(width):
+                expected = colorsys.hsv_to_rgb(x/width, 1-y/(height-1), 0.8)
+                np.testing.assert_allclose(image[y, x], np.array(expected)*255, atol=1)
+
+
+    def test_hsl_plane(self):
+        image = read_ppm(colors._colormap_data(10, 10, 'hsl', 50))
+        np.testing.assert_array_equal(image[0, 0], [255, 0, 0])
+        np.testing.assert_array_equal(image[-1, 0], [128, 128, 128])
+
+        image = read_ppm(colors._colormap_data(10, 10, 'hsl', 100))
+        self.assertTrue((image == 255).all())
+
+
+    def test_cache(self):
+        data = colors._colormap_data(20, 20)
+        self.assertIs(colors._colormap_data(20, 20), data)
+
+        # The least recently used planes are dropped
+        with mock.patch.object(colors, '_COLORMAP_CACHE_BYTES', 2*len(data)):
+            colors._colormap_data(20, 20, level=50)
+            colors._colormap_data(20, 20)
+            colors._colormap_data(20, 20, level=40)
+        self.assertEqual(list(colors._COLORMAP_CACHE),
+                [(20, 20, 'hsv', 100), (20, 20, 'hsv', 40)])
+
+
+
+class TestColorMap(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tk_root()
+
+    def tearDown(self):
+        self.root.destroy()
+
+
+    def test_pick(self):
+        picked = []
+        colormap = colors._ColorMap(self.root, picked.append, callback_format='hex')
+        colormap._pick(0, 0)
+        colormap._pick(0, 99)
+        self.assertEqual(picked, ['#ff0000', '#ffffff'])
+
+        # Moving the slider picks again at the same place
+        colormap._on_level(0)
+        self.assertEqual(picked[-1], '#000000')
+
+
+    def test_bad_arguments(self):
+        with self.assertRaises(ValueError):
+            colors._ColorMap(self.root, callback_format='hsv')
+        with self.assertRaises(ValueError):
+            colors._ColorMap(self.root, model='lab')
+
+
+if __name__ == '__main__':
+    unittest.main()
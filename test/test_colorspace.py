@@ -0,0 +1,70 @@
+
+import colorsys
+import unittest
+
+import numpy as np
+
+from tk_steroids import colorspace
+
+
+class TestColorspace(unittest.TestCase):
+
+    def setUp(self):
+        self.rgb = np.random.default_rng(0).random((500, 3))
+
+
+    def test_hsv(self):
+        hsv = colorspace.rgb_to_hsv(self.rgb)
+        expected = np.array([colorsys.rgb_to_hsv(*color) for color in self.rgb])
+        expected[:, 0] *= 360
+        np.testing.assert_allclose(hsv, expected, atol=1e-9)
+        np.testing.assert_allclose(colorspace.hsv_to_rgb(hsv), self.rgb, atol=1e-9)
+
+
+    def test_hsl(self):
+        hsl = colorspace.rgb_to_hsl(self.rgb)
+        expected = np.array([colorsys.rgb_to_hls(*color) for color in self.rgb])
+        expected = np.stack([expected[:, 0]*360, expected[:, 2], expected[:, 1]], axis=-1)
+        np.testing.assert_allclose(hsl, expected, atol=1e-9)
+        np.testing.assert_allclose(colorspace.hsl_to_rgb(hsl), self.rgb, atol=1e-9)
+
+
+    def test_lab(self):
+        np.testing.assert_allclose(colorspace.rgb_to_lab([1, 1, 1]), [100, 0, 0], atol=1e-3)
+        np.testing.assert_allclose(colorspace.rgb_to_lab([0, 0, 0]), [0, 0, 0], atol=1e-9)
+        lab = colorspace.rgb_to_lab(self.rgb)
+        np.testing.assert_allclose(colorspace.lab_to_rgb(lab), self.rgb, atol=1e-5)
+
+
+    def test_hex(self):
+        self.assertEqual(colorspace.rgb_to_hex([1, 0.5, 0]), '#ff8000')
+        self.assertEqual(colorspace.rgb_to_hex([[0, 0, 0], [1, 1, 1]]), ['#000000', '#ffffff'])
+        np.testing.assert_allclose(colorspace.hex_to_rgb('#ff0000'), [1, 0, 0])
+        self.assertEqual(colorspace.hex_to_rgb(['#000000', 'ffffff']).shape, (2, 3))
+        with self.assertRaises(ValueError):
+            colorspace.hex_to_rgb('#fff')
+
+
+    def test_convert(self):
+        hsv = colorspace.convert(self.rgb, 'rgb', 'hsv')
+        hsl = colorspace.convert(hsv, 'hsv', 'hsl')
+        np.testing.assert_allclose(colorspace.convert(hsl, 'hsl', 'rgb'), self.rgb, atol=1e-9)
+        with self.assertRaises(ValueError):
+            colorspace.convert(self.rgb, 'rgb', 'cmyk')
+
+
+    def test_generate_palette(self):
+        rgb = colorspace.generate_palette(300)
+        self.assertEqual(rgb.shape, (300, 3))
+        self.assertTrue(np.all((rgb >= 0) & (rgb <= 1)))
+        
+        # Growing the palette keeps the earlier colors
+        np.testing.assert_allclose(colorspace.generate_palette(10), rgb[:10])
+        
+        # Neighbours clearly differ
+        lab = colorspace.rgb_to_lab(rgb)
+        self.assertGreater(np.linalg.norm(np.diff(lab, axis=0), axis=-1).min(), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
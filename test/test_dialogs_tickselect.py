@@ -0,0 +1,247 @@
+import types
+import unittest
+
+from tk_steroids.dialogs import TickSelect, VirtualTickSelect
+from tk_test_helpers import tk_root
+
+
+class TestVirtualTickSelect(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tk_root()
+        self.selections = ['channel_{}'.format(i) for i in range(100000)]
+        self.made = []
+        self.selector = VirtualTickSelect(self.root, self.selections, self.made.append,
+                close_on_ok=False, ticked=['channel_1'])
+
+    def tearDown(self):
+        self.root.destroy()
+
+
+    def resize(self, n_rows):
+        self.selector._on_configure(types.SimpleNamespace(
+            height=n_rows*self.selector._row_height))
+
+
+    def texts(self):
+        return [row.cget('text') for row in self.selector._rows if row.grid_info()]
+
+
+    def test_rows(self):
+        self.assertEqual(len(self.selector._rows), 1)
+
+        self.resize(10)
+        self.assertEqual(len(self.selector._rows), 10)
+        self.assertEqual(self.texts(), self.selections[:10])
+        self.assertEqual(self.selector._row_variables[1].get(), 1)
+
+        # Shrinking hides the extra rows and growing reuses them
+        self.resize(3)
+        self.assertEqual(self.selector.n_rows, 3)
+        self.assertEqual(self.texts(), self.selections[:3])
+        self.resize(8)
+        self.assertEqual(len(self.selector._rows), 10)
+        self.assertEqual(self.texts(), self.selections[:8])
+
+
+    def test_scroll(self):
+        self.resize(5)
+        self.selector._scroll_by(50)
+        self.assertEqual(self.texts(), self.selections[50:55])
+
+        self.selector._on_scroll('moveto', '1.0')
+        self.assertEqual(self.texts(), self.selections[-5:])
+
+
+    def test_click(self):
+        self.resize(5)
+        self.selector._scroll_by(10)
+        self.selector._row_variables[2].set(1)
+        self.selector._on_click(2)
+        self.assertEqual(self.selector.ticked, ['channel_1', 'channel_12'])
+
+
+    def test_bulk(self):
+        self.selector.select_all()
+        self.assertEqual(len(self.selector.ticked), len(self.selections))
+
+        self.selector.toggle_selection()
+        self.assertEqual(self.selector.ticked, [])
+
+        self.selector.select_range(5, 7)
+        self.selector.on_ok()
+        self.assertEqual(self.made, [['channel_5', 'channel_6']])
+
+
+    def test_single_select(self):
+        selector = VirtualTickSelect(self.root, self.selections, self.made.append,
+                close_on_ok=False, single_select=True, ticked=['channel_5'])
+        selector._on_configure(types.SimpleNamespace(height=10*selector._row_height))
+        selector._row_variables[7].set(1)
+        selector._on_click(7)
+        self.assertEqual(selector._row_variables[5].get(), 0)
+        selector.on_ok()
+        self.assertEqual(self.made, [['channel_7']])
+
+
+
+class TestTickVariables(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tk_root()
+        self.selections = ['a', 'b', 'c', 'd']
+
+    def tearDown(self):
+        self.root.destroy()
+
+
+    def test_variables(self):
+        selector = TickSelect(self.root, self.selections, None, ticked=['b'])
+        variables = selector.tk_variables
+        self.assertEqual(len(variables), 4)
+        self.assertIs(selector.tk_variables, variables)
+        self.assertEqual([variable.get() for variable in variables], [0, 1, 0, 0])
+
+        # Setting a variable ticks the checkbutton too
+        variables[3].set(1)
+        self.assertEqual(selector.ticked, ['b', 'd'])
+        self.assertEqual(int(selector.getvar('{}(3)'.format(selector._array_name))), 1)
+
+        selector.toggle_selection()
+        self.assertEqual([variable.get() for variable in variables], [1, 0, 1, 0])
+
+        selector.destroy()
+
+
+    def test_single_select(self):
+        selector = TickSelect(self.root, self.selections, None, ticked=['c'],
+                single_select=True)
+        variables = selector.tk_variables
+        self.assertEqual(len(variables), 1)
+        self.assertEqual(variables[0].get(), 2)
+
+        selector.ticked = ['a']
+        self.assertEqual(variables[0].get(), 0)
+
+
+
+class TestTickSelectSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tk_root()
+        self.selections = ['Channel_{}'.format(i) for i in range(30)]
+
+    def tearDown(self):
+        self.root.destroy()
+
+
+    def shown(self, selector):
+        return [button.cget('text') for button in selector.checkbuttons
+                if button.grid_info()]
+
+
+    def test_debounced(self):
+        selector = TickSelect(self.root, self.selections, None, search=True)
+        for text in ('C', 'Ch', 'Channel_2'):
+            selector.searchtext.set(text)
+        
+        # Nothing is filtered until the typing stops
+        self.assertTrue(selector._search_debouncer.pending)
+        self.assertEqual(len(self.shown(selector)), 30)
+        
+        selector._search_debouncer.flush()
+        expected = ['Channel_2'] + ['Channel_2{}'.format(i) for i in range(10)]
+        self.assertEqual(self.shown(selector), expected)
+        self.assertEqual(selector.visible_checkbuttons,
+                [selector.checkbuttons[self.selections.index(text)] for text in expected])
+
+        # Bulk operations work on the shown selections
+        selector.select_all()
+        self.assertEqual(selector.ticked, expected)
+
+        selector.searchtext.set('')
+        selector._search_debouncer.flush()
+        self.assertEqual(len(self.shown(selector)), 30)
+
+
+    def test_regrid_changed_only(self):
+        selector = TickSelect(self.root, self.selections, None, search=True)
+        selector.searchtext.set('Channel_1')
+        selector._search_debouncer.flush()
+        
+        regridded = []
+        for button in selector.checkbuttons:
+            button.grid = lambda button=button: regridded.append(button)
+            button.grid_remove = lambda button=button: regridded.append(button)
+        
+        selector.searchtext.set('Channel_1')
+        selector._search_debouncer.flush()
+        self.assertEqual(regridded, [])
+
+        selector.searchtext.set('Channel_12')
+        selector._search_debouncer.flush()
+        self.assertEqual(len(regridded), 10)
+
+
+    def test_case_insensitive(self):
+        selector = TickSelect(self.root, self.selections, None, search=True,
+                case_sensitive=False, search_mode='prefix')
+        selector.searchtext.set('channel_1')
+        selector._search_debouncer.flush()
+        self.assertEqual(len(self.shown(selector)), 11)
+
+
+    def test_virtual(self):
+        selector = VirtualTickSelect(self.root, self.selections, None, search=True)
+        selector.searchtext.set('Channel_2')
+        selector._search_debouncer.flush()
+        self.assertEqual(selector._n_shown(), 11)
+        self.assertEqual(selector._rows[0].cget('text'), 'Channel_2')
+
+
+
+class TestTickSelectTimers(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tk_root()
+        self.selections = ['channel_{}'.format(i) for i in range(30)]
+
+    def tearDown(self):
+        self.root.destroy()
+
+
+    def pending_afters(self):
+        return self.root.tk.splitlist(self.root.tk.call('after', 'info'))
+
+
+    def test_no_polling(self):
+        selector = TickSelect(self.root, self.selections, None, search=True)
+        self.root.update_idletasks()
+        self.assertEqual(self.pending_afters(), ())
+
+        selector.searchtext.set('channel_1')
+        self.assertEqual(len(self.pending_afters()), 1)
+        selector._search_debouncer.flush()
+        self.assertEqual(self.pending_afters(), ())
+
+
+    def test_destroy_cancels(self):
+        for selector_class in (TickSelect, VirtualTickSelect):
+            selector = selector_class(self.root, self.selections, None, search=True)
+            selector.searchtext.set('channel_1')
+            selector.destroy()
+            self.assertEqual(self.pending_afters(), ())
+
+
+    def test_scrollregion(self):
+        selector = TickSelect(self.root, self.selections, None)
+        self.root.update_idletasks()
+        selector.frame.event_generate('<Configure>')
+        
+        region = [int(float(x)) for x in selector.canvas.cget('scrollregion').split()]
+        self.assertEqual(region, [0, 0, selector.frame.winfo_reqwidth(),
+            selector.frame.winfo_reqheight()])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+
+import unittest
+
+from tk_steroids.dialogs import _TickStates
+
+
+class States(_TickStates):
+    '''
+    The tick state operations without the widgets
+    '''
+    def __init__(self, selections, ticked=None, single_select=False):
+        self.selections = selections
+        self.single_select = single_select
+        self.case_sensitive = True
+        self.search_mode = 'substring'
+        self._search_index = None
+        self._init_states(ticked)
+        self.n_syncs = 0
+
+    def _sync(self):
+        self.n_syncs += 1
+
+
+class TestTickStates(unittest.TestCase):
+
+    def setUp(self):
+        self.selections = ['channel_{}'.format(i) for i in range(10000)]
+        self.states = States(self.selections, ticked=['channel_1', 'channel_3'])
+
+
+    def test_ticked(self):
+        self.assertEqual(self.states.ticked, ['channel_1', 'channel_3'])
+        self.states.ticked = ['channel_5']
+        self.assertEqual(self.states.ticked, ['channel_5'])
+
+
+    def test_bulk(self):
+        states = self.states
+        
+        states.select_all()
+        self.assertEqual(states.ticked, self.selections)
+        states.select_none()
+        self.assertEqual(states.ticked, [])
+
+        states.select_range(10, 20)
+        states.toggle_selection()
+        self.assertEqual(len(states.ticked), 9990)
+        self.assertNotIn('channel_15', states.ticked)
+
+        states.select_pattern(r'_99\d\d$', tick=False)
+        self.assertEqual(len(states.ticked), 9890)
+        self.assertEqual(states.n_syncs, 5)
+
+
+    def test_shown_only(self):
+        states = self.states
+        states._shown = [0, 2]
+        states.toggle_selection()
+        self.assertEqual(states.ticked, ['channel_0', 'channel_1', 'channel_2', 'channel_3'])
+        states.select_none()
+        self.assertEqual(states.ticked, ['channel_1', 'channel_3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
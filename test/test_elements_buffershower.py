@@ -1,17 +1,139 @@
-
-import sys
 import io
+import sys
+import unittest
 
 import tkinter as tk
 from tk_steroids.elements import BufferShower
+from tk_test_helpers import tk_root
+
+
+class TestBufferShower(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tk_root()
+        self.buffer = io.StringIO()
+
+    def tearDown(self):
+        self.root.destroy()
+
+
+    def shower(self, **kwargs):
+        shower = BufferShower(self.root, self.buffer, **kwargs)
+        # Stop polling; the tests read the buffer by calling callback
+        shower.visibility_changed(False)
+        return shower
+
+
+    def write_lines(self, start, stop):
+        for i in range(start, stop):
+            self.buffer.write('line {}\n'.format(i))
+
+
+    def shown(self, shower):
+        return shower.text.get('1.0', 'end-1c')
+
+
+    def expected(self, start, stop):
+        return ''.join('line {}\n'.format(i) for i in range(start, stop))
+
+
+    def test_trim(self):
+        shower = self.shower(max_entries=5)
+        self.write_lines(0, 3)
+        shower.callback()
+        self.assertEqual(self.shown(shower), self.expected(0, 3))
+        self.assertEqual(shower.entries, 3)
+
+        self.write_lines(3, 7)
+        shower.callback()
+        self.assertEqual(self.shown(shower), self.expected(2, 7))
+        self.assertEqual(shower.entries, 5)
+
+        # More new lines than shown at once
+        self.write_lines(7, 100)
+        shower.callback()
+        self.assertEqual(self.shown(shower), self.expected(95, 100))
+        self.assertEqual(shower.entries, 5)
+
+
+    def test_partial_line(self):
+        shower = self.shower(max_entries=2)
+        self.buffer.write('line 0\nli')
+        shower.callback()
+        self.assertEqual(self.shown(shower), 'line 0\nli')
+        self.assertEqual(shower.entries, 1)
+
+        self.buffer.write('ne 1\nline 2\n')
+        shower.callback()
+        self.assertEqual(self.shown(shower), self.expected(1, 3))
+
+
+    def test_consume_buffer(self):
+        shower = self.shower(consume_buffer=True)
+        self.write_lines(0, 3)
+        shower.callback()
+        self.assertEqual(self.buffer.getvalue(), '')
+
+        self.write_lines(3, 4)
+        shower.callback()
+        self.assertEqual(self.shown(shower), self.expected(0, 4))
+
+
+    def test_no_history(self):
+        shower = self.shower()
+        self.assertIsNone(shower.store)
+        self.assertIsNone(shower.classifier)
+        with self.assertRaises(ValueError):
+            shower.search('line')
+
+
+    def test_history(self):
+        shower = self.shower(max_entries=5, history=True)
+        self.write_lines(0, 20)
+        shower.callback()
+        self.assertEqual(shower.search(r'line 1\d'), list(range(10, 20)))
+
+        shower.show_history(3)
+        self.assertFalse(shower.following)
+        self.assertIn('line 3', self.shown(shower))
+
+        # New lines go to the history but are not shown
+        self.write_lines(20, 21)
+        shower.callback()
+        self.assertNotIn('line 20', self.shown(shower))
+
+        shower.follow()
+        self.assertEqual(self.shown(shower), self.expected(16, 21))
+
+
+    def test_filter(self):
+        shower = self.shower(history=True, classifier=True)
+        self.buffer.write('INFO:camera:started\nERROR:camera:failed\nINFO:storage:saved\n')
+        shower.callback()
+
+        shower.set_filter(level='ERROR')
+        self.assertEqual(self.shown(shower), 'ERROR:camera:failed\n')
+
+        shower.set_filter(sources=['storage'])
+        self.assertEqual(self.shown(shower), 'INFO:storage:saved\n')
+
+
+def main():
+    '''
+    Interactive demo: show the prints in a window
+    '''
+    sys.stdout = io.StringIO()
+    print('test')
+    print('test2')
+    sys.stdout.write('aana')
+
+    root = tk.Tk()
+    BufferShower(root, sys.stdout).grid()
+    root.mainloop()
 
-oldout = sys.stdout
-sys.stdout = io.StringIO()
-print('test')
-print('test2')
-sys.stdout.write('aana')
 
-root = tk.Tk()
-buf = io.StringIO()
-BufferShower(root, sys.stdout).grid()
-root.mainloop()
+if __name__ == '__main__':
+    if '--demo' in sys.argv:
+        main()
+    else:
+        unittest.main()
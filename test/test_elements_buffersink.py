@@ -0,0 +1,133 @@
+
+import time
+import logging
+import threading
+import unittest
+
+from tk_steroids.elements import BufferSink
+
+
+class TestBufferSink(unittest.TestCase):
+
+    def setUp(self):
+        self.sink = BufferSink(max_pending=100)
+        self.wakeups = 0
+
+
+    def wakeup(self):
+        self.wakeups += 1
+
+
+    def test_write_drain(self):
+        print('hello', file=self.sink)
+        self.sink.write('world\n')
+        self.assertEqual(self.sink.drain(), ('hello\nworld\n', 0))
+        self.assertEqual(self.sink.drain(), ('', 0))
+
+
+    def test_logging_handler(self):
+        logger = logging.getLogger('test_buffersink')
+        logger.propagate = False
+        logger.addHandler(self.sink)
+        try:
+            logger.warning('careful')
+        finally:
+            logger.removeHandler(self.sink)
+        self.assertEqual(self.sink.drain()[0], 'careful\n')
+
+
+    def test_wakeup_only_when_data(self):
+        self.sink.set_wakeup(self.wakeup)
+        self.assertEqual(self.wakeups, 0)
+        
+        # Only the first write to an empty sink wakes up
+        for i in range(10):
+            self.sink.write('line\n')
+        self.assertEqual(self.wakeups, 1)
+
+        self.sink.drain()
+        self.sink.write('line\n')
+        self.assertEqual(self.wakeups, 2)
+
+
+    def test_failing_wakeup_retried(self):
+        def fail():
+            raise RuntimeError('main thread is not in main loop')
+        self.sink.set_wakeup(fail)
+        self.sink.write('a')
+        self.sink.set_wakeup(self.wakeup)
+        self.assertEqual(self.wakeups, 1)
+
+
+    def test_overload_drops(self):
+        for i in range(150):
+            self.sink.write('{}\n'.format(i))
+        text, dropped = self.sink.drain()
+        self.assertEqual(dropped, 50)
+        self.assertEqual(self.sink.dropped, 50)
+        self.assertTrue(text.startswith('50\n'))
+
+
+    def test_threads(self):
+        sink = BufferSink(max_pending=100000)
+        def writer(i_thread):
+            for i in range(1000):
+                sink.write('{} {}\n'.format(i_thread, i))
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        text, dropped = sink.drain()
+        self.assertEqual(dropped, 0)
+        self.assertEqual(text.count('\n'), 8000)
+
+
+    def test_thread_and_main_loop_logging(self):
+        # A wakeup that waits for the main thread (like a blocking call
+        # to tkinter) must not block the main thread's own logging
+        logger = logging.getLogger('test_buffersink_threads')
+        logger.propagate = False
+        logger.addHandler(self.sink)
+        self.addCleanup(logger.removeHandler, self.sink)
+
+        woken = threading.Event()
+        main_done = threading.Event()
+        def wakeup():
+            woken.set()
+            main_done.wait(5)
+        self.sink.set_wakeup(wakeup)
+
+        worker = threading.Thread(target=logger.warning, args=('from worker',))
+        worker.start()
+        self.assertTrue(woken.wait(5))
+
+        # Fails the test instead of hanging if the main thread blocks
+        timer = threading.Timer(5, main_done.set)
+        timer.start()
+        start = time.monotonic()
+        logger.warning('from main loop')
+        elapsed = time.monotonic() - start
+        main_done.set()
+        timer.cancel()
+        worker.join()
+
+        self.assertLess(elapsed, 1)
+        text, dropped = self.sink.drain()
+        self.assertEqual(sorted(text.splitlines()), ['from main loop', 'from worker'])
+
+
+    def test_handler_filter(self):
+        logger = logging.getLogger('test_buffersink_filter')
+        logger.propagate = False
+        logger.addHandler(self.sink)
+        self.addCleanup(logger.removeHandler, self.sink)
+        self.sink.addFilter(lambda record: 'secret' not in record.getMessage())
+
+        logger.warning('shown')
+        logger.warning('secret')
+        self.assertEqual(self.sink.drain()[0], 'shown\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
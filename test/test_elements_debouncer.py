@@ -0,0 +1,105 @@
+
+import unittest
+from unittest import mock
+
+from tk_steroids.elements import Debouncer, TickboxFrame
+from tk_steroids.settings import _merge_diffs
+
+from tk_test_helpers import FakeWidget, tk_root
+
+
+class TestDebouncer(unittest.TestCase):
+
+    def setUp(self):
+        self.widget = FakeWidget()
+        self.calls = []
+        patcher = mock.patch('time.monotonic', self.widget.monotonic)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+    def test_debounce(self):
+        debouncer = Debouncer(self.widget, lambda: self.calls.append(self.widget.now), 100)
+        for i in range(10):
+            debouncer()
+            self.widget.advance(50)
+        self.assertEqual(self.calls, [])
+        self.widget.advance(50)
+        self.assertEqual(self.calls, [550])
+
+
+    def test_throttle(self):
+        debouncer = Debouncer(self.widget, lambda: self.calls.append(self.widget.now),
+                100, throttle=300)
+        for i in range(20):
+            debouncer()
+            self.widget.advance(50)
+        self.assertEqual(self.calls, [300, 600, 900])
+        self.widget.advance(50)
+        self.assertEqual(self.calls, [300, 600, 900, 1050])
+
+
+    def test_merge(self):
+        debouncer = Debouncer(self.widget, self.calls.append, 100, merge=_merge_diffs)
+        debouncer({'filter': {'window': 3}})
+        debouncer({'filter': {'window': 5, 'smooth': True}})
+        debouncer({'plot': {'color': 'red'}})
+        self.widget.advance(100)
+        self.assertEqual(self.calls, [
+            {'filter': {'window': 5, 'smooth': True}, 'plot': {'color': 'red'}}])
+        
+        debouncer({'plot': {'color': 'blue'}})
+        debouncer.flush()
+        self.assertEqual(self.calls[-1], {'plot': {'color': 'blue'}})
+        self.assertFalse(debouncer.pending)
+
+
+
+class TestTickboxFrameCallback(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tk_root()
+        self.calls = []
+
+    def tearDown(self):
+        self.root.destroy()
+
+
+    def test_clicks_only(self):
+        tickboxes = TickboxFrame(self.root, ['a', 'b', 'c'],
+                callback=lambda: self.calls.append(tickboxes.ticked))
+        tickboxes.states = {'a': True, 'b': True, 'c': False}
+        self.assertEqual(self.calls, [])
+
+        tickboxes.checkbuttons[2].invoke()
+        self.assertEqual(self.calls, [['a', 'b', 'c']])
+
+
+    def test_callback_setting_states(self):
+        def callback():
+            self.calls.append(None)
+            tickboxes.states = {'a': False}
+        
+        tickboxes = TickboxFrame(self.root, ['a', 'b'], callback=callback)
+        tickboxes.checkbuttons[0].invoke()
+        self.assertEqual(self.calls, [None])
+        self.assertEqual(tickboxes.ticked, [])
+
+
+    def test_debounced(self):
+        tickboxes = TickboxFrame(self.root, ['a', 'b'],
+                callback=lambda: self.calls.append(None), debounce=100)
+        tickboxes.checkbuttons[0].invoke()
+        tickboxes.checkbuttons[1].invoke()
+        self.assertEqual(self.calls, [])
+        
+        tickboxes._debouncer.flush()
+        self.assertEqual(self.calls, [None])
+
+        tickboxes.checkbuttons[1].invoke()
+        tickboxes.destroy()
+        self.assertFalse(tickboxes._debouncer.pending)
+
+
+if __name__ == '__main__':
+    unittest.main()
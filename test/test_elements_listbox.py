@@ -0,0 +1,238 @@
+
+import random
+import unittest
+
+import tkinter as tk
+
+from tk_steroids.elements import Listbox, VirtualListbox, _diff_opcodes, _merge_opcodes, _map_index
+from tk_test_helpers import tk_root
+
+
+def apply_opcodes(old, new, opcodes):
+    '''
+    Applies the opcodes in reverse order like Listbox.set_selections does
+    '''
+    items = list(old)
+    for tag, i1, i2, j1, j2 in reversed(opcodes):
+        if tag in ('delete', 'replace'):
+            del items[i1:i2]
+        if tag in ('insert', 'replace'):
+            items[i1:i1] = new[j1:j2]
+    return items
+
+
+class TestListboxDiff(unittest.TestCase):
+
+    def check(self, old, new, **kwargs):
+        opcodes = _diff_opcodes(old, new, **kwargs)
+        self.assertEqual(apply_opcodes(old, new, opcodes), new)
+        return opcodes
+
+
+    def test_append(self):
+        old = ['a', 'b', 'c']
+        opcodes = self.check(old, old+['d'])
+        self.assertEqual(opcodes[-1], ('insert', 3, 3, 3, 4))
+
+
+    def test_rename(self):
+        opcodes = self.check(['a', 'b', 'c'], ['a', 'x', 'c'])
+        self.assertIn(('replace', 1, 2, 1, 2), opcodes)
+        self.assertEqual(_map_index(opcodes, 1), 1)
+        self.assertEqual(_map_index(opcodes, 2), 2)
+
+
+    def test_remove(self):
+        opcodes = self.check(['a', 'b', 'c'], ['a', 'c'])
+        self.assertIsNone(_map_index(opcodes, 1))
+        self.assertEqual(_map_index(opcodes, 2), 1)
+
+
+    def test_random_edits(self):
+        rng = random.Random(0)
+        for i in range(200):
+            old = [str(rng.randint(0, 20)) for j in range(rng.randint(0, 30))]
+            new = [str(rng.randint(0, 20)) for j in range(rng.randint(0, 30))]
+            self.check(old, new)
+            self.check(old, new, max_matching=10)
+
+
+
+class TestShownDiff(unittest.TestCase):
+
+    def test_search_narrows(self):
+        opcodes = _merge_opcodes(range(6), [1, 2, 4])
+        self.assertEqual(opcodes, [
+            ('delete', 0, 1, 0, 0),
+            ('equal', 1, 3, 0, 2),
+            ('delete', 3, 4, 2, 2),
+            ('equal', 4, 5, 2, 3),
+            ('delete', 5, 6, 3, 3),
+            ])
+        self.assertEqual(_map_index(opcodes, 4), 2)
+        self.assertIsNone(_map_index(opcodes, 3))
+
+
+    def test_random_shown(self):
+        rng = random.Random(0)
+        for i in range(200):
+            old = sorted(rng.sample(range(40), rng.randint(0, 40)))
+            new = sorted(rng.sample(range(40), rng.randint(0, 40)))
+            opcodes = _merge_opcodes(old, new)
+            self.assertEqual(apply_opcodes(old, new, opcodes), new)
+            self.assertNotIn('replace', [opcode[0] for opcode in opcodes])
+            for index, value in enumerate(old):
+                if value in new:
+                    self.assertEqual(_map_index(opcodes, index), new.index(value))
+
+
+
+class TestListboxLookup(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tk_root()
+        self.picked = []
+        self.listbox = Listbox(self.root, ['a', 'b', 'c', 'b'], self.picked.append)
+
+    def tearDown(self):
+        self.root.destroy()
+
+
+    def test_index_of(self):
+        self.assertEqual(self.listbox.index_of('c'), 2)
+        self.assertEqual(self.listbox.index_of('b'), 1)
+        with self.assertRaises(ValueError):
+            self.listbox.index_of('x')
+        
+        self.listbox.set_selections(['x', 'c'])
+        self.assertEqual(self.listbox.index_of('c'), 1)
+        self.assertEqual(self.listbox.index_of('x'), 0)
+        with self.assertRaises(ValueError):
+            self.listbox.index_of('a')
+
+
+    def test_current(self):
+        self.listbox.current = 'c'
+        self.assertEqual(self.listbox.current, 'c')
+        self.listbox.current = 'a'
+        self.assertEqual(self.listbox.listbox.curselection(), (0,))
+        
+        with self.assertRaises(ValueError):
+            self.listbox.current = 'x'
+        
+        self.listbox.current = None
+        self.assertIsNone(self.listbox.current)
+
+
+    def test_current_searched(self):
+        listbox = Listbox(self.root, ['a', 'b', 'c', 'b'], None, search=True)
+        listbox.searchtext.set('b')
+        listbox.apply_search()
+        self.assertEqual(listbox.listbox.get(0, tk.END), ('b', 'b'))
+        
+        listbox.current = 'b'
+        self.assertEqual(listbox.listbox.curselection(), (0,))
+        
+        # Filtered out items can be current but are not shown selected
+        listbox.current = 'c'
+        self.assertEqual(listbox.current, 'c')
+        self.assertEqual(listbox.listbox.curselection(), ())
+
+
+    def test_search_cleared(self):
+        listbox = Listbox(self.root, ['a', 'b', 'c'], None, search=True)
+        listbox.searchtext.set('b')
+        listbox.apply_search()
+        
+        # Cleared while the debounced search is pending
+        listbox.searchtext.set('')
+        listbox.set_selections(['a', 'b', 'c', 'd'])
+        self.assertIsNone(listbox._shown)
+        self.assertEqual(listbox.listbox.get(0, tk.END), ('a', 'b', 'c', 'd'))
+
+
+    def test_selected(self):
+        listbox = Listbox(self.root, ['a', 'b', 'c', 'd', 'e'], self.picked.append,
+                selectmode=tk.MULTIPLE)
+        listbox.selected = ['e', 'a', 'b']
+        self.assertEqual(listbox.selected, ['a', 'b', 'e'])
+        self.assertEqual(listbox.listbox.curselection(), (0, 1, 4))
+        
+        listbox.selected = ['c']
+        self.assertEqual(listbox.selected, ['c'])
+        
+        with self.assertRaises(ValueError):
+            listbox.selected = ['c', 'x']
+        self.assertEqual(listbox.selected, ['c'])
+
+        listbox._call_callback()
+        self.assertEqual(self.picked, [['c']])
+
+
+
+class TestVirtualListbox(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tk_root()
+        self.selections = ['item {}'.format(i) for i in range(1000000)]
+        self.picked = []
+        self.listbox = VirtualListbox(self.root, self.selections, self.picked.append)
+
+    def tearDown(self):
+        self.root.destroy()
+
+
+    def test_visible_rows_only(self):
+        self.assertEqual(self.listbox.listbox.size(), self.listbox.n_rows)
+        self.assertEqual(self.listbox.listbox.get(0), 'item 0')
+
+
+    def test_scroll(self):
+        self.listbox._scroll_by(100)
+        self.assertEqual(self.listbox.listbox.get(0), 'item 100')
+        
+        self.listbox._on_scroll('moveto', '0.5')
+        self.assertEqual(self.listbox.offset, 500000)
+        self.assertEqual(self.listbox.listbox.get(0), 'item 500000')
+        
+        self.listbox._on_scroll('moveto', '1.0')
+        self.assertEqual(self.listbox.listbox.get(tk.END), 'item 999999')
+
+
+    def test_click(self):
+        self.listbox._scroll_by(10)
+        self.listbox.listbox.select_set(2)
+        self.listbox._call_callback()
+        self.assertEqual(self.picked, ['item 12'])
+        self.assertEqual(self.listbox.current, 'item 12')
+
+
+    def test_current(self):
+        self.listbox.current = 'item 123456'
+        self.assertEqual(self.listbox.current, 'item 123456')
+        self.assertEqual(self.listbox.selected, ['item 123456'])
+        self.assertEqual(self.listbox.listbox.curselection(),
+                (123456-self.listbox.offset,))
+        
+        self.listbox._move_selection(1)
+        self.assertEqual(self.picked, ['item 123457'])
+        self.assertEqual(self.listbox.listbox.curselection(),
+                (123457-self.listbox.offset,))
+
+
+    def test_search(self):
+        listbox = VirtualListbox(self.root, self.selections, None, search=True)
+        listbox.searchtext.set('item 99999')
+        listbox.apply_search()
+        expected = ['item 99999'] + ['item 99999{}'.format(i) for i in range(10)]
+        self.assertEqual(list(listbox.listbox.get(0, tk.END)), expected)
+
+
+    def test_colors(self):
+        self.listbox.set_selections(['a', 'b'], colors=['red', 'blue'])
+        self.assertEqual(self.listbox.listbox.get(0, tk.END), ('a', 'b'))
+        self.assertEqual(self.listbox.listbox.itemcget(1, 'background'), 'blue')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+from unittest import mock
+
+import tkinter as tk
+
+from tk_steroids.elements import Tabs
+from tk_test_helpers import tk_root
+
+
+class TestLazyTabs(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tk_root()
+        self.built = []
+        self.now = 0
+
+    def tearDown(self):
+        self.root.destroy()
+
+
+    def page(self, parent):
+        '''
+        Page element that records which pages get built
+        '''
+        self.built.append(len(self.built))
+        return tk.Frame(parent)
+
+
+    def tabs(self, n_pages=5, **kwargs):
+        names = ['page {}'.format(i) for i in range(n_pages)]
+        return Tabs(self.root, names, elements=[self.page]*n_pages, **kwargs)
+
+
+    def idle(self):
+        for i in range(10):
+            self.root.update_idletasks()
+
+
+    def test_eager(self):
+        tabs = self.tabs()
+        self.assertEqual(len(self.built), 5)
+        self.assertNotIn(None, tabs.pages)
+
+
+    def test_lazy(self):
+        tabs = self.tabs(lazy=True)
+        self.idle()
+        self.assertEqual(len(self.built), 1)
+        self.assertEqual([page is None for page in tabs.pages],
+                [False, True, True, True, True])
+
+        tabs.set_page(3)
+        self.assertEqual(tabs.i_current, 3)
+        self.assertIsNotNone(tabs.pages[3])
+        self.assertIsNone(tabs.pages[2])
+
+        # Going back does not build again
+        page = tabs.pages[3]
+        tabs.set_page(0)
+        tabs.set_page(3)
+        self.assertIs(tabs.pages[3], page)
+        self.assertEqual(len(self.built), 2)
+
+
+    def test_warmup(self):
+        tabs = self.tabs(lazy=True, warmup=1)
+        self.idle()
+        self.assertEqual([page is None for page in tabs.pages],
+                [False, False, True, True, True])
+
+        tabs.set_page(3)
+        self.idle()
+        self.assertEqual([page is None for page in tabs.pages],
+                [False, False, False, False, False])
+
+
+    def test_evict(self):
+        with mock.patch('time.monotonic', lambda: self.now):
+            tabs = self.tabs(lazy=True, evict_after=10)
+            tabs.set_page(3)
+            self.now = 20
+            tabs.set_page(4)
+            self.assertIsNone(tabs.pages[0])
+            self.assertIsNotNone(tabs.pages[3])
+
+            # Rebuilt when visited again
+            tabs.set_page(0)
+            self.assertIsNotNone(tabs.pages[0])
+            self.assertEqual(len(self.built), 4)
+
+
+    def test_evict_not_warmup(self):
+        with mock.patch('time.monotonic', lambda: self.now):
+            tabs = self.tabs(lazy=True, warmup=1, evict_after=10)
+            self.idle()
+            warm_page = tabs.pages[1]
+            self.assertIsNotNone(warm_page)
+
+            # The page 1 was not visited but it is within the warmup
+            # distance, so it should not be destroyed only to be built
+            # again by the warmup
+            self.now = 20
+            tabs.set_page(2)
+            self.idle()
+            self.assertIs(tabs.pages[1], warm_page)
+            self.assertEqual(len(self.built), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
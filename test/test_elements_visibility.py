@@ -0,0 +1,95 @@
+import unittest
+
+import tkinter as tk
+
+from tk_steroids.elements import Tabs, notify_visibility
+from tk_test_helpers import tk_root
+
+
+class Recorder(tk.Frame):
+    '''
+    Widget that records the visibility notifications it gets
+    '''
+    def __init__(self, parent):
+        tk.Frame.__init__(self, parent)
+        self.changes = []
+
+    def visibility_changed(self, visible):
+        self.changes.append(visible)
+
+
+class FeedObject:
+    def get(self):
+        import PIL.Image
+        return PIL.Image.new('RGB', (8, 8))
+
+
+
+class TestVisibility(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tk_root()
+
+    def tearDown(self):
+        self.root.destroy()
+
+
+    def test_notify_descendants(self):
+        frame = tk.Frame(self.root)
+        inner = tk.Frame(frame)
+        recorders = [Recorder(frame), Recorder(inner)]
+        hidden = Recorder(recorders[0])
+
+        notify_visibility(frame, False)
+        notify_visibility(frame, True)
+
+        for recorder in recorders:
+            self.assertEqual(recorder.changes, [False, True])
+
+        # Widgets with visibility_changed notify their own children
+        self.assertEqual(hidden.changes, [])
+
+
+    def test_tabs(self):
+        tabs = Tabs(self.root, ['a', 'b', 'c'], elements=[Recorder]*3)
+        pages = tabs.pages
+        self.assertEqual([page.changes for page in pages], [[], [False], [False]])
+
+        tabs.set_page(1)
+        self.assertEqual([page.changes for page in pages], [[False], [False, True], [False]])
+
+        # Selecting a page of hidden tabs does not show it
+        notify_visibility(tabs, False)
+        tabs.set_page(2)
+        self.assertEqual(pages[1].changes, [False, True, False, False])
+        self.assertEqual(pages[2].changes, [False])
+
+        notify_visibility(tabs, True)
+        self.assertEqual(pages[2].changes, [False, True])
+
+
+    def test_lazy_tabs(self):
+        tabs = Tabs(self.root, ['a', 'b'], elements=[Recorder]*2, lazy=True)
+        page = tabs.get_page(1)
+        self.assertEqual(page.changes, [False])
+
+
+    def test_imagefeed(self):
+        from tk_steroids.imagefeed import ImageFeed
+
+        feed = ImageFeed(self.root, feed_object=FeedObject())
+        feed.set_update_interval(100)
+        self.assertIsNotNone(feed._after_id)
+
+        notify_visibility(feed, False)
+        self.assertIsNone(feed._after_id)
+        feed.update_feed()
+        self.assertIsNone(feed._after_id)
+
+        notify_visibility(feed, True)
+        self.assertIsNotNone(feed._after_id)
+        feed.set_update_interval(0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+
+from tk_steroids.lazyimport import lazy_imports
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def setUp(self):
+        self.namespace = {'__name__': 'fake_module'}
+        self.n_loads = 0
+
+    def load(self):
+        self.n_loads += 1
+        import json
+        return {'json': json, 'dumps': json.dumps}
+
+
+    def test_import_once(self):
+        import_names, module_getattr = lazy_imports(self.namespace, ['json', 'dumps'], self.load)
+        self.assertNotIn('json', self.namespace)
+        
+        import_names()
+        import_names()
+        self.assertEqual(self.n_loads, 1)
+        self.assertEqual(self.namespace['dumps']([1]), '[1]')
+
+
+    def test_getattr(self):
+        import_names, module_getattr = lazy_imports(self.namespace, ['json', 'dumps'], self.load)
+        self.assertIs(module_getattr('dumps'), self.namespace['dumps'])
+        self.assertEqual(self.n_loads, 1)
+        with self.assertRaises(AttributeError):
+            module_getattr('loads')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+
+import os
+import re
+import tempfile
+import unittest
+from unittest import mock
+
+from tk_steroids.logstore import (
+        _required_literals,
+        LogStore,
+        LineClassifier,
+        LEVELS,
+        meta_level,
+        meta_rule,
+        meta_source,
+        )
+
+
+class TestLogStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+
+    def lines(self, start, stop):
+        return ['line {}'.format(i) for i in range(start, stop)]
+
+
+    def test_memory_only(self):
+        store = LogStore(memory_lines=10)
+        store.append(self.lines(0, 25))
+        self.assertEqual(len(store), 25)
+        self.assertEqual(store.first_line, 15)
+        self.assertEqual(store.get(0), self.lines(15, 25))
+        self.assertEqual(store.get(20, 22), self.lines(20, 22))
+        with self.assertRaises(IndexError):
+            store.line(3)
+
+
+    def test_spill(self):
+        store = LogStore(memory_lines=10, directory=self.tempdir.name, block_lines=7)
+        for i in range(0, 1000, 13):
+            store.append(self.lines(i, min(i+13, 1000)))
+        
+        self.assertEqual(store.first_line, 0)
+        self.assertEqual(store.get(0), self.lines(0, 1000))
+        self.assertEqual(store.get(500, 523), self.lines(500, 523))
+        self.assertEqual(store.line(3), 'line 3')
+        self.assertEqual(store.line(999), 'line 999')
+        
+        self.assertEqual(store.search(r'line 99\d$'), list(range(990, 1000)))
+        self.assertEqual(store.search(r'line 1\d$', start=15), list(range(15, 20)))
+        self.assertEqual(store.search('line', max_results=3), [0, 1, 2])
+        store.close()
+
+
+    def test_rotation(self):
+        store = LogStore(memory_lines=10, directory=self.tempdir.name,
+                block_lines=10, max_file_bytes=1, max_files=3)
+        store.append(self.lines(0, 200))
+        
+        # One block per file, 3 files kept
+        self.assertEqual(len(os.listdir(self.tempdir.name)), 3)
+        self.assertEqual(store.first_line, 160)
+        self.assertEqual(store.get(0), self.lines(160, 200))
+        self.assertEqual(store.search('line 1[0-9]$'), [])
+        store.close()
+
+
+    def test_shared_directory(self):
+        old = os.path.join(self.tempdir.name, 'log.0.z')
+        with open(old, 'wb') as fp:
+            fp.write(b'earlier session')
+        
+        stores = [LogStore(memory_lines=10, directory=self.tempdir.name, block_lines=5)
+                for i in range(2)]
+        for i_store, store in enumerate(stores):
+            store.append(['store {} line {}'.format(i_store, i) for i in range(30)])
+        
+        for i_store, store in enumerate(stores):
+            self.assertEqual(store.line(0), 'store {} line 0'.format(i_store))
+            store.close()
+        with open(old, 'rb') as fp:
+            self.assertEqual(fp.read(), b'earlier session')
+
+
+    def test_indexed_search(self):
+        store = LogStore(memory_lines=10, directory=self.tempdir.name, block_lines=100)
+        lines = ['camera {}: {} frames'.format(i % 7, i) for i in range(1000)]
+        lines[555] = 'ERROR: disk full'
+        store.append(lines)
+        
+        with mock.patch.object(store, '_read_block', wraps=store._read_block) as read:
+            self.assertEqual(store.search('disk full'), [555])
+            self.assertEqual(read.call_count, 1)
+        
+        for pattern, flags in [(r'camera 3: \d+ frames', 0), ('DISK', re.IGNORECASE),
+                ('(disk|camera 5)', 0), (r'frames$', 0), ('1?23 fr', 0)]:
+            expected = [i for i, line in enumerate(lines) if re.search(pattern, line, flags)]
+            self.assertEqual(store.search(pattern, flags=flags), expected, pattern)
+        store.close()
+
+
+    def test_required_literals(self):
+        self.assertEqual(_required_literals('disk full'), ['disk full'])
+        self.assertEqual(_required_literals(r'camera \d+: (ok|failed) now'), ['camera ', ': ', ' now'])
+        self.assertEqual(_required_literals('abc?d[xy]ef'), ['ab', 'd', 'ef'])
+        self.assertEqual(_required_literals(r'a\.b'), ['a.b'])
+        self.assertEqual(_required_literals('disk|camera'), [])
+        self.assertEqual(_required_literals('disk full', re.VERBOSE), [])
+        self.assertEqual(_required_literals(re.compile('(?x)disk full')), [])
+        self.assertEqual(_required_literals(r'\x41BC'), ['BC'])
+        self.assertEqual(_required_literals(r'a\u0042cd\U00000045fg'), ['a', 'cd', 'fg'])
+        self.assertEqual(_required_literals(r'\N{LATIN SMALL LETTER A}bc\101de'), ['bc', 'de'])
+        self.assertEqual(_required_literals(r'(a)b\1cd'), ['b', 'cd'])
+
+
+    def test_escaped_search(self):
+        store = LogStore(memory_lines=10, directory=self.tempdir.name, block_lines=100)
+        lines = ['ABC line {}'.format(i) if i % 50 == 0 else 'line {}'.format(i)
+                for i in range(1000)]
+        store.append(lines)
+        
+        for pattern in [r'\x41BC', r'\u0041BC line 5', r'\N{LATIN CAPITAL LETTER A}BC',
+                r'\101BC', r'(A)BC line 1\d0', r'\x41\x42\x43']:
+            expected = [i for i, line in enumerate(lines) if re.search(pattern, line)]
+            self.assertTrue(expected)
+            self.assertEqual(store.search(pattern), expected, pattern)
+        store.close()
+
+
+    def test_memory_meta(self):
+        store = LogStore(memory_lines=10)
+        store.append(self.lines(0, 25), range(25))
+        first, lines, meta = store.memory()
+        self.assertEqual(first, 15)
+        self.assertEqual(lines, self.lines(15, 25))
+        self.assertEqual(list(meta), list(range(15, 25)))
+
+
+
+class TestLineClassifier(unittest.TestCase):
+
+    def test_classify(self):
+        classifier = LineClassifier()
+        i_rule = classifier.add_rule('disk')
+        meta = classifier.classify_many([
+            'INFO:camera:started',
+            'WARNING:storage:disk almost full',
+            'ERROR:camera:failed',
+            'Traceback (most recent call last):',
+            'ValueError: bad frame',
+            'plain text',
+            ])
+        
+        levels = [LEVELS[meta_level(m)] for m in meta]
+        self.assertEqual(levels, ['INFO', 'WARNING', 'ERROR', 'ERROR', 'ERROR', ''])
+        
+        sources = [classifier.sources[meta_source(m)] for m in meta]
+        self.assertEqual(sources, ['camera', 'storage', 'camera', '', '', ''])
+
+        self.assertEqual([meta_rule(m) for m in meta], [0, i_rule, 0, 0, 0, 0])
+
+
+    def test_continuation(self):
+        classifier = LineClassifier()
+        lines = [
+            'ERROR:camera:capture failed',
+            'Traceback (most recent call last):',
+            '  File "camera.py", line 3, in capture',
+            '    grab()',
+            'OSError: device busy',
+            'print output after the error',
+            'no ERROR found here',
+            '2024-05-01 12:00:00,123 WARNING low light',
+            '    details of the warning',
+            '[INFO] started',
+            ]
+        levels = [LEVELS[meta_level(m)] for m in classifier.classify_many(lines)]
+        self.assertEqual(levels, ['ERROR']*5 + ['', '', 'WARNING', 'WARNING', 'INFO'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+
+import enum
+import inspect
+import pathlib
+import unittest
+from unittest import mock
+from typing import Literal, Optional
+
+from tk_steroids import routines
+from tk_steroids.routines import (
+        inspect_types,
+        inspect_booleans,
+        inspect_many,
+        extend_keywords,
+        inspect_schema,
+        )
+
+
+class Method(enum.Enum):
+    MEAN = 1
+    MEDIAN = 2
+
+
+def analyse(data, smooth=True, window=5, scale=1.5, name='a'):
+    pass
+
+
+class Analyser:
+    def run(self, data, normalize=False, threshold=0.5):
+        pass
+
+
+class TestInspect(unittest.TestCase):
+
+    def setUp(self):
+        routines.clear_inspect_cache()
+
+
+    def test_types(self):
+        self.assertEqual(inspect_booleans(analyse), (['smooth'], [True]))
+        self.assertEqual(inspect_types((int, float), analyse, exclude_types=bool),
+                (['window', 'scale'], [5, 1.5]))
+        self.assertEqual(inspect_types((int, float), analyse, ['window'], bool),
+                (['scale'], [1.5]))
+
+
+    def test_cached(self):
+        with mock.patch('inspect.signature', wraps=inspect.signature) as signature:
+            for i in range(3):
+                inspect_booleans(analyse)
+                inspect_types((int, float), analyse, exclude_types=bool)
+                inspect_booleans(Analyser().run)
+            self.assertEqual(signature.call_count, 2)
+        
+        # Returned lists are copies
+        options, defaults = inspect_booleans(analyse)
+        options.append('x')
+        self.assertEqual(inspect_booleans(analyse), (['smooth'], [True]))
+
+
+    def test_bound_method(self):
+        self.assertEqual(inspect_booleans(Analyser().run), (['normalize'], [False]))
+        self.assertEqual(inspect_booleans(Analyser.run), (['normalize'], [False]))
+        self.assertIn('self', routines.get_signature(Analyser.run).parameters)
+        self.assertNotIn('self', routines.get_signature(Analyser().run).parameters)
+
+
+    def test_invalidate(self):
+        def wrapper(data, verbose=False, **kwargs):
+            pass
+        self.assertEqual(inspect_booleans(wrapper), (['verbose'], [False]))
+        
+        extend_keywords(analyse)(wrapper)
+        self.assertEqual(inspect_booleans(wrapper), (['verbose', 'smooth'], [False, True]))
+
+
+    def test_many(self):
+        results = inspect_many(bool, [analyse, Analyser().run])
+        self.assertEqual(results, [(['smooth'], [True]), (['normalize'], [False])])
+
+
+
+class TestInspectSchema(unittest.TestCase):
+
+    def test_schema(self):
+        def analyse(data, *args, smooth=True, window: int = 5, scale=1.5,
+                mode: Literal['fast', 'exact'] = 'exact', method=Method.MEDIAN,
+                output: Optional[pathlib.Path] = None, label: str = '',
+                callback=None, **kwargs):
+            pass
+
+        schema = inspect_schema(analyse)
+        self.assertEqual([(spec.name, spec.kind) for spec in schema], [
+            ('smooth', 'bool'),
+            ('window', 'int'),
+            ('scale', 'float'),
+            ('mode', 'choice'),
+            ('method', 'choice'),
+            ('output', 'path'),
+            ('label', 'str'),
+            ])
+        specs = {spec.name: spec for spec in schema}
+        self.assertEqual(specs['mode'].choices, ('fast', 'exact'))
+        self.assertEqual(specs['mode'].default, 'exact')
+        self.assertEqual(specs['method'].choices, (Method.MEAN, Method.MEDIAN))
+        self.assertIs(specs['output'].type, pathlib.Path)
+        self.assertIsNone(specs['output'].default)
+        
+        self.assertIs(inspect_schema(analyse), schema)
+        self.assertEqual(len(inspect_schema(analyse, ['smooth', 'label'])), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
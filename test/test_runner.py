@@ -0,0 +1,87 @@
+
+import threading
+import unittest
+
+from tk_steroids.runner import ComputeRunner
+
+from tk_test_helpers import FakeWidget
+
+
+class TestComputeRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.widget = FakeWidget()
+        self.results = []
+
+
+    def test_latest_result_only(self):
+        release = threading.Event()
+        
+        def compute(x):
+            release.wait(5)
+            return x * 2
+        
+        runner = ComputeRunner(self.widget, compute, self.results.append)
+        for x in range(5):
+            runner.submit(x)
+        self.assertTrue(runner.running)
+        release.set()
+        
+        self.widget.run_until_idle()
+        self.assertEqual(self.results, [8])
+        self.assertFalse(runner.running)
+        
+        # Polling stops when nothing is running
+        self.assertEqual(self.widget.timers, {})
+        runner.shutdown()
+
+
+    def test_arguments_and_errors(self):
+        errors = []
+        def compute(x, scale=1):
+            if scale < 0:
+                raise ValueError('negative scale')
+            return x * scale
+
+        settings = {'scale': 3}
+        runner = ComputeRunner(self.widget, compute, self.results.append,
+                error_callback=errors.append,
+                arguments=lambda: ((2,), dict(settings)))
+        runner.run({'ignored': 'diff'})
+        self.widget.run_until_idle()
+        self.assertEqual(self.results, [6])
+
+        settings['scale'] = -1
+        runner.run()
+        self.widget.run_until_idle()
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], ValueError)
+        runner.shutdown()
+
+
+    def test_errors_reported_by_root(self):
+        def compute(x):
+            if x < 0:
+                raise ValueError('negative')
+            return x
+
+        runner = ComputeRunner(self.widget, compute, self.results.append)
+        runner.submit(-1)
+        self.widget.run_until_idle()
+        self.assertEqual(len(self.widget.errors), 1)
+        self.assertIsInstance(self.widget.errors[0], ValueError)
+
+        # Polling continues after an error
+        runner.submit(2)
+        self.widget.run_until_idle()
+        self.assertEqual(self.results, [2])
+        runner.shutdown()
+
+
+    def test_unknown_executor(self):
+        with self.assertRaises(ValueError):
+            ComputeRunner(self.widget, abs, print, executor='gpu')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+
+import re
+import unittest
+
+from tk_steroids.search import SearchIndex
+
+
+ITEMS = ['Channel_1 left', 'channel_2 right', 'Pressure A', 'pressure_b', 'Temperature']
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = SearchIndex(ITEMS)
+
+
+    def test_empty_query(self):
+        self.assertEqual(self.index.search(''), list(range(len(ITEMS))))
+
+
+    def test_substring(self):
+        self.assertEqual(self.index.search('ure'), [2, 3, 4])
+        self.assertEqual(self.index.filter('CHANNEL'), ITEMS[:2])
+
+
+    def test_prefix(self):
+        self.assertEqual(self.index.search('pre', mode='prefix'), [2, 3])
+        # Word prefixes, underscores separate words
+        self.assertEqual(self.index.search('b', mode='prefix'), [3])
+        self.assertEqual(self.index.search('ri', mode='prefix'), [1])
+        self.assertEqual(self.index.search('emp', mode='prefix'), [])
+
+
+    def test_fuzzy(self):
+        self.assertEqual(self.index.search('chlft', mode='fuzzy'), [0])
+        self.assertEqual(self.index.search('tmp', mode='fuzzy'), [4])
+
+
+    def test_regex(self):
+        self.assertEqual(self.index.search(r'_\d', mode='regex'), [0, 1])
+        # Invalid pattern gives the previous result
+        self.assertEqual(self.index.search(r'_\d(', mode='regex'), [0, 1])
+
+
+    def test_regex_literals(self):
+        items = ITEMS + ['CHANNEL_3 \u212aelvin', 'channel_33']
+        for case_sensitive in [False, True]:
+            index = SearchIndex(items, case_sensitive=case_sensitive)
+            for pattern in [r'channel_\d+ ', r'(?i)channel_3', r'kelvin', r'channel_(3|2)']:
+                flags = 0 if case_sensitive else re.IGNORECASE
+                expected = [i for i, item in enumerate(items) if re.search(pattern, item, flags)]
+                self.assertEqual(index.search(pattern, mode='regex'), expected, pattern)
+
+
+    def test_prefix_words_up_front(self):
+        index = SearchIndex(ITEMS, mode='prefix')
+        self.assertIsNotNone(index._words)
+        self.assertEqual(index.search('ri', mode='prefix'), [1])
+        
+        index = SearchIndex(['Ä-bc\u00e9_d'], mode='prefix')
+        self.assertEqual(index.search('bcé', mode='prefix'), [0])
+        self.assertEqual(index.search('d', mode='prefix'), [0])
+        
+        with self.assertRaises(ValueError):
+            SearchIndex(ITEMS, mode='glob')
+
+
+    def test_case_sensitive(self):
+        index = SearchIndex(ITEMS, case_sensitive=True)
+        self.assertEqual(index.search('Pressure'), [2])
+
+
+    def test_incremental(self):
+        '''
+        Extending a query gives the same results as searching anew
+        '''
+        for mode in ['prefix', 'substring', 'fuzzy']:
+            query = ''
+            for char in 'pressure':
+                query += char
+                self.assertEqual(self.index.search(query, mode),
+                        SearchIndex(ITEMS).search(query, mode))
+
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            self.index.search('a', mode='soundex')
+
+
+if __name__ == '__main__':
+    unittest.main()
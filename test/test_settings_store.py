@@ -0,0 +1,85 @@
+
+import os
+import json
+import enum
+import pathlib
+import tempfile
+import unittest
+
+from tk_steroids.settings import SettingsStore
+
+
+class Color(enum.Enum):
+    RED = 1
+    BLUE = 2
+
+
+class TestSettingsStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tempdir.name, 'settings.json')
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_missing_file(self):
+        store = SettingsStore(self.filename)
+        self.assertEqual(store.load(), {})
+        self.assertEqual(store.load(default={'a': {}}), {'a': {}})
+
+    def test_round_trip(self):
+        store = SettingsStore(self.filename, version=3)
+        settings = {'plot': {'grid': True, 'width': 1.5, 'name': 'x'}}
+        store.save(settings)
+        self.assertEqual(store.load(), settings)
+        self.assertEqual(os.listdir(self.tempdir.name), ['settings.json'])
+
+    def test_save_replaces(self):
+        store = SettingsStore(self.filename)
+        store.save({'a': {'x': 1}})
+        store.save({'a': {'x': 2}})
+        self.assertEqual(store.load(), {'a': {'x': 2}})
+
+    def test_special_values(self):
+        store = SettingsStore(self.filename)
+        store.save({'a': {'color': Color.BLUE, 'path': pathlib.Path('data')}})
+        self.assertEqual(store.load(), {'a': {'color': 'BLUE', 'path': 'data'}})
+
+    def test_failed_save_keeps_old(self):
+        store = SettingsStore(self.filename)
+        store.save({'a': {'x': 1}})
+        with self.assertRaises(TypeError):
+            store.save({'a': {'x': object()}})
+        self.assertEqual(store.load(), {'a': {'x': 1}})
+        self.assertEqual(os.listdir(self.tempdir.name), ['settings.json'])
+
+    def test_migrations(self):
+        SettingsStore(self.filename, version=1).save({'a': {'x': 1}})
+
+        def rename(settings):
+            return {'b': settings['a']}
+        def double(settings):
+            return {'b': {'x': settings['b']['x']*2}}
+
+        store = SettingsStore(self.filename, version=3, migrations={1: rename, 2: double})
+        self.assertEqual(store.load(), {'b': {'x': 2}})
+
+    def test_missing_migration(self):
+        SettingsStore(self.filename, version=1).save({})
+        with self.assertRaises(ValueError):
+            SettingsStore(self.filename, version=2).load()
+
+    def test_newer_version(self):
+        SettingsStore(self.filename, version=2).save({})
+        with self.assertRaises(ValueError):
+            SettingsStore(self.filename, version=1).load()
+
+    def test_file_format(self):
+        SettingsStore(self.filename, version=2).save({'a': {'x': 1}})
+        with open(self.filename) as fp:
+            self.assertEqual(json.load(fp), {'version': 2, 'settings': {'a': {'x': 1}}})
+
+
+if __name__ == '__main__':
+    unittest.main()
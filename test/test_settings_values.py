@@ -0,0 +1,92 @@
+
+import enum
+import pathlib
+import unittest
+
+from tk_steroids.elements import TickboxFrame, SliderFrame, EntryFrame
+from tk_steroids.settings import SettingsManager, _initial_values
+from tk_test_helpers import tk_root
+
+
+class Mode(enum.Enum):
+    FAST = 1
+    SLOW = 2
+
+
+class TestInitialValues(unittest.TestCase):
+
+    def test_tickboxes(self):
+        self.assertEqual(_initial_values(TickboxFrame, ['a', 'b'], {}),
+                {'a': False, 'b': False})
+        self.assertEqual(_initial_values(TickboxFrame, ['a', 'b'], {'defaults': [True, False]}),
+                {'a': True, 'b': False})
+
+    def test_single_select(self):
+        kwargs = {'single_select': True, 'defaults': [False, True, False]}
+        self.assertEqual(_initial_values(TickboxFrame, ['a', 'b', 'c'], kwargs),
+                {'a': False, 'b': True, 'c': False})
+        self.assertEqual(_initial_values(TickboxFrame, ['a', 'b'], {'single_select': True}),
+                {'a': True, 'b': False})
+
+    def test_sliders(self):
+        kwargs = {'defaults': [0.5, None, None], 'ranges': [None, (2, 5), None]}
+        self.assertEqual(_initial_values(SliderFrame, ['a', 'b', 'c'], kwargs),
+                {'a': 0.5, 'b': 2, 'c': 0})
+        self.assertEqual(_initial_values(SliderFrame, ['a'], {'defaults': [0]}), {'a': 0})
+
+    def test_sliders_like_scale(self):
+        # Rounded to the resolution and limited to the range
+        kwargs = {'defaults': [0.123456, 7.6, 12], 'ranges': [None, (0, 10), (0, 10)],
+                'resolutions': [None, 1, 0.5]}
+        values = _initial_values(SliderFrame, ['a', 'b', 'c'], kwargs)
+        self.assertEqual(values, {'a': 0.12, 'b': 8, 'c': 10.0})
+        self.assertIsInstance(values['b'], int)
+        self.assertIsInstance(values['c'], float)
+
+    def test_entries(self):
+        kwargs = {'defaults': [3, None, 'SLOW', None],
+                'choices': [None, None, list(Mode), ['x', 'y']]}
+        self.assertEqual(_initial_values(EntryFrame, ['a', 'b', 'c', 'd'], kwargs),
+                {'a': '3', 'b': '', 'c': Mode.SLOW, 'd': 'x'})
+
+    def test_entries_converted(self):
+        kwargs = {'defaults': ['data', '5', None, 'abc'],
+                'types': [pathlib.Path, int, float, int]}
+        values = _initial_values(EntryFrame, ['a', 'b', 'c', 'd'], kwargs)
+        self.assertEqual(values, {'a': pathlib.Path('data'), 'b': 5, 'c': None, 'd': 'abc'})
+
+
+
+class TestUnbuiltGroups(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tk_root()
+        self.manager = SettingsManager(self.root)
+        self.manager.add_group('g')
+        self.manager.add_sliders('g', ['x', 'n'], ranges=[None, (0, 10)],
+                resolutions=[None, 1])
+        self.manager.add_entries('g', ['mode'], choices=[list(Mode)])
+        
+        self.diffs = []
+        self.manager.add_change_listener(self.diffs.append)
+
+    def tearDown(self):
+        self.root.destroy()
+
+
+    def test_set_current_normalized(self):
+        self.manager.set_current({'g': {'x': 0.123456, 'n': 12, 'mode': 'SLOW'}})
+        expected = {'x': 0.12, 'n': 10, 'mode': Mode.SLOW}
+        self.assertEqual(self.manager.get_current()['g'], expected)
+        self.assertEqual(self.diffs, [{'g': expected}])
+        
+        version = self.manager.version
+        self.manager.build_group('g')
+        self.assertTrue(self.manager.is_built('g'))
+        self.assertEqual(self.manager.get_current()['g'], expected)
+        self.assertEqual(self.manager.version, version)
+        self.assertEqual(len(self.diffs), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+'''
+Helpers shared by the tests.
+'''
+
+import time
+import unittest
+
+import tkinter as tk
+
+
+class FakeRoot:
+    '''
+    Stands in for tk.Tk, the only widget having report_callback_exception
+    '''
+    def __init__(self, errors):
+        self.errors = errors
+
+    def report_callback_exception(self, exc_type, exc, traceback):
+        self.errors.append(exc)
+
+
+class FakeWidget:
+    '''
+    Stands in for a tkinter widget in the after-based code
+    (Debouncer, ComputeRunner...).
+
+    Like a tkinter Frame, it does not have report_callback_exception
+    but its root (_root) has. The reported exceptions go to errors.
+
+    The after callbacks run when the test advances the fake clock
+    (advance) or until none are left (run_until_idle).
+    '''
+    def __init__(self):
+        self.now = 0
+        self.timers = {}
+        self.n_after = 0
+        self.errors = []
+
+    def after(self, delay, function):
+        self.n_after += 1
+        self.timers[self.n_after] = (self.now + delay, function)
+        return self.n_after
+
+    def after_cancel(self, after_id):
+        del self.timers[after_id]
+
+    def _root(self):
+        return FakeRoot(self.errors)
+
+    def advance(self, ms):
+        '''
+        Move the fake clock and run the callbacks that are due
+        '''
+        self.now += ms
+        for after_id, (at, function) in sorted(self.timers.items(), key=lambda item: item[1][0]):
+            if at <= self.now and after_id in self.timers:
+                del self.timers[after_id]
+                function()
+
+    def monotonic(self):
+        '''
+        The fake clock in seconds, for patching time.monotonic
+        '''
+        return self.now / 1000
+
+    def run_until_idle(self, timeout=5):
+        '''
+        Run the callbacks, in real time, until none are scheduled
+        '''
+        start = time.monotonic()
+        while self.timers and time.monotonic() - start < timeout:
+            after_id, (at, function) = self.timers.popitem()
+            function()
+            time.sleep(0.001)
+
+
+def tk_root():
+    '''
+    A withdrawn tkinter root window for the tests that need real widgets.
+
+    Skips the test if no display is available.
+    '''
+    try:
+        root = tk.Tk()
+    except tk.TclError as error:
+        raise unittest.SkipTest('No display: {}'.format(error))
+    root.withdraw()
+    return root
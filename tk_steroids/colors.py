@@ -1,22 +1,103 @@
+'''
+Color picking widgets.
 
+The colormaps are computed with numpy (see tk_steroids.colorspace),
+imported lazily when the first colormap is made, and cached at the
+module level so that opening another picker, or moving the value
+slider back and forth, is free.
+'''
+
+import collections
 import tkinter as tk
 
+from . import colorspace
+from .lazyimport import lazy_imports
+
 
 CALLBACK_FORMATS = ['rgb', 'hex']
 
+# Color models of the colormap planes: the slider sets the third channel
+PLANE_MODELS = ['hsv', 'hsl']
+
+# (width, height, model, level) -> PPM image data of the colormap plane
+_COLORMAP_CACHE = collections.OrderedDict()
+_COLORMAP_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def _load_numpy():
+    import numpy as np
+    return {'np': np}
+
+_import_numpy, __getattr__ = lazy_imports(globals(), ['np'], _load_numpy)
+
+
+def _ppm_data(rgb):
+    '''
+    Binary PPM (P6) image data from an (height, width, 3) array of
+    0-1 floats, for tk.PhotoImage(data=...)
+    '''
+    _import_numpy()
+    height, width = rgb.shape[:2]
+    pixels = np.round(rgb*255).astype(np.uint8)
+    return 'P6 {} {} 255 '.format(width, height).encode('ascii') + pixels.tobytes()
+
+
+def _plane_color(model, x, y, width, height, level):
+    '''
+    The model channels (hue, saturation, level) at colormap pixels
+    '''
+    return (x * 360 / width, 1 - y / max(1, height-1), level / 100)
+
+
+def _colormap_data(width, height, model='hsv', level=100):
+    '''
+    PPM data of the hue (x) times saturation (y) colormap plane, where
+    the value (hsv) or lightness (hsl) is level/100. Cached, least
+    recently used planes are dropped when the cache grows too large.
+    '''
+    key = (width, height, model, level)
+    data = _COLORMAP_CACHE.get(key)
+    if data is not None:
+        _COLORMAP_CACHE.move_to_end(key)
+        return data
+
+    _import_numpy()
+    x = np.arange(width)[None, :]
+    y = np.arange(height)[:, None]
+    h, s, l = np.broadcast_arrays(*_plane_color(model, x, y, width, height, level))
+    rgb = colorspace.convert(np.stack([h, s, l], axis=-1), model, 'rgb')
+    data = _ppm_data(rgb)
+
+    _COLORMAP_CACHE[key] = data
+    size = sum(len(cached) for cached in _COLORMAP_CACHE.values())
+    while size > _COLORMAP_CACHE_BYTES and len(_COLORMAP_CACHE) > 1:
+        size -= len(_COLORMAP_CACHE.popitem(last=False)[1])
+    return data
+
+
 class _ColorMap(tk.Frame):
     '''
     A colorpicker part: Pick colors from a colormap.
+
+    The colormap shows hue (x) and saturation (y), and the slider next
+    to it sets the value (hsv model) or the lightness (hsl model).
     '''   
 
     def __init__(self, tk_parent, callback=None,
-            callback_format='rgb'):
+            callback_format='rgb', map_width=100, map_height=100,
+            model='hsv', level=None):
         '''
         callback : None or callable
             Callback on click on the colormap that takes in one positional
             argument that is the selected color.
         callback_format : string
             'rgb' or 'hex'
+        map_width, map_height : int
+            Size of the colormap in pixels
+        model : string
+            'hsv' for a value slider or 'hsl' for a lightness slider
+        level : int or None
+            Initial slider position, 0-100. None for 100 (hsv) or 50 (hsl)
         '''
         tk.Frame.__init__(self, tk_parent)
         self.callback = callback
@@ -27,23 +108,21 @@ class _ColorMap(tk.Frame):
             raise ValueError("Unkown callback format {}. Use {}".format(
                 callback_format, CALLBACK_FORMATS))
 
+        if model not in PLANE_MODELS:
+            raise ValueError("Unknown model {}. Use {}".format(model, PLANE_MODELS))
+        if level is None:
+            level = 100 if model == 'hsv' else 50
+
         self.mouse_down = False
+        self.model = model
+        self.level = int(level)
+        self.position = None
 
-        self.map_width = 100
-        self.map_height = 100
-        self.colormap = tk.PhotoImage(height=self.map_height,
-                width=self.map_width)
-        
-        red, green, blue = self._hsv()
-        for j in range(0, self.map_height):
-            saturation = 1-j/(self.map_height-1)
-            for i in range(0, self.map_width):
-                color = '#{0:02x}{1:02x}{2:02x}'.format(
-                        int(saturation*red[i]+(1-saturation)*255),
-                        int(saturation*green[i]+(1-saturation)*255),
-                        int(saturation*blue[i]+(1-saturation)*255))
-                self.colormap.put(color, to=(i,j))
-        
+        self.map_width = map_width
+        self.map_height = map_height
+        self.colormap = tk.PhotoImage(format='PPM',
+                data=_colormap_data(self.map_width, self.map_height,
+                    self.model, self.level))
         
         self.canvas = tk.Canvas(self, width=self.map_width, height=self.map_height)
         self.canvas.create_image(0, 0, image=self.colormap,
@@ -53,53 +132,53 @@ class _ColorMap(tk.Frame):
         self.canvas.scale('all', 0, 0 ,4, 4)
 
         self.canvas.bind('<Button-1>', self._on_click)
+        self.canvas.bind('<B1-Motion>', self._on_click)
        
+        self.slider = tk.Scale(self, from_=100, to=0, orient=tk.VERTICAL,
+                showvalue=False, length=self.map_height, command=self._on_level)
+        self.slider.set(self.level)
+        self.slider.grid(row=1, column=2, sticky='NS')
+
+
+    def _on_level(self, value):
+        '''
+        Slider moved; show the plane of the new level (from the cache
+        when it has been shown before)
+        '''
+        level = int(float(value))
+        if level == self.level:
+            return
+        self.level = level
+        self.colormap.configure(data=_colormap_data(self.map_width, self.map_height,
+            self.model, self.level))
+        
+        if self.position is not None:
+            self._pick(*self.position)
+
 
     def _on_click(self, event):
-        color = self.colormap.get(event.x, event.y)
+        x = min(max(event.x, 0), self.map_width-1)
+        y = min(max(event.y, 0), self.map_height-1)
+        self._pick(x, y)
+
+
+    def _pick(self, x, y):
+        '''
+        Compute the color at the colormap pixel and call the callback
+        '''
+        self.position = (x, y)
+        rgb = colorspace.convert(_plane_color(self.model, x, y,
+            self.map_width, self.map_height, self.level), self.model, 'rgb')
         
         if self.callback_format == 'hex':
-            color = '#{0:02x}{1:02x}{2:02x}'.format(*color)
+            color = colorspace.rgb_to_hex(rgb)
         elif self.callback_format == 'rgb':
-            pass
+            color = tuple(int(round(channel*255)) for channel in rgb)
 
         if callable(self.callback):
             self.callback(color)
         
 
-    def _hsv(self):
-        '''
-        Crete hsv colors.
-
-        Returns three lists of intensity values (0-255)
-        for the red, green and blue channels.
-        '''
-        # _   _
-        #  \_/
-        hsv_red = []
-        for h_i in range(0, self.map_width):
-            h = h_i * 360 / self.map_width
-            if 0<=h< 60 or 300<=h<360: 
-                value = 1
-            elif 120<=h<240:
-                value = 0
-            elif 60<=h<120:
-                value = (60-(h-60))/60
-            elif 240<=h< 300:
-                value = (h-240)/60
-
-            hsv_red.append(int(255*value))
-        
-        # Blue
-        h_cut = int(120/360*len(hsv_red))
-        hsv_blue = hsv_red[h_cut:] + hsv_red[:h_cut]
-        
-        # Green
-        h_cut = int(240/360*len(hsv_red))
-        hsv_green = hsv_red[h_cut:] + hsv_red[:h_cut]
- 
-        return hsv_red, hsv_green, hsv_blue
-
 
 class ColorPicker(tk.Frame):
     '''
@@ -109,39 +188,186 @@ class ColorPicker(tk.Frame):
     Colors are common 8-bit 3-channel.
     '''
 
-    def __init__(self, tk_parent, callback=None):
+    def __init__(self, tk_parent, callback=None, **kwargs):
+        '''
+        callback : None or callable
+            Called with the hex color ('#rrggbb') when a color is picked
+        kwargs
+            Passed to the colormap (see _ColorMap)
+        '''
         tk.Frame.__init__(self, tk_parent)
+        self.callback = callback
 
         self.colormap = _ColorMap(self, callback=self.set_color,
-                callback_format='hex')
+                callback_format='hex', **kwargs)
         self.colormap.grid(row=1, column=1)
         
         self.preview = tk.Canvas(self, width=100, height=100)
         self.preview.grid(row=1, column=2)
 
+
+    def show_color(self, color):
+        '''
+        Show the color in the preview without calling the callback
+        '''
+        self.preview.config(bg=color)
+
+
     def set_color(self, color):
         '''
         Sets the currently selected color
         '''
-        self.preview.config(bg=color)
+        self.show_color(color)
+        if callable(self.callback):
+            self.callback(color)
+
 
 
 class MultiPicker(tk.Frame):
     '''
-    Displays the selected colors, and by pressing
-    one of the colors, opens a ColorPicker instance.
+    Palette editor for many named colors.
+
+    Displays the colors as a scrollable list of swatches on one canvas
+    and, by pressing one of the colors, edits it with a ColorPicker.
+    One ColorPicker is shared by all the colors, so palettes of
+    hundreds of colors are cheap.
+
+    Attributes
+    ----------
+    color_names : list of strings
+        Names of the colors, in the shown order
+    colors : dict
+        The current colors, {name: '#rrggbb'}
+    current : string or None
+        The name of the color being edited
     '''
+
+    ROW_HEIGHT = 20
+
     def __init__(self, tk_parent, color_names,
-            callback=None):
+            callback=None, colors=None, callback_on_apply=None, height=400):
         '''
-        color_n
+        color_names : list of strings
+            Names of the colors
         callback : None or callable or list of callables
-            Called when a color is set. If list
+            Called when a color is set. If callable, called with the
+            name and the color. If list, one callable for each color,
+            called with the color.
+        colors : None, list or dict
+            Initial colors (hex), a list in the color_names order or
+            a dict. Missing colors come from generate_palette.
+        callback_on_apply : None or callable
+            Called with the colors dict when Apply is pressed
+        height : int
+            Height of the swatch list in pixels
         '''
         tk.Frame.__init__(self, tk_parent)
         
-        #for 
-        #tk.Label(self, text=)
+        self.color_names = list(color_names)
+        self._index = {name: i_color for i_color, name in enumerate(self.color_names)}
+        self.callback = callback
+        self.callback_on_apply = callback_on_apply
+        self.current = None
+        
+        if isinstance(callback, (list, tuple)) and len(callback) != len(self.color_names):
+            raise ValueError('Got {} callbacks for {} colors'.format(
+                len(callback), len(self.color_names)))
+
+        palette = colorspace.rgb_to_hex(colorspace.generate_palette(len(self.color_names)))
+        self.colors = dict(zip(self.color_names, palette))
+        if isinstance(colors, dict):
+            self.colors.update({name: color for name, color in colors.items() if name in self.colors})
+        elif colors is not None:
+            self.colors.update(zip(self.color_names, colors))
+
+        self.canvas = tk.Canvas(self, width=200, height=height, highlightthickness=0)
+        self.canvas.grid(row=1, column=1, sticky='NS')
+        scrollbar = tk.Scrollbar(self, orient='vertical', command=self.canvas.yview)
+        scrollbar.grid(row=1, column=2, sticky='NS')
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+
+        self._swatches = []
+        for i_color, name in enumerate(self.color_names):
+            y = i_color * self.ROW_HEIGHT
+            self._swatches.append(self.canvas.create_rectangle(
+                2, y+2, 40, y+self.ROW_HEIGHT-2, fill=self.colors[name],
+                tags=('row', 'row_{}'.format(i_color))))
+            self.canvas.create_text(46, y+self.ROW_HEIGHT/2, text=name, anchor='w',
+                    tags=('row', 'row_{}'.format(i_color)))
+        self._highlight = self.canvas.create_rectangle(0, 0, 0, 0, outline='black', width=2)
+        self.canvas.configure(scrollregion=(0, 0, 200, len(self.color_names)*self.ROW_HEIGHT))
+        self.canvas.bind('<Button-1>', self._on_click)
+
+        self.picker = ColorPicker(self, callback=self._on_pick)
+        self.picker.grid(row=1, column=3, sticky='N')
+
+        buttons = tk.Frame(self)
+        buttons.grid(row=2, column=1, columnspan=3)
+        tk.Button(buttons, text='Generate', command=self.generate).grid(row=0, column=0)
+        tk.Button(buttons, text='Apply', command=self.apply).grid(row=0, column=1)
+
+        if self.color_names:
+            self.select(self.color_names[0])
 
-    
 
+    def _on_click(self, event):
+        i_color = int(self.canvas.canvasy(event.y) // self.ROW_HEIGHT)
+        if 0 <= i_color < len(self.color_names):
+            self.select(self.color_names[i_color])
+
+
+    def select(self, name):
+        '''
+        Start editing the named color
+        '''
+        i_color = self._index[name]
+        self.current = name
+        y = i_color * self.ROW_HEIGHT
+        self.canvas.coords(self._highlight, 1, y+1, 198, y+self.ROW_HEIGHT-1)
+        self.picker.show_color(self.colors[name])
+
+
+    def _on_pick(self, color):
+        if self.current is not None:
+            self.set_colors({self.current: color})
+
+
+    def set_colors(self, colors):
+        '''
+        Set many colors at once.
+
+        colors : dict or list
+            {name: '#rrggbb'}, or a list in the color_names order
+        '''
+        if not isinstance(colors, dict):
+            colors = dict(zip(self.color_names, colors))
+        
+        for name, color in colors.items():
+            i_color = self._index[name]
+            self.colors[name] = color
+            self.canvas.itemconfig(self._swatches[i_color], fill=color)
+
+            if isinstance(self.callback, (list, tuple)):
+                self.callback[i_color](color)
+            elif callable(self.callback):
+                self.callback(name, color)
+
+        if self.current in colors:
+            self.picker.show_color(colors[self.current])
+
+
+    def generate(self, **kwargs):
+        '''
+        Replace all the colors by a generated palette.
+        kwargs are passed to colorspace.generate_palette.
+        '''
+        rgb = colorspace.generate_palette(len(self.color_names), **kwargs)
+        self.set_colors(colorspace.rgb_to_hex(rgb))
+
+
+    def apply(self):
+        '''
+        Call callback_on_apply with all the colors
+        '''
+        if callable(self.callback_on_apply):
+            self.callback_on_apply(dict(self.colors))
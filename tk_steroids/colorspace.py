@@ -0,0 +1,238 @@
+'''
+Vectorized conversions between color models.
+
+All the functions take scalars, sequences or numpy arrays and broadcast
+like numpy does. RGB, saturation, value and lightness are floats from
+0 to 1, hue is in degrees (0-360) and Lab is CIE L*a*b* (D65 white).
+The color channels are in the last dimension.
+
+Numpy is imported lazily, at the first conversion.
+'''
+
+from .lazyimport import lazy_imports
+
+MODELS = ['rgb', 'hsv', 'hsl', 'lab']
+
+# sRGB (linear) <-> XYZ, D65
+_RGB_TO_XYZ = [
+        [0.4124564, 0.3575761, 0.1804375],
+        [0.2126729, 0.7151522, 0.0721750],
+        [0.0193339, 0.1191920, 0.9503041],
+        ]
+_XYZ_TO_RGB = [
+        [3.2404542, -1.5371385, -0.4985314],
+        [-0.9692660, 1.8760108, 0.0415560],
+        [0.0556434, -0.2040259, 1.0572252],
+        ]
+_WHITE = [0.95047, 1.0, 1.08883]
+
+GOLDEN_ANGLE = 137.50776405003785
+
+
+def _load_numpy():
+    import numpy as np
+    return {'np': np}
+
+_import_numpy, __getattr__ = lazy_imports(globals(), ['np'], _load_numpy)
+
+
+def _channels(color):
+    '''Split the last dimension of a color array to three arrays
+    '''
+    _import_numpy()
+    color = np.asarray(color, dtype=float)
+    if color.shape[-1] != 3:
+        raise ValueError('Colors need 3 channels in the last dimension, got shape {}'.format(
+            color.shape))
+    return color[..., 0], color[..., 1], color[..., 2]
+
+
+def hsv_to_rgb(hsv):
+    '''
+    HSV to RGB.
+
+    Arguments
+    ---------
+    hsv : array-like
+        Hue (0-360), saturation and value in the last dimension
+    '''
+    h, s, v = _channels(hsv)
+
+    # f(n) = v - v*s*max(0, min(k, 4-k, 1)), k = (n + h/60) mod 6
+    k = (np.array([5., 3., 1.]) + h[..., None]/60) % 6
+    ramp = np.clip(np.minimum(k, 4-k), 0, 1)
+    return v[..., None] * (1 - s[..., None] * ramp)
+
+
+def rgb_to_hsv(rgb):
+    '''
+    RGB to HSV. Grays get the hue 0.
+    '''
+    r, g, b = _channels(rgb)
+    maxc = np.maximum(np.maximum(r, g), b)
+    minc = np.minimum(np.minimum(r, g), b)
+    delta = maxc - minc
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.where(maxc > 0, delta / maxc, 0)
+        h = np.where(maxc == r, ((g-b) / delta) % 6,
+                np.where(maxc == g, (b-r) / delta + 2, (r-g) / delta + 4))
+    h = np.where(delta > 0, h * 60, 0)
+    return np.stack([h, s, maxc], axis=-1)
+
+
+def hsl_to_rgb(hsl):
+    '''
+    HSL to RGB.
+
+    Arguments
+    ---------
+    hsl : array-like
+        Hue (0-360), saturation and lightness in the last dimension
+    '''
+    h, s, l = _channels(hsl)
+
+    # f(n) = l - a*max(-1, min(k-3, 9-k, 1)), k = (n + h/30) mod 12
+    a = (s * np.minimum(l, 1-l))[..., None]
+    k = (np.array([0., 8., 4.]) + h[..., None]/30) % 12
+    ramp = np.clip(np.minimum(k-3, 9-k), -1, 1)
+    return l[..., None] - a * ramp
+
+
+def rgb_to_hsl(rgb):
+    '''
+    RGB to HSL. Grays get the hue 0.
+    '''
+    h, s_v, v = _channels(rgb_to_hsv(rgb))
+    l = v * (1 - s_v/2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.where((l > 0) & (l < 1), (v - l) / np.minimum(l, 1-l), 0)
+    return np.stack([h, s, l], axis=-1)
+
+
+def _linear(rgb):
+    rgb = np.asarray(rgb, dtype=float)
+    return np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+
+
+def _gamma(linear):
+    linear = np.clip(linear, 0, 1)
+    return np.where(linear <= 0.0031308, linear * 12.92,
+            1.055 * linear ** (1/2.4) - 0.055)
+
+
+def rgb_to_lab(rgb):
+    '''
+    sRGB to CIE L*a*b* (L 0-100).
+    '''
+    _channels(rgb)
+    xyz = _linear(rgb) @ np.array(_RGB_TO_XYZ).T / np.array(_WHITE)
+
+    delta = 6/29
+    f = np.where(xyz > delta**3, np.cbrt(xyz), xyz / (3*delta**2) + 4/29)
+    fx, fy, fz = f[..., 0], f[..., 1], f[..., 2]
+    return np.stack([116*fy - 16, 500*(fx-fy), 200*(fy-fz)], axis=-1)
+
+
+def lab_to_rgb(lab):
+    '''
+    CIE L*a*b* to sRGB. Colors outside the sRGB gamut are clipped.
+    '''
+    L, a, b = _channels(lab)
+    fy = (L + 16) / 116
+    f = np.stack([fy + a/500, fy, fy - b/200], axis=-1)
+
+    delta = 6/29
+    xyz = np.where(f > delta, f**3, 3*delta**2 * (f - 4/29)) * np.array(_WHITE)
+    return _gamma(xyz @ np.array(_XYZ_TO_RGB).T)
+
+
+def rgb_to_hex(rgb):
+    '''
+    RGB to '#rrggbb' strings.
+
+    Returns a string for a single color and a list of strings
+    for a 2D array of colors.
+    '''
+    _channels(rgb)
+    values = np.round(np.clip(np.asarray(rgb, dtype=float), 0, 1) * 255).astype(int)
+    if values.ndim == 1:
+        return '#{:02x}{:02x}{:02x}'.format(*values)
+    return ['#{:02x}{:02x}{:02x}'.format(*color) for color in values.reshape(-1, 3)]
+
+
+def hex_to_rgb(hex_colors):
+    '''
+    '#rrggbb' (or 'rrggbb') strings to RGB.
+
+    Arguments
+    ---------
+    hex_colors : string or list of strings
+    '''
+    _import_numpy()
+    single = isinstance(hex_colors, str)
+    if single:
+        hex_colors = [hex_colors]
+
+    values = []
+    for color in hex_colors:
+        color = color.lstrip('#')
+        if len(color) != 6:
+            raise ValueError('Not a #rrggbb color: {}'.format(color))
+        values.append([int(color[i:i+2], 16) for i in (0, 2, 4)])
+
+    rgb = np.array(values, dtype=float).reshape(-1, 3) / 255
+    if single:
+        return rgb[0]
+    return rgb
+
+
+def convert(colors, source, target):
+    '''
+    Convert colors from one model to another (see MODELS).
+    '''
+    _import_numpy()
+    for model in (source, target):
+        if model not in MODELS:
+            raise ValueError('Unknown color model {}. Use {}'.format(model, MODELS))
+    if source == target:
+        return np.asarray(colors, dtype=float)
+    if source != 'rgb':
+        colors = globals()['{}_to_rgb'.format(source)](colors)
+    if target != 'rgb':
+        colors = globals()['rgb_to_{}'.format(target)](colors)
+    return colors
+
+
+def generate_palette(n_colors, lightness=(65, 45, 80), chroma=45, hue_offset=30):
+    '''
+    Perceptually distinct colors.
+
+    The hues go around the CIE LCh circle (Lab in polar coordinates)
+    by the golden angle, so that consecutive colors are far apart and
+    adding colors does not change the earlier ones. The lightness
+    levels are cycled to separate colors of similar hue.
+
+    Arguments
+    ---------
+    n_colors : int
+        Number of colors
+    lightness : float or sequence of floats
+        L* (0-100) level(s)
+    chroma : float
+        Colorfulness; sRGB fits about 45 at all hues
+    hue_offset : float
+        Hue of the first color, in degrees
+
+    Returns
+    -------
+    rgb : numpy array
+        (n_colors, 3) array of RGB colors
+    '''
+    _import_numpy()
+    i_color = np.arange(n_colors)
+    hue = np.radians(hue_offset + i_color * GOLDEN_ANGLE)
+    levels = np.atleast_1d(np.asarray(lightness, dtype=float))
+    lab = np.stack([levels[i_color % len(levels)],
+        chroma * np.cos(hue), chroma * np.sin(hue)], axis=-1)
+    return lab_to_rgb(lab)
@@ -1,5 +1,9 @@
+import itertools
 import tkinter as tk
 
+from .elements import Debouncer
+from .search import SearchIndex
+
 
 def popup(tk_parent, widget_class, args=[], kwargs={}, title=None,
         grid_pos=(1,1), sticky='NSWE', grid_weights=(1,1),
@@ -53,28 +57,238 @@ def popup(tk_parent, widget_class, args=[], kwargs={}, title=None,
     return toplevel, widget
 
 
-def popup_tickselect(tk_parent, *args, title='Make selection', **kwargs):
+def popup_tickselect(tk_parent, *args, title='Make selection', virtual=None, **kwargs):
+    '''
+    Open a TickSelect in a Toplevel window.
+
+    virtual : bool or None
+        If True, use VirtualTickSelect. If None (default), use
+        VirtualTickSelect when there are more than 1000 selections.
+    '''
     top = tk.Toplevel(tk_parent)
     top.title(title)
     top.grid_columnconfigure(0, weight=1)
     top.grid_rowconfigure(1, weight=1)
- 
-    selector = TickSelect(top, *args, **kwargs)
+    
+    if virtual is None:
+        selections = args[0] if args else kwargs.get('selections', [])
+        virtual = len(selections) > 1000
+
+    if virtual:
+        selector = VirtualTickSelect(top, *args, **kwargs)
+    else:
+        selector = TickSelect(top, *args, **kwargs)
     selector.grid(sticky='NSEW')
 
     tk.Button(selector, text='Close', command=top.destroy).grid(row=2, column=1)
 
 
 
-class TickSelect(tk.Frame):
+def _stop_search(selector):
+    '''
+    Cancel a pending (debounced) search of a TickSelect and remove
+    the trace of its search text.
+    '''
+    debouncer = getattr(selector, '_search_debouncer', None)
+    if debouncer is not None:
+        debouncer.cancel()
+        selector.searchtext.trace_remove('write', selector._search_trace)
+        selector._search_debouncer = None
+
+
+class _TickVariable(tk.IntVar):
+    '''
+    IntVar of one element of a TickSelect's Tcl array, for the code
+    using TickSelect.tk_variables. Getting and setting go through
+    the states of the TickSelect.
+    '''
+
+    def __init__(self, selector, i_item):
+        tk.IntVar.__init__(self, selector,
+                name='{}({})'.format(selector._array_name, i_item))
+        self._selector = selector
+        self._i_item = i_item
+
+    def get(self):
+        return self._selector.states[self._i_item]
+
+    def set(self, value):
+        self._selector.states[self._i_item] = int(bool(value))
+        self._selector._sync()
+
+    def __del__(self):
+        # The array is unset by TickSelect.destroy, only remove the traces
+        if self._tclCommands is not None:
+            for name in self._tclCommands:
+                self._tk.deletecommand(name)
+            self._tclCommands = None
+
+
+
+class _TickStates:
+    '''
+    Tick state operations shared by TickSelect and VirtualTickSelect.
+
+    The ticks are kept in the bytearray self.states (1 ticked, 0 not).
+    The operations change the states in Python and then update the
+    widgets in one go by calling self._sync(). self._shown is None when
+    all the selections are shown, otherwise the indices of the shown
+    selections (the ones matching the search).
+    '''
+
+    def _init_states(self, ticked):
+        self.states = bytearray(len(self.selections))
+        self._shown = None
+        if ticked:
+            ticked = set(ticked)
+            for i_selection, selection in enumerate(self.selections):
+                if selection in ticked:
+                    self.states[i_selection] = 1
+                    if self.single_select:
+                        break
+
+
+    def _get_search_index(self):
+        if self._search_index is None:
+            self._search_index = SearchIndex(self.selections, self.case_sensitive,
+                    self.search_mode)
+        return self._search_index
+
+
+    def _set_states(self, indices, value):
+        '''
+        Set the states of the indices (None for all) to value
+        '''
+        if indices is None:
+            self.states[:] = bytes([value]) * len(self.states)
+        else:
+            states = self.states
+            for i_item in indices:
+                states[i_item] = value
+
+
+    def select_all(self):
+        '''
+        Tick all the shown (matching the search) selections
+        '''
+        if self.single_select:
+            return
+        self._set_states(self._shown, 1)
+        self._sync()
+
+
+    def select_none(self):
+        '''
+        Untick all the shown (matching the search) selections
+        '''
+        if self.single_select:
+            return
+        self._set_states(self._shown, 0)
+        self._sync()
+
+
+    def toggle_selection(self):
+        '''
+        Invert the ticks of the shown (matching the search) selections
+        '''
+        if self.single_select:
+            return
+        if self._shown is None:
+            self.states[:] = self.states.translate(bytes([1, 0]) + bytes(254))
+        else:
+            states = self.states
+            for i_item in self._shown:
+                states[i_item] ^= 1
+        self._sync()
+
+
+    def select_pattern(self, pattern, mode='regex', tick=True):
+        '''
+        Tick (or untick) all the selections matching the pattern,
+        also the ones hidden by the search.
+
+        mode : string
+            One of tk_steroids.search.SEARCH_MODES
+        '''
+        if self.single_select:
+            return
+        self._set_states(self._get_search_index().search(pattern, mode), int(tick))
+        self._sync()
+
+
+    def select_range(self, start, stop, tick=True):
+        '''
+        Tick (or untick) the selections from start to stop (not included)
+        '''
+        if self.single_select:
+            return
+        n_items = len(range(*slice(start, stop).indices(len(self.states))))
+        self.states[start:stop] = bytes([int(tick)]) * n_items
+        self._sync()
+
+
+    @property
+    def ticked(self):
+        '''
+        ticked : list of strings
+            The currently ticked selections
+        '''
+        return list(itertools.compress(self.selections, self.states))
+
+    @ticked.setter
+    def ticked(self, selections):
+        self._set_states(None, 0)
+        selections = set(selections)
+        for i_item, selection in enumerate(self.selections):
+            if selection in selections:
+                self.states[i_item] = 1
+                if self.single_select:
+                    break
+        self._sync()
+
+
+    def on_ok(self):
+        '''
+        Gets called when the OK button is pressed, and calls callback_on_ok with
+        the made selections.
+        '''
+        if self.single_select:
+            i_item = self.states.find(1)
+            made_selections = [self.selections[max(0, i_item)]]
+        else:
+            made_selections = self.ticked
+
+        self.callback_on_ok(made_selections, *self.callback_args, **self.callback_kwargs)
+
+        if self.close_on_ok:
+            self.winfo_toplevel().destroy()
+
+
+
+class TickSelect(_TickStates, tk.Frame):
     '''
     User sets ticks to select items from selections group and
     presses ok -> callback_on_ok gets called as the made selections list
     as the only input argument.
+
+    The ticks are kept in a bytearray (states) and the checkbuttons
+    use the elements of one Tcl array variable, so that the bulk
+    operations (select_all, select_none, toggle_selection, select_pattern
+    and select_range) update all the checkbuttons with one Tcl call.
+
+    Attributes
+    ----------
+    states : bytearray
+        1 for the ticked selections and 0 for the others
+    ticked : list of strings
+        The ticked selections
+    tk_variables : list of objects
+        Variables of the ticks (see the property)
     '''
 
     def __init__(self, parent, selections, callback_on_ok, close_on_ok=True, ticked=None,
-            callback_args=[], callback_kwargs={}, single_select=False, search=10):
+            callback_args=[], callback_kwargs={}, single_select=False, search=10,
+            search_mode='substring', case_sensitive=True, search_delay=150):
         '''
         selections          List of strings
         callback_on_ok      Callable, whom a sublist of selections is passed
@@ -86,6 +300,13 @@ class TickSelect(tk.Frame):
         search : int or bool
             If True, show the seach bar, false hide. If integer, specifies the number
             of selections when to start showing the search bar.
+        search_mode : string
+            How the search text is matched, one of
+            tk_steroids.search.SEARCH_MODES
+        case_sensitive : bool
+            If False, ignore letter case in the search
+        search_delay : int
+            Milliseconds from the last keystroke to updating the search
         '''
         tk.Frame.__init__(self, parent)
 
@@ -95,10 +316,13 @@ class TickSelect(tk.Frame):
         self.callback_on_ok = callback_on_ok
         self.selections = selections
         self.close_on_ok = close_on_ok
+        self.single_select = single_select
 
         self.callback_args = callback_args
         self.callback_kwargs = callback_kwargs
 
+        self._init_states(ticked)
+
         # Add scrollbar - adds canvas and extra frame
         canvas = tk.Canvas(self)
         frame = tk.Frame(canvas)
@@ -116,23 +340,26 @@ class TickSelect(tk.Frame):
         self.checkbuttons = []
 
         # Create tickboxes and entries
+        self._tick_variables = None
         if single_select:
-            N_selections = 1
+            self._radio_variable = tk.IntVar(value=max(0, self.states.find(1)))
         else:
-            N_selections = len(self.selections)
-        tk_variables = [tk.IntVar() for i in range(N_selections)]
+            self._array_name = 'tickselect_states_{}'.format(id(self))
+            self._synced = bytearray(self.states)
+            self.tk.call('array', 'set', self._array_name,
+                    [x for i_item, state in enumerate(self.states) for x in (i_item, state)])
 
         for i_row, selection in enumerate(self.selections):        
             if single_select:
-                checkbutton = tk.Radiobutton(frame, text=selection, variable=tk_variables[0], value=i_row)
+                checkbutton = tk.Radiobutton(frame, text=selection,
+                        variable=self._radio_variable, value=i_row,
+                        command=lambda i_row=i_row: self._on_click(i_row))
             else:
-                checkbutton = tk.Checkbutton(frame, text=selection, variable=tk_variables[i_row])
+                checkbutton = tk.Checkbutton(frame, text=selection,
+                        variable='{}({})'.format(self._array_name, i_row),
+                        command=lambda i_row=i_row: self._on_click(i_row))
             checkbutton.grid(sticky='W')
             
-            # Set ticked
-            if not ticked is None and selection in ticked:
-                checkbutton.select()
-
             self.checkbuttons.append(checkbutton)
     
         # Buttons under the selections list
@@ -142,80 +369,342 @@ class TickSelect(tk.Frame):
         tk.Button(self.buttons_frame, text='Inverse', command=self.toggle_selection).grid(row=1, column=1)
         self.buttons_frame.grid(row=1, column=0)
 
+        self.search_mode = search_mode
+        self.case_sensitive = case_sensitive
+        self._search_index = None
+        self._shown_mask = bytearray(b'\x01' * len(self.checkbuttons))
+
         if (search is True) or (search is not False and search < len(self.selections)):
             self.last_search = ''
             self.searchtext = tk.StringVar()
             self.searchbox = tk.Entry(self, text='Search', textvariable=self.searchtext)
             self.searchbox.grid(row=2, column=0, sticky='WE')
-            self.winfo_toplevel().after(2000, lambda: self._update_search(repeat_after=1000))
+            # Index the selections before the first keystroke
+            self.searchbox.bind('<FocusIn>', lambda event: self._get_search_index())
+            self._search_debouncer = Debouncer(self, self._update_search, search_delay)
+            self._search_trace = self.searchtext.trace_add('write', self._search_debouncer)
 
-        self.winfo_toplevel().after(50, self._update)
+        # Scrollregion follows the size of the frame
+        frame.bind('<Configure>', self._update)
         
         self.frame = frame
         self.canvas = canvas
-        self.tk_variables = tk_variables
-        self.single_select = single_select
         
         self.visible_checkbuttons = self.checkbuttons
 
 
-    def _update_search(self, repeat_after=None):
+    def _on_click(self, i_item):
         '''
-        Check the searchbox input and hide selections that do not match
-        the search.
+        A checkbutton was clicked by the user
         '''
-        key = str(self.searchtext.get())
-        if key != self.last_search:
-            
-            self.visible_checkbuttons  = []
+        if self.single_select:
+            self._set_states(None, 0)
+            self.states[i_item] = 1
+        else:
+            state = int(self.getvar('{}({})'.format(self._array_name, i_item)))
+            self.states[i_item] = state
+            self._synced[i_item] = state
+
+
+    def _sync(self):
+        '''
+        Update the checkbuttons to the states, with one Tcl call
+        '''
+        if self.single_select:
+            self._radio_variable.set(max(0, self.states.find(1)))
+            return
 
-            for checkbutton in self.checkbuttons:
-                checkbutton.grid_remove()
-                if key in checkbutton.cget('text'):
-                    checkbutton.grid()
+        changed = [x for i_item, (old, new) in enumerate(zip(self._synced, self.states))
+                if old != new for x in (i_item, new)]
+        if changed:
+            self.tk.call('array', 'set', self._array_name, changed)
+            self._synced[:] = self.states
 
-                    self.visible_checkbuttons.append(checkbutton)
 
-            self.last_search = key
+    @property
+    def tk_variables(self):
+        '''
+        tk_variables : list of objects
+            In the single select mode, one IntVar holding the index of
+            the selection. Otherwise an IntVar for each selection, made
+            at the first access; setting one updates the states. Kept
+            for compatibility, states and the bulk operations do not
+            need a variable for each selection.
+        '''
+        if self.single_select:
+            return [self._radio_variable]
+        if self._tick_variables is None:
+            self._tick_variables = [_TickVariable(self, i_item)
+                    for i_item in range(len(self.selections))]
+        return self._tick_variables
+
+
+    def _update_search(self):
+        '''
+        Check the searchbox input and hide selections that do not match
+        the search. Called (debounced) when the search text changes.
+
+        Only the checkbuttons whose visibility changes are regridded.
+        '''
+        key = self.searchtext.get()
+        if key == self.last_search:
+            return
+        
+        matches = self._get_search_index().search(key, self.search_mode)
+
+        mask = bytearray(len(self.checkbuttons))
+        for i_item in matches:
+            mask[i_item] = 1
+        
+        for i_item, (old, new) in enumerate(zip(self._shown_mask, mask)):
+            if old != new:
+                if new:
+                    self.checkbuttons[i_item].grid()
+                else:
+                    self.checkbuttons[i_item].grid_remove()
 
-        if repeat_after:
-            self.winfo_toplevel().after(repeat_after, lambda r=repeat_after: self._update_search(repeat_after=r))
+        self._shown_mask = mask
+        self._shown = matches if key else None
+        self.visible_checkbuttons = [self.checkbuttons[i_item] for i_item in matches]
+        self.last_search = key
 
 
-    def _update(self):
+    def _update(self, event=None):
         self.canvas.config(scrollregion=(0, 0, self.frame.winfo_reqwidth(), self.frame.winfo_reqheight()))
-        self.winfo_toplevel().after(1000, self._update)
 
 
-    def select_all(self):
-        for checkbutton in self.visible_checkbuttons:
-            checkbutton.select()
+    def destroy(self):
+        '''
+        Cancel the pending search and remove the variable trace
+        '''
+        _stop_search(self)
+        tk.Frame.destroy(self)
+        if not self.single_select:
+            self.tk.call('unset', '-nocomplain', self._array_name)
 
 
-    def toggle_selection(self):
-        for checkbutton in self.visible_checkbuttons:
-            checkbutton.toggle()
 
+class VirtualTickSelect(_TickStates, tk.Frame):
+    '''
+    Like TickSelect but for thousands (or millions) of selections.
+
+    The tick states are kept in a bytearray and only the rows that fit
+    in the view are created as widgets. Scrolling reuses the same row
+    widgets, so opening is as fast with 100 000 selections as with 10.
+
+    Has the same arguments, buttons, bulk operations and callback
+    as TickSelect.
+
+    Attributes
+    ----------
+    states : bytearray
+        1 for the ticked selections and 0 for the others
+    ticked : list of strings
+        The ticked selections
+    offset : int
+        Index of the (shown) selection on the topmost row
+    n_rows : int
+        Number of rows that fit in the view. The row widgets beyond
+        it (after the view shrank) are hidden and reused if it grows.
+    '''
 
-    def on_ok(self):
+    def __init__(self, parent, selections, callback_on_ok, close_on_ok=True, ticked=None,
+            callback_args=[], callback_kwargs={}, single_select=False, search=10,
+            search_mode='substring', case_sensitive=True, search_delay=150,
+            width=300, height=400):
         '''
-        Gets called when the OK button is pressed, and calls callback_on_ok with
-        the made selections.
+        See TickSelect for the arguments.
+
+        width, height       Size of the selections area in pixels
         '''
-        made_selections = []
+        tk.Frame.__init__(self, parent)
 
+        self.grid_rowconfigure(0, weight=1) 
+        self.grid_columnconfigure(0, weight=1) 
+        
+        self.callback_on_ok = callback_on_ok
+        self.selections = selections
+        self.close_on_ok = close_on_ok
+        self.single_select = single_select
+
+        self.callback_args = callback_args
+        self.callback_kwargs = callback_kwargs
+
+        self._init_states(ticked)
+        
+        self.offset = 0
+        self.n_rows = 0
+        self._row_height = None
+        self._rows = []
+        self._row_variables = []
+
+        self.frame = tk.Frame(self, width=width, height=height)
+        self.frame.grid_propagate(False)
+        self.frame.grid_columnconfigure(0, weight=1)
+        self.frame.grid(row=0, column=0, sticky='NSEW')
+        
+        self.scrollbar = tk.Scrollbar(self, orient='vertical', command=self._on_scroll)
+        self.scrollbar.grid(row=0, column=1, sticky='NS')
+        
+        self.frame.bind('<Configure>', self._on_configure)
+        self._bind_scrolling(self.frame)
+
+        # Buttons under the selections list
+        self.buttons_frame = tk.Frame(self)
+        tk.Button(self, text='Ok', command=self.on_ok).grid(row=1, column=1)
+        tk.Button(self.buttons_frame, text='Select all', command=self.select_all).grid(row=1, column=0)
+        tk.Button(self.buttons_frame, text='Inverse', command=self.toggle_selection).grid(row=1, column=1)
+        self.buttons_frame.grid(row=1, column=0)
+
+        self.search_mode = search_mode
+        self.case_sensitive = case_sensitive
+        self._search_index = None
+        if (search is True) or (search is not False and search < len(self.selections)):
+            self.searchtext = tk.StringVar()
+            self.searchbox = tk.Entry(self, textvariable=self.searchtext)
+            self.searchbox.grid(row=2, column=0, sticky='WE')
+            # Index the selections before the first keystroke
+            self.searchbox.bind('<FocusIn>', lambda event: self._get_search_index())
+            self._search_debouncer = Debouncer(self, self._update_search, search_delay)
+            self._search_trace = self.searchtext.trace_add('write', self._search_debouncer)
+        
+        self._add_row()
+        self.n_rows = 1
+        self._render()
+
+
+    def _bind_scrolling(self, widget):
+        widget.bind('<MouseWheel>', self._on_mousewheel)
+        widget.bind('<Button-4>', lambda event: self._scroll_by(-3))
+        widget.bind('<Button-5>', lambda event: self._scroll_by(3))
+
+
+    def _add_row(self):
+        '''Create one more row widget to the pool
+        '''
+        i_row = len(self._rows)
+        variable = tk.IntVar()
         if self.single_select:
-            made_selections.append(self.selections[self.tk_variables[0].get()])
+            row = tk.Radiobutton(self.frame, variable=variable, value=1, anchor='w',
+                    command=lambda i_row=i_row: self._on_click(i_row))
         else:
-            for tk_variable, selection in zip(self.tk_variables, self.selections):
-                if tk_variable.get() == 1:
-                    made_selections.append(selection)
+            row = tk.Checkbutton(self.frame, variable=variable, anchor='w',
+                    command=lambda i_row=i_row: self._on_click(i_row))
+        row.grid(row=i_row, column=0, sticky='WE')
+        self._bind_scrolling(row)
 
-        self.callback_on_ok(made_selections, *self.callback_args, **self.callback_kwargs)
+        self._rows.append(row)
+        self._row_variables.append(variable)
         
+        if self._row_height is None:
+            self._row_height = max(1, row.winfo_reqheight())
 
-        if self.close_on_ok:
-            self.winfo_toplevel().destroy()
+
+    def _n_shown(self):
+        if self._shown is None:
+            return len(self.selections)
+        return len(self._shown)
+
+
+    def _item_index(self, row):
+        '''Index of the selection on the (shown) row
+        '''
+        if self._shown is None:
+            return row
+        return self._shown[row]
+
+
+    def _render(self):
+        '''Show the selections from offset onwards on the row widgets
+        '''
+        N = self._n_shown()
+        self.offset = max(0, min(self.offset, N-self.n_rows))
+        
+        for i_row, (row, variable) in enumerate(zip(self._rows, self._row_variables)):
+            if i_row < self.n_rows and self.offset + i_row < N:
+                i_item = self._item_index(self.offset + i_row)
+                row.config(text=self.selections[i_item])
+                variable.set(self.states[i_item])
+                row.grid()
+            else:
+                row.grid_remove()
+        
+        if N:
+            self.scrollbar.set(self.offset/N, min(N, self.offset+self.n_rows)/N)
+        else:
+            self.scrollbar.set(0, 1)
+
+
+    def _on_click(self, i_row):
+        i_item = self._item_index(self.offset + i_row)
+        state = self._row_variables[i_row].get()
+        if self.single_select:
+            self._set_states(None, 0)
+            self.states[i_item] = 1
+            self._render()
+        else:
+            self.states[i_item] = state
+
+
+    def _on_configure(self, event):
+        '''Fit the number of rows to the view, creating more row
+        widgets if it grows
+        '''
+        n_rows = max(1, event.height // self._row_height)
+        if n_rows != self.n_rows:
+            while len(self._rows) < n_rows:
+                self._add_row()
+            self.n_rows = n_rows
+            self._render()
+
+
+    def _on_scroll(self, *args):
+        '''Scrollbar command
+        '''
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * self._n_shown())
+            self._render()
+        elif args[0] == 'scroll':
+            if args[2] == 'pages':
+                self._scroll_by(int(args[1]) * self.n_rows)
+            else:
+                self._scroll_by(int(args[1]))
+
+
+    def _on_mousewheel(self, event):
+        self._scroll_by(-3 if event.delta > 0 else 3)
+        return 'break'
+
+
+    def _scroll_by(self, n_rows):
+        self.offset += n_rows
+        self._render()
+        return 'break'
+
+
+    def _update_search(self):
+        '''
+        Show only the selections matching the search box text
+        '''
+        key = self.searchtext.get()
+        if not key:
+            self._shown = None
+        else:
+            self._shown = self._get_search_index().search(key, self.search_mode)
+        self.offset = 0
+        self._render()
+
+
+    def destroy(self):
+        '''
+        Cancel the pending search and remove the variable trace
+        '''
+        _stop_search(self)
+        tk.Frame.destroy(self)
+
+
+    def _sync(self):
+        self._render()
 
 
 def main():
@@ -1,6 +1,242 @@
+import time
+import bisect
+import difflib
+import logging
+import threading
+import collections
+
 import tkinter as tk
+import tkinter.font
 import tkinter.scrolledtext
 
+from .search import SearchIndex
+from .logstore import LogStore, LineClassifier, LEVELS, level_code, meta_level, meta_rule, meta_source
+
+
+def _diff_opcodes(old, new, max_matching=1000000):
+    '''Opcodes to turn the old list into the new list
+
+    Returns a list of (tag, i1, i2, j1, j2) tuples, as in
+    difflib.SequenceMatcher.get_opcodes. The common head and tail are
+    stripped first and if the remaining middle parts are very large
+    (their size product exceeds max_matching), they are replaced
+    as a whole instead of matching them.
+    '''
+    N_old = len(old)
+    N_new = len(new)
+
+    start = 0
+    limit = min(N_old, N_new)
+    while start < limit and old[start] == new[start]:
+        start += 1
+    
+    end_old = N_old
+    end_new = N_new
+    while end_old > start and end_new > start and old[end_old-1] == new[end_new-1]:
+        end_old -= 1
+        end_new -= 1
+    
+    opcodes = []
+    if start:
+        opcodes.append(('equal', 0, start, 0, start))
+
+    n_old = end_old - start
+    n_new = end_new - start
+
+    if n_old and n_new and n_old*n_new <= max_matching:
+        matcher = difflib.SequenceMatcher(None, old[start:end_old],
+                new[start:end_new], autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            opcodes.append((tag, i1+start, i2+start, j1+start, j2+start))
+    elif n_old and n_new:
+        opcodes.append(('replace', start, end_old, start, end_new))
+    elif n_old:
+        opcodes.append(('delete', start, end_old, start, start))
+    elif n_new:
+        opcodes.append(('insert', start, start, start, end_new))
+
+    if end_old < N_old:
+        opcodes.append(('equal', end_old, N_old, end_new, N_new))
+
+    return opcodes
+
+
+def _merge_opcodes(old, new):
+    '''Opcodes to turn the old ascending list into the new ascending list
+
+    Like _diff_opcodes but for lists that are both sorted and have no
+    duplicates (such as the indices shown by a search), done in linear
+    time by merging. Items are only deleted or inserted, never replaced.
+    '''
+    N_old = len(old)
+    N_new = len(new)
+    
+    opcodes = []
+    i = j = 0
+    while i < N_old or j < N_new:
+        i2 = i
+        j2 = j
+        if i < N_old and j < N_new and old[i] == new[j]:
+            tag = 'equal'
+            while i2 < N_old and j2 < N_new and old[i2] == new[j2]:
+                i2 += 1
+                j2 += 1
+        elif j == N_new or (i < N_old and old[i] < new[j]):
+            tag = 'delete'
+            while i2 < N_old and (j == N_new or old[i2] < new[j]):
+                i2 += 1
+        else:
+            tag = 'insert'
+            while j2 < N_new and (i == N_old or new[j2] < old[i]):
+                j2 += 1
+        opcodes.append((tag, i, i2, j, j2))
+        i = i2
+        j = j2
+
+    return opcodes
+
+
+def _map_index(opcodes, index):
+    '''Maps an index in the old list to the new list using the opcodes.
+
+    Returns None if the item was removed. Replaced blocks of equal size
+    are considered renames and map one-to-one.
+    '''
+    for tag, i1, i2, j1, j2 in opcodes:
+        if i1 <= index < i2:
+            if tag == 'equal' or (tag == 'replace' and i2-i1 == j2-j1):
+                return j1 + index - i1
+            return None
+    return None
+
+
+def _item_color(colors, index):
+    '''Color of the item or an empty string (the default color)
+    '''
+    if colors:
+        return colors[index]
+    return ''
+
+
+def notify_visibility(widget, visible):
+    '''Tell a widget and its descendants that they were shown or hidden.
+
+    Widgets that have a visibility_changed(visible) method (for example
+    Tabs, CanvasPlotter, ImageFeed and BufferShower) get it called and
+    are responsible for notifying their own descendants. The children
+    of other widgets are walked recursively.
+
+    Hidden widgets with live updates pause their timers and redraws,
+    and catch up with one render when shown again.
+
+    Arguments
+    ---------
+    widget : object
+        Tkinter widget that was shown or hidden
+    visible : bool
+        True if shown, False if hidden
+    '''
+    method = getattr(widget, 'visibility_changed', None)
+    if callable(method):
+        method(visible)
+    else:
+        for child in widget.winfo_children():
+            notify_visibility(child, visible)
+
+
+
+class Debouncer:
+    '''Calls a function once after the calls to the debouncer stop.
+
+    Calling the debouncer (re)starts a timer and the function is called
+    (without arguments) on the tkinter event loop when no new calls
+    have been made in delay milliseconds. Useful for example with
+    variable traces, to react only when the user stops typing.
+
+    With throttle, the function is called at the latest throttle
+    milliseconds after the first of the pending calls, even if the
+    calls do not stop (for example while dragging a slider).
+
+    With merge, the arguments of the pending calls are coalesced by
+    pending = merge(pending, *args), starting from None, and the
+    function is called with the result.
+
+    Attributes
+    ----------
+    widget : object
+        Tkinter widget whose after method is used
+    function : callable
+        The function to call
+    delay : int
+        Delay in milliseconds
+    throttle : int or None
+        Maximum delay in milliseconds from the first pending call
+    merge : callable or None
+        Coalesces the arguments of the calls
+    '''
+
+    def __init__(self, widget, function, delay=150, throttle=None, merge=None):
+        self.widget = widget
+        self.function = function
+        self.delay = delay
+        self.throttle = throttle
+        self.merge = merge
+        self._after_id = None
+        self._first_call = None
+        self._pending = None
+
+
+    def __call__(self, *args):
+        if self.merge is not None:
+            self._pending = self.merge(self._pending, *args)
+        
+        now = time.monotonic()
+        if self._after_id is None:
+            self._first_call = now
+        else:
+            self.widget.after_cancel(self._after_id)
+        
+        delay = self.delay
+        if self.throttle is not None:
+            remaining = self.throttle - (now - self._first_call) * 1000
+            delay = max(0, min(delay, int(remaining)))
+        self._after_id = self.widget.after(delay, self._fire)
+
+
+    def _fire(self):
+        self._after_id = None
+        if self.merge is not None:
+            pending, self._pending = self._pending, None
+            self.function(pending)
+        else:
+            self.function()
+
+
+    @property
+    def pending(self):
+        '''True if the function is scheduled to be called
+        '''
+        return self._after_id is not None
+
+
+    def cancel(self):
+        '''Cancel the scheduled call, if any
+        '''
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self._pending = None
+
+
+    def flush(self):
+        '''Call the scheduled call now, if any
+        '''
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._fire()
+
+
+
 class Listbox(tk.Frame):
     '''Tkinter's Listbox and Scrollbar wrapped for convienece.
     
@@ -21,13 +257,34 @@ class Listbox(tk.Frame):
         Tkinter's Listbox widget
     scrollbar : object
         Tkinter's Scrollbar widget
+    selected : list of strings
+        All currently selected items (useful with multiple selectmode)
+    searchbox : object or None
+        Tkinter's Entry widget for filtering the selections, if the
+        search was enabled
+    search_mode : string
+        How the search box matches the selections. See tk_steroids.search
     '''
 
-    def __init__(self, parent, selections, callback, maintain_selected=True):
+    def __init__(self, parent, selections, callback, maintain_selected=True,
+            selectmode=tk.BROWSE, search=False, search_mode='substring',
+            search_delay=150):
         '''
         maintain_selected : bool
             If true, clicking other Listboxes or widgets does not make the current
             selection to None (deselecting the selected)
+        selectmode : string
+            Tkinter Listbox selectmode. With tk.MULTIPLE or tk.EXTENDED,
+            the callback receives a list of the selected items instead of
+            a single item.
+        search : int or bool
+            If True, show a search box under the listbox that filters the
+            shown selections while typing. If integer, specifies the number of
+            selections when to start showing the search box.
+        search_mode : string
+            'prefix', 'substring' (default), 'fuzzy' or 'regex'
+        search_delay : int
+            Milliseconds to wait after the last keystroke before filtering
         '''
         
         tk.Frame.__init__(self, parent)
@@ -35,8 +292,13 @@ class Listbox(tk.Frame):
 
         
         self.maintain_selected = maintain_selected
+        self.selectmode = selectmode
+        self.search_mode = search_mode
+        self._index = None
+        self._search_index = None
+        self._shown = None
 
-        self.listbox = tk.Listbox(self, height=20)
+        self.listbox = tk.Listbox(self, height=20, selectmode=selectmode)
         self.listbox.grid(sticky='NSEW')
        
         self.scrollbar= tk.Scrollbar(self, orient='vertical', command=self.listbox.yview)
@@ -57,12 +319,30 @@ class Listbox(tk.Frame):
         self._previous_selection = None
         self._state_valid = True
 
+        if (search is True) or (search is not False and search < len(self.selections)):
+            self.searchtext = tk.StringVar(self)
+            self.searchbox = tk.Entry(self, textvariable=self.searchtext)
+            self.searchbox.grid(row=1, column=0, columnspan=2, sticky='WE')
+            # Index the selections before the first keystroke
+            self.searchbox.bind('<FocusIn>', lambda event: self._get_search_index())
+            
+            self._search_debouncer = Debouncer(self, self.apply_search, search_delay)
+            self.searchtext.trace_add('write', self._search_debouncer)
+        else:
+            self.searchtext = None
+            self.searchbox = None
+
 
     def _call_callback(self, *args):
         '''Validate selection and the callback and call back
         '''
+        if self.selectmode in (tk.MULTIPLE, tk.EXTENDED):
+            if callable(self.callback):
+                self.callback(self.selected)
+            return
+
         try:
-            sel = self.listbox.curselection()[0]
+            sel = self._item_index(self.listbox.curselection()[0])
             argument = self.selections[sel]
             self._previous_selection = argument
             self._state_valid = True
@@ -73,10 +353,149 @@ class Listbox(tk.Frame):
             self.callback(self.selections[sel])
 
 
+    def _get_index(self):
+        '''Returns the {value: index} map of the selections
+
+        Built on the first need after the selections change. Holds
+        the first index if the same value appears many times.
+        '''
+        if self._index is None:
+            N = len(self.selections)
+            self._index = dict(zip(reversed(self.selections), range(N-1, -1, -1)))
+        return self._index
+
+
+    def index_of(self, value):
+        '''Returns the index of the value in the selections.
+
+        Raises ValueError if the value is not in the selections.
+        '''
+        try:
+            return self._get_index()[value]
+        except KeyError:
+            raise ValueError(f'"{value}" not in the selections') from None
+
+
+    def _item_index(self, row):
+        '''Index in selections of the item on the given listbox row
+        '''
+        if self._shown is None:
+            return row
+        return self._shown[row]
+
+
+    def _row_of(self, index):
+        '''Listbox row of the item at the selections index, or None if
+        the item is filtered out by the search.
+        '''
+        if self._shown is None:
+            return index
+        row = bisect.bisect_left(self._shown, index)
+        if row < len(self._shown) and self._shown[row] == index:
+            return row
+        return None
+
+
+    def _shown_rows(self):
+        '''Returns the shown items and their colors (or None)
+        '''
+        if self._shown is None:
+            return self.selections, self._colors
+        rows = [self.selections[i] for i in self._shown]
+        if self._colors:
+            return rows, [self._colors[i] for i in self._shown]
+        return rows, None
+
+
+    def _get_search_index(self):
+        if self._search_index is None:
+            self._search_index = SearchIndex(self.selections, mode=self.search_mode)
+        return self._search_index
+
+
+    def _research(self):
+        '''Search again after the selections changed, if a search is shown
+        '''
+        if self._shown is not None:
+            query = self.searchtext.get()
+            if query:
+                self._shown = self._get_search_index().search(query, self.search_mode)
+            else:
+                self._shown = None
+
+
+    def apply_search(self):
+        '''Filter the shown selections by the search box text.
+
+        Called automatically (debounced) when typing in the search box.
+        '''
+        query = self.searchtext.get() if self.searchtext is not None else ''
+        if query:
+            shown = self._get_search_index().search(query, self.search_mode)
+        else:
+            shown = None
+        self._set_shown(shown)
+
+
+    def _set_shown(self, shown):
+        '''Show only the selections at the given (ascending) indices
+        or all selections if shown is None.
+        '''
+        if self.listbox.size():
+            top = self._item_index(self.listbox.nearest(0))
+        else:
+            top = 0
+        
+        everything = range(len(self.selections))
+        old = everything if self._shown is None else self._shown
+        new = everything if shown is None else shown
+
+        self._shown = shown
+        rows, colors = self._shown_rows()
+
+        # Only the rows that appear or disappear are changed, so the
+        # rows that stay keep also their selection
+        self._apply_opcodes(_merge_opcodes(old, new), rows, colors)
+
+        self.listbox.yview(bisect.bisect_left(new, top))
+
+
+    def _apply_opcodes(self, opcodes, rows, colors, old_colors=None,
+            recolor=False):
+        '''Apply the diff opcodes to the tkinter Listbox
+
+        rows and colors are the new shown items and their colors. If
+        recolor is True, the colors of the equal rows are updated
+        from old_colors to colors.
+        '''
+        # Apply in reverse so that the indices of the earlier
+        # operations stay valid
+        for tag, i1, i2, j1, j2 in reversed(opcodes):
+            if tag == 'equal':
+                if recolor:
+                    for i_old, i_new in zip(range(i1, i2), range(j1, j2)):
+                        color = _item_color(colors, i_new)
+                        if color != _item_color(old_colors, i_old):
+                            self.listbox.itemconfig(i_old, bg=color)
+                continue
+
+            if tag in ('delete', 'replace'):
+                self.listbox.delete(i1, i2-1)
+            if tag in ('insert', 'replace'):
+                self.listbox.insert(i1, *rows[j1:j2])
+                if colors:
+                    for i_new in range(j1, j2):
+                        self.listbox.itemconfig(i1+i_new-j1, bg=colors[i_new])
+
 
     def set_selections(self, selections, colors=None):
         '''Reset the selectables
 
+        Only the differences to the current selections are applied
+        to the tkinter Listbox, so that appending, removing or renaming
+        items is cheap even in long lists. The scroll position and
+        the selection are preserved.
+
         Options
         -------
         selections : list of strings
@@ -85,17 +504,53 @@ class Listbox(tk.Frame):
             A list of valid tkinter colors. It sets
             the background color for each selectable in the Listbox.
         '''
+        selections = list(selections)
+        colors = list(colors) if colors else None
         
-        # Empty current as it may have old entries
-        self.listbox.delete(0, tk.END)
-        
+        if getattr(self, 'selections', None):
+            old_rows, old_colors = self._shown_rows()
+        else:
+            old_rows, old_colors = [], None
+
         self.selections = selections
+        self._colors = colors
+        self._index = None
+        self._search_index = None
+
+        self._research()
+
+        rows, colors = self._shown_rows()
         
-        for i_item, item in enumerate(self.selections):
-            self.listbox.insert(tk.END, item)
-            
+        if not old_rows:
+            # Initial fill in one go
+            self.listbox.delete(0, tk.END)
+            self.listbox.insert(tk.END, *rows)
             if colors:
-                self.listbox.itemconfig(i_item, bg=colors[i_item])
+                for i_row, color in enumerate(colors):
+                    self.listbox.itemconfig(i_row, bg=color)
+            return
+        
+        if old_rows == rows and old_colors == colors:
+            return
+
+        opcodes = _diff_opcodes(old_rows, rows)
+        
+        top = self.listbox.nearest(0)
+        selected = self.listbox.curselection()
+        
+        self._apply_opcodes(opcodes, rows, colors, old_colors,
+                recolor=old_colors != colors)
+        
+        # Restore the scroll position and the selection
+        new_top = _map_index(opcodes, top)
+        if new_top is not None:
+            self.listbox.yview(new_top)
+        
+        self.listbox.selection_clear(0, tk.END)
+        for index in selected:
+            new_index = _map_index(opcodes, index)
+            if new_index is not None:
+                self.listbox.select_set(new_index)
 
 
     def disable(self):
@@ -119,7 +574,7 @@ class Listbox(tk.Frame):
             return None
 
         try:
-            sel = self.listbox.curselection()[0]
+            sel = self._item_index(self.listbox.curselection()[0])
             return self.selections[sel]
         except:
             return self._previous_selection
@@ -139,14 +594,332 @@ class Listbox(tk.Frame):
             self._state_valid = False
             return
 
-        if value not in self.selections:
-            raise ValueError(f'"{value}" not in the selections {self.selections}')
-        index = self.selections.index(value)
-        self.listbox.select_set(index)
+        row = self._row_of(self.index_of(value))
+        if self.selectmode not in (tk.MULTIPLE, tk.EXTENDED):
+            self.listbox.selection_clear(0, tk.END)
+        if row is not None:
+            self.listbox.select_set(row)
+        self._previous_selection = value
+        self._state_valid = True
+
+
+    @property
+    def selected(self):
+        return [self.selections[self._item_index(row)] for row in self.listbox.curselection()]
+
+    @selected.setter
+    def selected(self, values):
+        '''Select the given values (an iterable) and deselect others
+        '''
+        index = self._get_index()
+        values = set(values)
+        
+        missing = values.difference(index)
+        if missing:
+            raise ValueError(f'{sorted(missing)} not in the selections')
+
+        self.listbox.selection_clear(0, tk.END)
+        
+        # Select contiguous runs of rows at once
+        rows = sorted(row for row in (self._row_of(index[value]) for value in values)
+                if row is not None)
+        i_start = 0
+        for i in range(1, len(rows)+1):
+            if i == len(rows) or rows[i] != rows[i-1]+1:
+                self.listbox.select_set(rows[i_start], rows[i-1])
+                i_start = i
+
+
+
+class VirtualListbox(Listbox):
+    '''A Listbox for very large numbers of selections.
+
+    Has the same interface as Listbox (callback, current, set_selections...)
+    but the selections are kept in Python and only the rows that are
+    currently scrolled into view are inserted in the underlying tkinter
+    Listbox. Opening and scrolling a list of millions of items is therefore
+    as fast as a short list.
+
+    Attributes
+    ----------
+    offset : int
+        Index of the (shown) selection on the first (topmost) row
+    n_rows : int
+        Number of rows that fit in the listbox
+    '''
+
+    def __init__(self, parent, selections, callback, maintain_selected=True,
+            search=False, search_mode='substring', search_delay=150):
+        '''
+        See Listbox for the arguments. Only single selection is supported.
+        '''
+        self.offset = 0
+        self.n_rows = 20
+        self._selected = None
+        self._colors = None
+        self._linespace = None
+        
+        Listbox.__init__(self, parent, selections, callback,
+                maintain_selected=maintain_selected, search=search,
+                search_mode=search_mode, search_delay=search_delay)
+        
+        # Scrolling is now done by us and not by the tkinter Listbox
+        self.scrollbar.config(command=self._on_scroll)
+        self.listbox.config(yscrollcommand='', exportselection=False)
+
+        self.listbox.bind('<Configure>', self._on_configure)
+        self.listbox.bind('<MouseWheel>', self._on_mousewheel)
+        self.listbox.bind('<Button-4>', lambda event: self._scroll_by(-3))
+        self.listbox.bind('<Button-5>', lambda event: self._scroll_by(3))
+        self.listbox.bind('<Up>', lambda event: self._move_selection(-1))
+        self.listbox.bind('<Down>', lambda event: self._move_selection(1))
+        self.listbox.bind('<Prior>', lambda event: self._scroll_by(-self.n_rows))
+        self.listbox.bind('<Next>', lambda event: self._scroll_by(self.n_rows))
+
+        self._render()
+
+
+    def set_selections(self, selections, colors=None):
+        '''Reset the selectables
+
+        See Listbox.set_selections. The selections are not copied
+        to tkinter so this is cheap even for millions of items.
+        '''
+        self.selections = selections
+        self._colors = colors
+        self._index = None
+        self._search_index = None
+
+        if self._selected is not None and self._selected >= len(selections):
+            self._selected = None
+
+        self._research()
+        self._render()
+
+
+    def _set_shown(self, shown):
+        self._shown = shown
+        self.offset = 0
+        if self._selected is not None:
+            row = self._row_of(self._selected)
+            if row is not None:
+                self._see(row)
+        self._render()
+
+
+    def _n_shown(self):
+        if self._shown is None:
+            return len(self.selections)
+        return len(self._shown)
+
+
+    def _render(self):
+        '''Materialize the visible rows in the tkinter Listbox
+        '''
+        N = self._n_shown()
+        self.offset = max(0, min(self.offset, N-self.n_rows))
+        stop = min(N, self.offset+self.n_rows)
+        
+        if self._shown is None:
+            indices = range(self.offset, stop)
+        else:
+            indices = self._shown[self.offset:stop]
+
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *[self.selections[i] for i in indices])
+        
+        if self._colors:
+            for i_row, i_item in enumerate(indices):
+                self.listbox.itemconfig(i_row, bg=self._colors[i_item])
+
+        if self._selected is not None:
+            row = self._row_of(self._selected)
+            if row is not None and self.offset <= row < stop:
+                self.listbox.select_set(row-self.offset)
+        
+        if N:
+            self.scrollbar.set(self.offset/N, stop/N)
+        else:
+            self.scrollbar.set(0, 1)
+
+
+    def _on_configure(self, event):
+        '''Update the number of rows when the listbox is resized
+        '''
+        if self._linespace is None:
+            font = tkinter.font.Font(font=self.listbox.cget('font'))
+            self._linespace = font.metrics('linespace') + 1
+        n_rows = max(1, event.height // self._linespace)
+        if n_rows != self.n_rows:
+            self.n_rows = n_rows
+            self._render()
+
+
+    def _on_scroll(self, *args):
+        '''Scrollbar command
+        '''
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * self._n_shown())
+            self._render()
+        elif args[0] == 'scroll':
+            if args[2] == 'pages':
+                self._scroll_by(int(args[1]) * self.n_rows)
+            else:
+                self._scroll_by(int(args[1]))
+
+
+    def _on_mousewheel(self, event):
+        self._scroll_by(-3 if event.delta > 0 else 3)
+        return 'break'
+
+
+    def _scroll_by(self, n_rows):
+        self.offset += n_rows
+        self._render()
+        return 'break'
+
+
+    def _see(self, row):
+        '''Scroll so that the (shown) row is visible
+        '''
+        if row < self.offset:
+            self.offset = row
+        elif row >= self.offset + self.n_rows:
+            self.offset = row - self.n_rows + 1
+
+
+    def _move_selection(self, step):
+        '''Move the selection by step items (keyboard navigation)
+        '''
+        N = self._n_shown()
+        if not N:
+            return 'break'
+        
+        row = None
+        if self._selected is not None:
+            row = self._row_of(self._selected)
+        if row is None:
+            row = self.offset
+        else:
+            row = max(0, min(N-1, row+step))
+        
+        self._select(self._item_index(row))
+        self._call_callback(from_keyboard=True)
+        return 'break'
+
+
+    def _select(self, index):
+        self._selected = index
+        self._state_valid = True
+        row = self._row_of(index)
+        if row is not None:
+            self._see(row)
+        self._render()
+
+
+    def _call_callback(self, *args, from_keyboard=False):
+        '''Validate selection and the callback and call back
+        '''
+        if not from_keyboard:
+            try:
+                row = self.listbox.curselection()[0] + self.offset
+                self._selected = self._item_index(row)
+            except IndexError:
+                return
+        
+        argument = self.selections[self._selected]
+        self._previous_selection = argument
+        self._state_valid = True
+
+        if callable(self.callback):
+            self.callback(argument)
+
+
+    def get_current(self):
+        '''Returns the current selection.
+
+        Returns None if no selection has been made.
+        '''
+        if not self._state_valid or self._selected is None:
+            return None
+        return self.selections[self._selected]
+
+    @property
+    def current(self):
+        '''
+        current : string
+            The current selection
+        '''
+        return self.get_current()
+
+    @current.setter
+    def current(self, value):
+        if value is None:
+            self._state_valid = False
+            return
+
+        self._select(self.index_of(value))
+
+
+    @property
+    def selected(self):
+        if self._selected is None:
+            return []
+        return [self.selections[self._selected]]
+
+    @selected.setter
+    def selected(self, values):
+        values = list(values)
+        if len(values) > 1:
+            raise ValueError('VirtualListbox supports only a single selection')
+        if values:
+            self.current = values[0]
+        else:
+            self._selected = None
+            self._render()
+
+
+
+class _ChangeListeners:
+    '''Change listeners for the settings elements (TickboxFrame,
+    SliderFrame, EntryFrame and DropdownList).
+
+    The variable traces are added when the first listener is added, so
+    elements without listeners cost nothing extra. Subclasses implement
+    _traced_variables, returning (variable, options) pairs where
+    options are the names whose values can change when the variable
+    is written, and _option_value, returning the value of one option.
+    '''
+
+    def add_listener(self, callback):
+        '''
+        Call callback(changes) when the values change, where changes
+        is a dict {option: new value} of the options that may have changed.
+        '''
+        if not getattr(self, '_listeners', None):
+            self._listeners = []
+            if not getattr(self, '_traced', False):
+                for variable, options in self._traced_variables():
+                    variable.trace_add('write',
+                            lambda *args, options=options: self._notify(options))
+                self._traced = True
+        self._listeners.append(callback)
+
 
+    def remove_listener(self, callback):
+        self._listeners.remove(callback)
 
 
-class TickboxFrame(tk.Frame):
+    def _notify(self, options):
+        if not self._listeners:
+            return
+        changes = {option: self._option_value(option) for option in options}
+        for listener in list(self._listeners):
+            listener(changes)
+
+
+
+class TickboxFrame(_ChangeListeners, tk.Frame):
     '''
     A series of tickboxes (Checkbuttons) and getting their True/False values.
     
@@ -162,7 +935,7 @@ class TickboxFrame(tk.Frame):
 
     def __init__(self, parent, options, fancynames=None, defaults=None, ncols=3,
             single_select=False,
-            callback=None):
+            callback=None, debounce=None, throttle=None):
         '''
         parent
             Tkinter parent widget
@@ -177,12 +950,23 @@ class TickboxFrame(tk.Frame):
         single_select : bool
             If True, use Radiobuttons instead of Checkbuttons to only have
             one active selection at a time.
-        callback : callable
-            Executed when there's a change in the tickboxes.
-            Gets the self.states dict as an input argument.
+        callback : callable or None
+            Called (without arguments) when the user clicks a tickbox.
+            Not called when the states are set by code; use add_listener
+            to follow all the changes.
+        debounce : int or None
+            If given, the callback is called only once the clicks have
+            stopped for this many milliseconds (see Debouncer)
+        throttle : int or None
+            With debounce, call the callback at least this often (ms)
+            while the clicks continue
         '''
          
         tk.Frame.__init__(self, parent)
+
+        self._debouncer = None
+        if callback is not None and debounce is not None:
+            callback = self._debouncer = Debouncer(self, callback, debounce, throttle)
         self.parent = parent
         self._single_select = single_select 
 
@@ -247,8 +1031,29 @@ class TickboxFrame(tk.Frame):
         return [s for s, b in self.states.items() if b]
 
 
+    def _traced_variables(self):
+        if self._single_select:
+            return [(self.__states[self._option_names[0]], list(self._option_names))]
+        return [(intvar, [option]) for option, intvar in self.__states.items()]
+
+
+    def _option_value(self, option):
+        if self._single_select:
+            return int(self.__states[option].get()) == self._option_names.index(option)
+        return bool(self.__states[option].get())
+
+
+    def destroy(self):
+        '''
+        Cancel the pending debounced callback
+        '''
+        if self._debouncer is not None:
+            self._debouncer.cancel()
+        tk.Frame.destroy(self)
+
 
-class SliderFrame(tk.Frame):
+
+class SliderFrame(_ChangeListeners, tk.Frame):
     '''
     Multiple sliders (similar to TickboxFrame)
     
@@ -260,10 +1065,13 @@ class SliderFrame(tk.Frame):
         Tkinter Label widgets
     sliders : list
         Tkinter Scale widgets
+    variables : list
+        Tkinter DoubleVars of the sliders
     '''
     def __init__(self, parent, options, fancynames=None, defaults=None, ncols=1,
             ranges=None, default_range=(0,1),
-            resolutions=None, default_resolution=0.01):
+            resolutions=None, default_resolution=0.01,
+            callback=None, debounce=None, throttle=None):
         '''
         Options
         -------
@@ -285,6 +1093,14 @@ class SliderFrame(tk.Frame):
             Slider specific resolutions or None for each slider.
         default_resolution : numerical
             Default slider resolution
+        callback : callable or None
+            Called (without arguments) when a slider value changes
+        debounce : int or None
+            If given, the callback is called only once the sliders have
+            stopped for this many milliseconds (see Debouncer)
+        throttle : int or None
+            With debounce, call the callback at least this often (ms)
+            while the sliders keep moving
         '''
         tk.Frame.__init__(self, parent)
         self.grid_columnconfigure(1, weight=1)
@@ -292,6 +1108,7 @@ class SliderFrame(tk.Frame):
         self.options = options
         self.labels = []
         self.sliders = []
+        self.variables = []
 
         for i_row, name in enumerate(options):
             
@@ -313,15 +1130,23 @@ class SliderFrame(tk.Frame):
             else:
                 resolution = default_resolution
 
+            variable = tk.DoubleVar(self)
             slider = tk.Scale(self, from_=A, to=B, orient=tk.HORIZONTAL,
-                    resolution=resolution)
+                    resolution=resolution, variable=variable)
             slider.grid(row=i_row, column=1, sticky='WE')
 
-            if defaults and defaults[i_row]:
+            if defaults and defaults[i_row] is not None:
                 slider.set(defaults[i_row])
 
             self.labels.append(label)
             self.sliders.append(slider)
+            self.variables.append(variable)
+
+        if callback is not None:
+            if debounce is not None:
+                self.add_listener(Debouncer(self, callback, debounce, throttle))
+            else:
+                self.add_listener(lambda changes: callback())
 
 
     @property
@@ -341,9 +1166,166 @@ class SliderFrame(tk.Frame):
                 slider.set(value)
 
 
+    def _traced_variables(self):
+        return [(variable, [option]) for variable, option in zip(self.variables, self.options)]
+
+
+    def _option_value(self, option):
+        return self.sliders[self.options.index(option)].get()
+
+
+
+
+class EntryFrame(_ChangeListeners, tk.Frame):
+    '''
+    Typed text entries and choice menus (similar to SliderFrame)
+
+    Each option is shown as a label and either a text entry, whose text
+    is converted to the option's type, or an OptionMenu if the option
+    has choices.
+
+    Attributes
+    ----------
+    options : list
+        Names of the options
+    labels : list
+        Tkinter Label widgets
+    widgets : list
+        Tkinter Entry or OptionMenu widgets
+    '''
+    def __init__(self, parent, options, fancynames=None, defaults=None,
+            types=None, choices=None):
+        '''
+        Options
+        -------
+        parent : object
+            Tkinter parent widget
+        options : list of strings
+            Names of the options
+        fancynames : list of strings, or None
+            Optional, "fancy" names that are shown to the user
+        defaults : list or None
+            Start values
+        types : list of callables, or None
+            Converts the entry text to the value (for example int,
+            float or pathlib.Path). None or missing for str.
+        choices : list of sequences, or None
+            The allowed values for each option, or None for a text entry
+        '''
+        tk.Frame.__init__(self, parent)
+        self.grid_columnconfigure(1, weight=1)
+
+        self.options = options
+        self.labels = []
+        self.widgets = []
+        
+        self._variables = []
+        self._types = []
+        self._choices = []
+        self._values = []
+
+        for i_row, name in enumerate(options):
+            
+            if fancynames and fancynames[i_row]:
+                fancyname = fancynames[i_row]
+            else:
+                fancyname = name
+            
+            value_type = (types[i_row] if types else None) or str
+            option_choices = choices[i_row] if choices else None
+            default = defaults[i_row] if defaults else None
+            
+            label = tk.Label(self, text=fancyname)
+            label.grid(row=i_row, column=0, sticky='W')
+            
+            variable = tk.StringVar(self)
+            if option_choices:
+                option_choices = list(option_choices)
+                texts = [self._choice_text(choice) for choice in option_choices]
+                if default not in option_choices:
+                    # Saved settings have the choice text (Enum name)
+                    if default is not None and self._choice_text(default) in texts:
+                        default = option_choices[texts.index(self._choice_text(default))]
+                    else:
+                        default = option_choices[0]
+                widget = tk.OptionMenu(self, variable, *texts)
+            else:
+                widget = tk.Entry(self, textvariable=variable)
+            widget.grid(row=i_row, column=1, sticky='WE')
+
+            self.labels.append(label)
+            self.widgets.append(widget)
+            self._variables.append(variable)
+            self._types.append(value_type)
+            self._choices.append(option_choices)
+            self._values.append(default)
+
+            variable.set(self._text(i_row, default))
+    
+
+    @staticmethod
+    def _choice_text(choice):
+        return getattr(choice, 'name', str(choice))
+
+
+    def _text(self, i_option, value):
+        if value is None:
+            return ''
+        if self._choices[i_option]:
+            return self._choice_text(value)
+        return str(value)
+
+
+    def _value(self, i_option):
+        '''
+        The value of the option from its text. If the text cannot be
+        converted, returns the last valid value.
+        '''
+        text = self._variables[i_option].get()
+        option_choices = self._choices[i_option]
+        
+        if option_choices:
+            texts = [self._choice_text(choice) for choice in option_choices]
+            value = option_choices[texts.index(text)]
+        elif text == '' and self._types[i_option] is not str:
+            value = None
+        else:
+            try:
+                value = self._types[i_option](text)
+            except (ValueError, TypeError):
+                return self._values[i_option]
+        self._values[i_option] = value
+        return value
+
+
+    @property
+    def states(self):
+        '''
+        Returns the values dictionary.
+        Keys are the options and items are the (converted) values.
+        '''
+        return {option: self._value(i_option) for i_option, option in enumerate(self.options)}
+
+    
+    @states.setter
+    def states(self, s):
+        for i_option, option in enumerate(self.options):
+            if option in s:
+                self._values[i_option] = s[option]
+                self._variables[i_option].set(self._text(i_option, s[option]))
+
 
+    def _traced_variables(self):
+        return [(variable, [option]) for variable, option in zip(self._variables, self.options)]
 
-class DropdownList(tk.Frame):
+
+    def _option_value(self, option):
+        return self._value(self.options.index(option))
+
+
+
+
+class DropdownList(_ChangeListeners, tk.Frame):
     '''
     A drop-in replacement for TickboxFrame using tkinter's OptionMenu
     (looks just like OptionMenu)
@@ -406,6 +1388,14 @@ class DropdownList(tk.Frame):
         return [self.__options[index]]
 
 
+    def _traced_variables(self):
+        return [(self._state, list(self.__options))]
+
+
+    def _option_value(self, option):
+        return self.ticked[0] == option
+
+
 
 class Tabs(tk.Frame):
     '''
@@ -418,12 +1408,17 @@ class Tabs(tk.Frame):
     buttons : list of objects
         List of tk.Button instances.
     pages : list of objects
-        A list of Tkinter widgets the tab holds.
+        A list of Tkinter widgets the tab holds. In the lazy mode,
+        pages not yet built are None (see get_page).
+
+    The pages not shown are notified as hidden (see notify_visibility)
+    when they are built and when the tab changes.
     
     '''
     def __init__(self, parent, tab_names,
             elements=None, draw_frame=False,
-            on_select_callback=None):
+            on_select_callback=None, lazy=False, warmup=0,
+            evict_after=None):
         '''
         Initializing the tabs.
         
@@ -444,7 +1439,18 @@ class Tabs(tk.Frame):
         on_select_callback : callable
             Callback that is executed just before changing the tab.
             Has to take in one argument that is new i_current (integer).
-        
+        lazy : bool
+            If True, initialize the elements only when their tab is
+            selected for the first time, instead of all at the init.
+        warmup : int
+            In the lazy mode, build this many not yet built pages on both
+            sides of the current page in the background when Tk is idle
+            (one page per idle moment).
+        evict_after : None or float
+            In the lazy mode, destroy pages that have not been visited
+            in this many seconds when changing the tab. They are
+            rebuilt when visited again. The pages within the warmup
+            distance of the current page are never destroyed.
         '''
         
         # Call init from LabelFrame if framing is wanted
@@ -463,18 +1469,28 @@ class Tabs(tk.Frame):
         self.buttons = []
         self.pages = []
 
+        self.lazy = lazy
+        self.warmup = warmup
+        self.evict_after = evict_after
+        self._warmup_id = None
+        self._visible = True
 
         buttons_frame = tk.Frame(self)
         buttons_frame.grid()
 
         if elements is None:
             elements = [tk.Frame for i_tab in tab_names]
+        self._elements = list(elements)
+        self._last_visited = [None for element in self._elements]
 
         # Initialize content/elements
         for i_button, (name, element) in enumerate(zip(tab_names, elements)):
-
-            initialized_element = element(self)
-            self.pages.append(initialized_element)
+            
+            if lazy:
+                self.pages.append(None)
+            else:
+                initialized_element = element(self)
+                self.pages.append(initialized_element)
             
 
             button = tk.Button(buttons_frame, text=name, command=lambda i_button=i_button: self.set_page(i_button))
@@ -482,15 +1498,44 @@ class Tabs(tk.Frame):
             self.buttons.append(button)
             
 
-        self.pages[self.i_current].grid(row=1, columnspan=len(self.buttons), sticky='NSEW')
+        self.get_page(self.i_current).grid(row=1, columnspan=len(self.buttons), sticky='NSEW')
         
         self.grid_rowconfigure(1, weight=1)
         self.grid_columnconfigure(0, weight=1)
+        
+        for i_page, page in enumerate(self.pages):
+            if page is not None and i_page != self.i_current:
+                notify_visibility(page, False)
+
+        self._schedule_warmup()
+
     
     @property
     def tabs(self):
         return self.pages
 
+
+    def get_page(self, i_page):
+        '''
+        Returns the page (initialized element) at the index, building
+        it first if needed (lazy mode).
+        '''
+        if self.pages[i_page] is None:
+            self.pages[i_page] = self._elements[i_page](self)
+            self._last_visited[i_page] = time.monotonic()
+            if i_page != self.i_current:
+                notify_visibility(self.pages[i_page], False)
+        return self.pages[i_page]
+
+
+    def visibility_changed(self, visible):
+        '''
+        Propagates the visibility to the current page (see notify_visibility)
+        '''
+        self._visible = visible
+        notify_visibility(self.pages[self.i_current], visible)
+
+
     def set_page(self, i_page):
         '''
         When button number i_button is pressed.
@@ -504,14 +1549,58 @@ class Tabs(tk.Frame):
 
         # Remove the previously gridded widget
         self.pages[i_old].grid_remove()
+        if i_old != i_page:
+            notify_visibility(self.pages[i_old], False)
+
+        now = time.monotonic()
+        self._last_visited[i_old] = now
+        self._last_visited[i_page] = now
 
         # Grid the new widget
-        self.pages[self.i_current].grid(row=1, columnspan=len(self.buttons), sticky='NSEW')
+        self.get_page(self.i_current).grid(row=1, columnspan=len(self.buttons), sticky='NSEW')
+        if i_old != i_page and self._visible:
+            notify_visibility(self.pages[i_page], True)
 
         # Change button reliefs (pressed)
         self.buttons[i_old].config(relief=tk.RAISED)
         self.buttons[i_page].config(relief=tk.SUNKEN)
 
+        if self.lazy and self.evict_after is not None:
+            self._evict(now)
+        self._schedule_warmup()
+
+
+    def _evict(self, now):
+        '''Destroy the pages not visited in evict_after seconds,
+        except the ones that the warmup would build again
+        '''
+        for i_page, page in enumerate(self.pages):
+            if page is None or abs(i_page - self.i_current) <= self.warmup:
+                continue
+            if now - self._last_visited[i_page] > self.evict_after:
+                page.destroy()
+                self.pages[i_page] = None
+
+
+    def _schedule_warmup(self):
+        if not self.lazy or not self.warmup:
+            return
+        if self._warmup_id is not None:
+            self.after_cancel(self._warmup_id)
+        self._warmup_id = self.after_idle(self._warmup_step)
+
+
+    def _warmup_step(self):
+        '''Build the nearest unbuilt page and reschedule if more to build
+        '''
+        self._warmup_id = None
+        for distance in range(1, self.warmup+1):
+            for i_page in (self.i_current+distance, self.i_current-distance):
+                if 0 <= i_page < len(self.pages) and self.pages[i_page] is None:
+                    self.get_page(i_page)
+                    self._warmup_id = self.after_idle(self._warmup_step)
+                    return
+
 
     def get_elements(self):
         '''
@@ -588,45 +1677,547 @@ class ButtonsFrame(tk.Frame):
 
 
 
+class BufferSink(logging.Handler):
+    '''
+    Thread-safe text sink to be shown by a BufferShower.
+
+    Works as a logging handler (logger.addHandler(sink)) and as a
+    file-like object (sys.stdout = sink, or print(..., file=sink)).
+    Text written from any thread is queued and the BufferShower
+    showing the sink is woken up only when there is new text.
+
+    The queue has its own lock and the logging handler lock is not
+    used, so the wakeup function is never called while a lock is held.
+
+    At most max_pending writes are queued. If the GUI cannot keep up,
+    the oldest queued writes are dropped and counted.
+
+    Attributes
+    ----------
+    max_pending : int
+        Maximum number of queued writes
+    dropped : int
+        Total number of writes dropped because of a full queue
+    '''
+
+    def __init__(self, max_pending=10000, level=logging.NOTSET):
+        '''
+        max_pending : int
+            Maximum number of queued writes (print makes usually two writes)
+        level : int
+            Logging level of the handler
+        '''
+        logging.Handler.__init__(self, level)
+
+        self.max_pending = max_pending
+        self.dropped = 0
+
+        self._queue = collections.deque()
+        self._queue_lock = threading.Lock()
+        self._unreported = 0
+        self._wakeup = None
+        self._wakeup_pending = False
+
+
+    def set_wakeup(self, function):
+        '''
+        Set the function called (from the writing thread) when text
+        arrives to an empty sink, or None to remove it. Used by
+        BufferShower. The function should return quickly and not
+        wait for another thread (for example call tkinter).
+        '''
+        with self._queue_lock:
+            self._wakeup = function
+            self._wakeup_pending = False
+            has_data = bool(self._queue)
+        if has_data:
+            self._call_wakeup()
+
+
+    def _call_wakeup(self):
+        with self._queue_lock:
+            if self._wakeup is None or self._wakeup_pending:
+                return
+            self._wakeup_pending = True
+            wakeup = self._wakeup
+        try:
+            wakeup()
+        except Exception:
+            # For example the Tk main loop is not running (yet).
+            # Try again on the next write.
+            with self._queue_lock:
+                self._wakeup_pending = False
+
+
+    def write(self, text):
+        '''
+        Queue text (file-like interface). Returns the number of characters.
+        '''
+        if not text:
+            return 0
+        
+        with self._queue_lock:
+            if len(self._queue) >= self.max_pending:
+                self._queue.popleft()
+                self.dropped += 1
+                self._unreported += 1
+            self._queue.append(text)
+            wake = not self._wakeup_pending
+
+        if wake:
+            self._call_wakeup()
+        return len(text)
+
+
+    def handle(self, record):
+        '''
+        Filter and emit a log record (logging.Handler interface).
+
+        Unlike logging.Handler.handle, does not hold the handler lock
+        while emitting, because the queue has its own lock.
+        '''
+        rv = self.filter(record)
+        if isinstance(rv, logging.LogRecord):
+            record = rv
+        if rv:
+            self.emit(record)
+        return rv
+
+
+    def emit(self, record):
+        '''
+        Queue a formatted log record (logging.Handler interface)
+        '''
+        try:
+            self.write(self.format(record) + '\n')
+        except Exception:
+            self.handleError(record)
+
+
+    def flush(self):
+        pass
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        return False
+
+
+    @property
+    def pending(self):
+        '''
+        Number of queued writes
+        '''
+        return len(self._queue)
+
+
+    def drain(self):
+        '''
+        Take all the queued text.
+
+        Returns
+        -------
+        text : string
+            The queued text joined together
+        dropped : int
+            Number of writes dropped since the previous drain
+        '''
+        with self._queue_lock:
+            chunks = list(self._queue)
+            self._queue.clear()
+            dropped = self._unreported
+            self._unreported = 0
+            self._wakeup_pending = False
+        return ''.join(chunks), dropped
+
+
+
 class BufferShower(tk.Frame):
     '''
     Redirect any string buffer to be printed on this buffer reader.
     Bit like a non-interactive console window.
+
+    A seekable buffer (StringIO) is polled every 20 ms. Everything written
+    since the last poll is read and shown in one go, and the oldest lines
+    are removed so that at most max_entries lines are kept.
+
+    A BufferSink is safe to write from other threads. The writing
+    thread only sets a flag when the sink gets new text, and the flag
+    is checked on the tkinter thread. The check is cheap and its
+    interval grows up to 200 ms while no text comes.
+
+    With history (or a given store), all the lines are also appended to
+    a LogStore (tk_steroids.logstore) that keeps a bounded history in
+    memory, and optionally the full history compressed on disk. The
+    history can be searched and shown with search and show_history.
+
+    With a classifier (or after add_rule or set_filter), each complete
+    line is classified once when it comes in (log level, source and the
+    regex rules added with add_rule, see LineClassifier) and the results
+    are stored with the line. Coloring uses Text tags and filtering
+    (set_filter) only checks the stored results, so changing the filter
+    is fast even with a long history. The last, incomplete line is
+    shown untagged until it is complete.
+
+    Without them, the lines are only shown.
+
+    Attributes
+    ----------
+    entries : int
+        Number of (complete) lines currently shown
+    store : object or None
+        The LogStore holding the history
+    following : bool
+        If True, new text is shown as it comes. False while showing
+        the history (see show_history and follow).
+    classifier : object or None
+        The LineClassifier
+    level_filter : int
+        Minimum level code (index in tk_steroids.logstore.LEVELS) shown
+    source_filter : set or None
+        Source ids shown, or None for all
     '''
-    def __init__(self, parent, string_buffer, max_entries=100):
+
+    # Shortest and longest interval (ms) of checking a BufferSink
+    SINK_POLL = (20, 200)
+
+    LEVEL_COLORS = {
+            'DEBUG': {'foreground': 'gray50'},
+            'WARNING': {'foreground': 'darkorange'},
+            'ERROR': {'foreground': 'red'},
+            'CRITICAL': {'foreground': 'white', 'background': 'red'},
+            }
+
+    def __init__(self, parent, string_buffer, max_entries=100, store=None,
+            consume_buffer=False, classifier=None, history=False):
         '''
-        string_buffer       Like StringIO, or sys.stdout
+        string_buffer       Like StringIO, or sys.stdout, or a BufferSink
+        max_entries         Maximum number of lines shown
+        store               A LogStore for the history, or None
+        consume_buffer      If True, empty a StringIO buffer after reading it.
+                            If False, the buffer keeps everything written to
+                            it, so use True (or a BufferSink) for long running
+                            output unless something else reads the same buffer.
+        classifier          A LineClassifier, True for the default one,
+                            or None to not classify the lines
+        history             If True and no store is given, keep a memory-only
+                            history of 10*max_entries (at least 1000) lines
         '''
         tk.Frame.__init__(self, parent)
 
         self.parent = parent    
         self.string_buffer = string_buffer
         self.max_entries = max_entries
+        self.consume_buffer = consume_buffer
         
+        if store is None and history:
+            store = LogStore(memory_lines=max(10*max_entries, 1000))
+        self.store = store
+        self.following = True
+        
+        if classifier is True:
+            classifier = LineClassifier()
+        self.classifier = classifier
+        self.level_filter = 0
+        self.source_filter = None
+        self._tags_cache = {}
+
         self.entries = 0
         self.offset = 0
+        self._partial = ''
 
         self.text = tkinter.scrolledtext.ScrolledText(self)
         self.text.grid()
         
-        self.parent.after(20, self.callback)
+        for level, options in self.LEVEL_COLORS.items():
+            self.text.tag_configure('level_'+level, **options)
+
+        self._visible = True
+        self._after_id = None
+
+        if isinstance(string_buffer, BufferSink):
+            self._sink_data = False
+            self._poll_interval = self.SINK_POLL[0]
+            self._poll = self._poll_sink
+            string_buffer.set_wakeup(self._wakeup)
+        else:
+            self._poll = self.callback
+        self._after_id = self.after(20, self._poll)
+        
+
+    def _wakeup(self):
+        '''
+        Called by the sink from the writing thread. Does not call
+        tkinter, only sets the flag checked by _poll_sink.
+        '''
+        self._sink_data = True
+
+
+    def _poll_sink(self):
+        self._after_id = None
+
+        if self._sink_data:
+            self._sink_data = False
+            self._drain_sink()
+            self._poll_interval = self.SINK_POLL[0]
+        else:
+            self._poll_interval = min(2*self._poll_interval, self.SINK_POLL[1])
         
+        if self._visible:
+            self._after_id = self.after(self._poll_interval, self._poll_sink)
+
+
+    def _drain_sink(self):
+        data, dropped = self.string_buffer.drain()
+        if dropped:
+            data = '[{} writes dropped]\n'.format(dropped) + data
+        if data:
+            self.add_text(data)
+
+
     def callback(self):
+        self._after_id = None
+
         self.string_buffer.seek(self.offset)
+        data = self.string_buffer.read()
+        
+        if self.consume_buffer:
+            self.string_buffer.seek(0)
+            self.string_buffer.truncate(0)
+        self.offset = self.string_buffer.tell()
+        
+        if data:
+            self.add_text(data)
+
+        if self._visible:
+            self._after_id = self.after(20, self.callback)
+
+
+    def add_rule(self, pattern, **tag_options):
+        '''
+        Color the new lines matching the regular expression.
+
+        tag_options are passed to Text.tag_configure (for example
+        foreground='blue'). The first matching rule wins.
+        '''
+        i_rule = self._get_classifier().add_rule(pattern)
+        self.text.tag_configure('rule_{}'.format(i_rule), **tag_options)
+        self.text.tag_raise('rule_{}'.format(i_rule))
+        self._tags_cache = {}
+
+
+    def _get_classifier(self):
+        if self.classifier is None:
+            self.classifier = LineClassifier()
+        return self.classifier
+
+
+    def _get_store(self):
+        if self.store is None:
+            raise ValueError('No history, create the BufferShower with history=True or a store')
+        return self.store
+
+
+    def _tags(self, meta):
+        '''
+        Text tags of a line by its metadata
+        '''
+        tags = self._tags_cache.get(meta)
+        if tags is None:
+            tags = []
+            level = LEVELS[meta_level(meta)]
+            if level in self.LEVEL_COLORS:
+                tags.append('level_'+level)
+            rule = meta_rule(meta)
+            if rule:
+                tags.append('rule_{}'.format(rule))
+            tags = tuple(tags)
+            self._tags_cache[meta] = tags
+        return tags
+
+
+    def _filtered(self, lines, meta):
+        '''
+        Returns the lines and their metadata passing the filters
+        '''
+        level = self.level_filter
+        sources = self.source_filter
+        if not level and sources is None:
+            return lines, meta
+        keep = [i_line for i_line, line_meta in enumerate(meta)
+                if meta_level(line_meta) >= level
+                and (sources is None or meta_source(line_meta) in sources)]
+        return [lines[i] for i in keep], [meta[i] for i in keep]
 
-        for line in self.string_buffer:
 
-            if self.entries > self.max_entries:
-                self.text.delete('1.0','2.0')
+    def _insert_lines(self, lines, meta):
+        '''
+        Insert complete lines at the end with one insert call, joining
+        the consecutive lines that have the same tags.
+        '''
+        args = []
+        segment = []
+        segment_tags = None
+        for line, line_meta in zip(lines, meta):
+            tags = self._tags(line_meta)
+            if tags != segment_tags and segment:
+                args.extend(('\n'.join(segment)+'\n', segment_tags))
+                segment = []
+            segment_tags = tags
+            segment.append(line)
+        if segment:
+            args.extend(('\n'.join(segment)+'\n', segment_tags))
+        if args:
+            self.text.insert(tk.END, *args)
+
+
+    def add_text(self, data):
+        '''
+        Append text (any number of lines) to the history and the shown
+        text, and trim the oldest shown lines.
+        '''
+        lines = (self._partial + data).split('\n')
+        self._partial = lines.pop()
+        if self.classifier is not None:
+            meta = self.classifier.classify_many(lines)
+        else:
+            meta = [0] * len(lines)
+        if self.store is not None:
+            self.store.append(lines, meta)
 
-            self.text.insert(tk.END, line)
-            self.text.yview(tk.END)
-            self.entries += 1
+        if not self.following:
+            return
         
-        self.offset = self.string_buffer.tell()
+        lines, meta = self._filtered(lines, meta)
+        n_lines = len(lines)
+
+        if n_lines >= self.max_entries:
+            # Only the tail will be visible; skip inserting the rest
+            lines = lines[-self.max_entries:]
+            meta = meta[-self.max_entries:]
+            self.text.delete('1.0', tk.END)
+            self.entries = 0
+            n_lines = self.max_entries
+        else:
+            # The previous incomplete line
+            self.text.delete('end-1c linestart', 'end-1c')
+        
+        self._insert_lines(lines, meta)
+        self.text.insert(tk.END, self._partial)
+        self.entries += n_lines
+        
+        excess = self.entries - self.max_entries
+        if excess > 0:
+            self.text.delete('1.0', '{}.0'.format(excess+1))
+            self.entries -= excess
+
+        self.text.yview(tk.END)
+
+
+    def set_filter(self, level=None, sources=None):
+        '''
+        Show only the lines of at least the given level and from
+        the given sources. With a history, the shown lines are rebuilt
+        from the history in memory, otherwise the filter applies to
+        the new lines.
+
+        Arguments
+        ---------
+        level : string, int or None
+            Level name ('WARNING'), logging level (30) or None for all
+        sources : iterable of strings or None
+            Source names (logger names), or None for all
+        '''
+        self.level_filter = 0 if level is None else level_code(level)
+        if sources is None:
+            self.source_filter = None
+        else:
+            self.source_filter = {self._get_classifier().source_id(source) for source in sources}
+        self._get_classifier()
+
+        if self.following and self.store is not None:
+            self.follow()
+
+    def search(self, pattern, **kwargs):
+        '''
+        Search the history for a regular expression.
+
+        Returns the matching line numbers. See LogStore.search for
+        the keyword arguments.
+        '''
+        return self._get_store().search(pattern, **kwargs)
+
+
+    def show_history(self, line_number):
+        '''
+        Stop following new text and show the history around the
+        line number, highlighting the line. Call follow to go back.
+        '''
+        store = self._get_store()
+        self.following = False
+
+        start = max(store.first_line, line_number - self.max_entries//2)
+        lines = store.get(start, start+self.max_entries)
+        
+        self.text.delete('1.0', tk.END)
+        self.text.insert(tk.END, '\n'.join(lines))
+        self.entries = len(lines)
+
+        row = line_number - start + 1
+        self.text.tag_configure('history_line', background='yellow')
+        self.text.tag_add('history_line', '{}.0'.format(row), '{}.end'.format(row))
+        self.text.see('{}.0'.format(row))
+
+
+    def follow(self):
+        '''
+        Show the newest lines again and follow new text.
+        '''
+        self.following = True
+        if self.store is None:
+            return
+
+        first, lines, meta = self.store.memory()
+        lines, meta = self._filtered(lines, meta)
+        lines = lines[-self.max_entries:]
+        meta = meta[-self.max_entries:]
+        
+        self.text.delete('1.0', tk.END)
+        self._insert_lines(lines, meta)
+        self.text.insert(tk.END, self._partial)
+        self.entries = len(lines)
+        
+        self.text.yview(tk.END)
+
+
+    def visibility_changed(self, visible):
+        '''
+        Stop polling the buffer when hidden, and catch up when shown.
+        '''
+        if visible and not self._visible:
+            self._visible = True
+            if self._after_id is None:
+                self._poll()
+        elif not visible:
+            self._visible = False
+            if self._after_id is not None:
+                self.after_cancel(self._after_id)
+                self._after_id = None
+
+
+    def destroy(self):
+        '''
+        Stop polling and detach from the sink
+        '''
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+        if isinstance(self.string_buffer, BufferSink) and self.string_buffer._wakeup == self._wakeup:
+            self.string_buffer.set_wakeup(None)
+        tk.Frame.destroy(self)
+
 
-        self.parent.after(20, self.callback)
-    
 
 class ColorExplanation(tk.Frame):
     '''
@@ -1,16 +1,33 @@
+'''
+Showing live image feeds.
+
+PIL (pillow) is imported lazily when the first ImageFeed is created.
+'''
 
 import tkinter as tk
-import PIL
-import PIL.Image
-import PIL.ImageDraw
-import PIL.ImageFont
-import PIL.ImageTk
+
+from .lazyimport import lazy_imports
+
+
+def _load_pil():
+    import PIL
+    import PIL.Image
+    import PIL.ImageDraw
+    import PIL.ImageFont
+    import PIL.ImageTk
+    return {'PIL': PIL}
+
+_import_pil, __getattr__ = lazy_imports(globals(), ['PIL'], _load_pil)
+
 
 class ImageFeed(tk.Frame):
     '''
     A widgets that easily allows showing a camerafeed (or any PIL
     image feed) if the object has a method callled get, which returns
     a PIL image.
+
+    The periodic updates pause while the feed is hidden (see
+    tk_steroids.elements.notify_visibility).
     '''
 
     def __init__(self, tk_master, size='original', feed_object=None, fallback_size=(800,600)):
@@ -19,6 +36,8 @@ class ImageFeed(tk.Frame):
         size            Tuple of (x, y) in pixels or "original" or a float scaling
                         factor where values larger than 1 incease feed's size.
         '''
+        _import_pil()
+
         tk.Frame.__init__(self, tk_master)
         self.tk_master = tk_master
 
@@ -42,6 +61,8 @@ class ImageFeed(tk.Frame):
             raise ValueError('Given size invalid: {}'.format(size))
     
         self.update_interval = 0
+        self._visible = True
+        self._after_id = None
 
         self.imagelabel = tk.Label(self)
         self.imagelabel.grid()
@@ -57,10 +78,32 @@ class ImageFeed(tk.Frame):
         If milliseconds. If 0 then no udpate.
         '''
         self.update_interval = milliseconds
+        self._cancel_update()
         if self.update_interval:
             self.update_feed()
 
+    def _cancel_update(self):
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+
+
+    def visibility_changed(self, visible):
+        '''
+        Pause updates when hidden and catch up when shown.
+        '''
+        if visible and not self._visible:
+            self._visible = True
+            if self.update_interval:
+                self._cancel_update()
+                self.update_feed()
+        elif not visible:
+            self._visible = False
+            self._cancel_update()
+
+
     def update_feed(self, img=None):
+        self._cancel_update()
         if img is None:
             try:
                 image = self.feed_object.get()
@@ -78,8 +121,8 @@ class ImageFeed(tk.Frame):
 
         self.imagelabel.configure(image=self.photoimage)
         
-        if self.update_interval:
-            self.after(self.update_interval, self.update_feed)
+        if self.update_interval and self._visible:
+            self._after_id = self.after(self.update_interval, self.update_feed)
 
     def show_image(image):
         '''
@@ -0,0 +1,50 @@
+'''
+Lazy imports of the heavy optional dependencies (numpy, PIL, matplotlib).
+
+A module using them calls lazy_imports once at the module level
+
+    def _load_numpy():
+        import numpy as np
+        return {'np': np}
+
+    _import_numpy, __getattr__ = lazy_imports(globals(), ['np'], _load_numpy)
+
+and then _import_numpy() before the first use of np. Accessing np as
+a module attribute (module.np) imports it too (PEP 562).
+'''
+
+
+def lazy_imports(namespace, names, load):
+    '''
+    Make the import function and the module __getattr__ for lazy names.
+
+    Arguments
+    ---------
+    namespace : dict
+        globals() of the module
+    names : list of strings
+        The names that load returns
+    load : callable
+        Does the imports and returns them as a dict {name: object}
+
+    Returns
+    -------
+    import_names : callable
+        Puts the names to the namespace, importing only the first time
+    module_getattr : callable
+        The module's __getattr__
+    '''
+    names = tuple(names)
+
+    def import_names():
+        if not all(name in namespace for name in names):
+            namespace.update(load())
+
+    def module_getattr(name):
+        if name in names:
+            import_names()
+            return namespace[name]
+        raise AttributeError('module {} has no attribute {}'.format(
+            namespace['__name__'], name))
+
+    return import_names, module_getattr
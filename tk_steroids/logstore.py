@@ -0,0 +1,658 @@
+'''
+Memory-bounded storage of text lines (for example log output) with
+optional spill of the older lines to compressed files on disk.
+
+Used by BufferShower to keep a searchable history of everything shown,
+but does not depend on tkinter itself.
+'''
+
+import os
+import re
+import zlib
+import tempfile
+import array
+import bisect
+import itertools
+
+
+# Level codes of the line metadata, index is the code
+LEVELS = ['', 'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
+
+_LEVEL_ALIASES = {'WARN': 'WARNING', 'FATAL': 'CRITICAL'}
+
+# Size of the trigram bitmap of each spilled block
+_GRAM_BYTES = 2048
+_GRAM_MASK = _GRAM_BYTES*8 - 1
+
+# Lines continuing the previous log record (tracebacks, indented
+# and empty lines)
+_CONTINUATION = re.compile(r'$|\s|Traceback \(most recent call last\)|'
+        r'During handling of the above exception|The above exception was')
+
+_REGEX_SPECIAL = set('.^$*+?{}[]()|\\')
+_QUANTIFIERS = set('*+?{')
+
+# Number of hex digits after the escape letter
+_ESCAPE_DIGITS = {'x': 2, 'u': 4, 'U': 8}
+
+
+def meta_level(meta):
+    '''Level code (index in LEVELS) of a packed line metadata value
+    '''
+    return meta & 0x7
+
+def meta_rule(meta):
+    '''Index+1 of the first matching rule, or 0 if none
+    '''
+    return (meta >> 3) & 0x1f
+
+def meta_source(meta):
+    '''Source id (index in LineClassifier.sources)
+    '''
+    return meta >> 8
+
+def pack_meta(level, rule, source):
+    return level | (rule << 3) | (source << 8)
+
+
+def level_code(level):
+    '''Level code from a level name ('ERROR'), a logging
+    level number (40) or a level code (4).
+    '''
+    if isinstance(level, str):
+        level = level.upper()
+        return LEVELS.index(_LEVEL_ALIASES.get(level, level))
+    if level >= 10:
+        return min(len(LEVELS)-1, level // 10)
+    return level
+
+
+def _gram_hashes(text):
+    '''Bit numbers of the lowercased character trigrams of the text
+    '''
+    text = text.lower()
+    return {hash(text[i:i+3]) & _GRAM_MASK for i in range(len(text)-2)}
+
+
+def _gram_bitmap(text):
+    bitmap = bytearray(_GRAM_BYTES)
+    for bit in _gram_hashes(text):
+        bitmap[bit >> 3] |= 1 << (bit & 7)
+    return bytes(bitmap)
+
+
+def _skip_class(pattern, i):
+    '''Index after the character class [...] starting at pattern[i]
+    '''
+    i += 1
+    if i < len(pattern) and pattern[i] == '^':
+        i += 1
+    if i < len(pattern) and pattern[i] == ']':
+        i += 1
+    while i < len(pattern) and pattern[i] != ']':
+        if pattern[i] == '\\':
+            i += 1
+        i += 1
+    return i + 1
+
+
+def _skip_group(pattern, i):
+    '''Index after the group (...) starting at pattern[i]
+    '''
+    depth = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '[':
+            i = _skip_class(pattern, i)
+            continue
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def _skip_escape(pattern, i):
+    '''Index after the escape (\\x41, \\N{...}, \\12...) starting at pattern[i]
+    '''
+    i += 1
+    if i >= len(pattern):
+        return i
+    char = pattern[i]
+    i += 1
+    if char in _ESCAPE_DIGITS:
+        return i + _ESCAPE_DIGITS[char]
+    if char == 'N' and pattern.startswith('{', i):
+        end = pattern.find('}', i)
+        return len(pattern) if end == -1 else end + 1
+    if char.isdigit():
+        # Octal escape or group reference, at most 3 digits
+        end = min(len(pattern), i+2)
+        while i < end and pattern[i].isdigit():
+            i += 1
+    return i
+
+
+def _required_literals(pattern, flags=0):
+    '''Literal strings that every match of the regular expression contains.
+
+    Conservative: the groups, character classes, quantified characters
+    and escapes like \\d are skipped, and a pattern with alternatives
+    (|) on the top level or in the verbose mode gives no literals.
+
+    Arguments
+    ---------
+    pattern : string or compiled regex
+    flags : int
+        Flags of a string pattern
+    '''
+    if not isinstance(pattern, str):
+        flags |= pattern.flags
+        pattern = pattern.pattern
+    if (not isinstance(pattern, str) or flags & re.VERBOSE
+            or re.search(r'\(\?[aiLmsux-]*x', pattern)):
+        return []
+    
+    literals = []
+    run = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        literal = None
+        if char == '\\':
+            # Only escaped punctuation is taken literally; letter and
+            # digit escapes (\\d, \\x41, \\1...) end the literal run
+            if i+1 < len(pattern) and not pattern[i+1].isalnum():
+                literal = pattern[i+1]
+            i = _skip_escape(pattern, i)
+        elif char == '[':
+            i = _skip_class(pattern, i)
+        elif char == '(':
+            i = _skip_group(pattern, i)
+        elif char == '|':
+            return []
+        else:
+            if char not in _REGEX_SPECIAL:
+                literal = char
+            i += 1
+        
+        if i < len(pattern) and pattern[i] in _QUANTIFIERS:
+            literal = None
+        if literal is None:
+            if run:
+                literals.append(''.join(run))
+            run = []
+        else:
+            run.append(literal)
+    if run:
+        literals.append(''.join(run))
+    return literals
+
+
+class LineClassifier:
+    '''Classifies text lines by their log level, source and regex rules.
+
+    Each line gets one packed integer (see pack_meta) so that the
+    classification results can be stored compactly and filtered
+    without parsing the lines again.
+
+    The level is read from the start of the line (after an optional
+    timestamp), like in the default logging format. Lines continuing
+    a log record (indented lines and tracebacks, including the final
+    exception line) get the level of the record; other lines without
+    a level get none.
+
+    Attributes
+    ----------
+    rules : list of tuples
+        (compiled regex, name) pairs; the first matching rule is stored
+    sources : list of strings
+        Source names by source id. The id 0 is for no source.
+    '''
+
+    def __init__(self,
+            level_pattern=r'^[\d\-:,.T ]*[\[(]?(DEBUG|INFO|WARN(?:ING)?|ERROR|CRITICAL|FATAL)\b',
+            source_pattern=r'^(?:DEBUG|INFO|WARNING|ERROR|CRITICAL):([^:]+):'):
+        '''
+        level_pattern : string
+            Regex with one group that captures the level name
+        source_pattern : string or None
+            Regex with one group that captures the source name.
+            The default matches the default logging format
+            (levelname:name:message).
+        '''
+        self._level_search = re.compile(level_pattern).search
+        if source_pattern:
+            self._source_match = re.compile(source_pattern).match
+        else:
+            self._source_match = None
+        
+        self.rules = []
+        self.sources = ['']
+        self._source_ids = {'': 0}
+        self._last_level = 0
+        self._in_traceback = False
+
+
+    def add_rule(self, pattern, name=None):
+        '''
+        Add a regex rule. Returns the rule number (1, 2, ...)
+        '''
+        if len(self.rules) >= 31:
+            raise ValueError('At most 31 rules supported')
+        self.rules.append((re.compile(pattern), name or pattern))
+        return len(self.rules)
+
+
+    def source_id(self, source):
+        '''Returns the id of the source name, adding it if new
+        '''
+        i_source = self._source_ids.get(source)
+        if i_source is None:
+            i_source = len(self.sources)
+            self.sources.append(source)
+            self._source_ids[source] = i_source
+        return i_source
+
+
+    def classify(self, line):
+        '''
+        Returns the packed metadata of one line
+        '''
+        match = self._level_search(line)
+        if match:
+            level = level_code(match.group(1))
+            self._in_traceback = False
+        elif _CONTINUATION.match(line):
+            level = self._last_level
+            if line.startswith('Traceback'):
+                self._in_traceback = True
+        elif self._in_traceback:
+            # The exception line ending the traceback
+            level = self._last_level
+            self._in_traceback = False
+        else:
+            level = 0
+        self._last_level = level
+
+        source = 0
+        if self._source_match is not None:
+            match = self._source_match(line)
+            if match:
+                source = self.source_id(match.group(1))
+
+        rule = 0
+        for i_rule, (pattern, name) in enumerate(self.rules):
+            if pattern.search(line):
+                rule = i_rule + 1
+                break
+
+        return pack_meta(level, rule, source)
+
+
+    def classify_many(self, lines):
+        '''
+        Returns the metadata of the lines as an array of unsigned ints
+        '''
+        classify = self.classify
+        return array.array('I', [classify(line) for line in lines])
+
+
+
+class LogStore:
+    '''Ring buffer of the latest lines with an optional disk spill.
+
+    Lines are numbered from 0 in the order they are appended. The newest
+    memory_lines lines are kept in memory. If a directory is given, the
+    lines leaving the memory are compressed in blocks of block_lines lines
+    and appended to rotating files in the directory. A small index of the
+    blocks allows reading any line and searching the whole history one
+    block at a time, without loading it all in memory.
+
+    When the files take more than max_files * max_file_bytes, the oldest
+    file and its lines are deleted. Without a directory, the lines leaving
+    the memory are forgotten.
+
+    Attributes
+    ----------
+    memory_lines : int
+        Number of the newest lines kept in memory
+    directory : string or None
+        Where the spilled lines are written
+    n_lines : int
+        Number of lines appended in total
+    '''
+
+    def __init__(self, memory_lines=10000, directory=None, block_lines=1000,
+            max_file_bytes=10*1024*1024, max_files=5, basename='log'):
+        '''
+        memory_lines : int
+            Number of the newest lines kept in memory
+        directory : string or None
+            Directory for the spill files, or None for no spilling
+        block_lines : int
+            Number of lines compressed together. Reading any spilled line
+            decompresses its block.
+        max_file_bytes : int
+            A new file is started when the current one exceeds this size
+        max_files : int
+            Number of spill files kept
+        basename : string
+            Spill files are named basename.N.XXXXXXXX.z, where XXXXXXXX
+            is random. Existing files are never overwritten, so many
+            stores can share the directory.
+        '''
+        self.memory_lines = max(1, int(memory_lines))
+        self.directory = directory
+        self.block_lines = block_lines
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.basename = basename
+
+        self.n_lines = 0
+
+        # Ring buffer, lines and their metadata
+        self._ring = [None] * self.memory_lines
+        self._ring_meta = array.array('I', [0]) * self.memory_lines
+        self._ring_start = 0
+        self._ring_count = 0
+
+        # Lines waiting to be compressed as a block
+        self._spill = []
+        self._spill_first = 0
+
+        # Disk blocks; parallel lists for bisecting by line number
+        self._block_first = []
+        self._blocks = []       # (n_lines, i_file, offset, size)
+        self._block_grams = []  # trigram bitmaps of the blocks, for search
+        self._files = []        # i_file of the existing files, oldest first
+        self._paths = {}        # i_file -> path
+        self._file = None
+        self._file_size = 0
+        self._forgotten = 0     # Line numbers below this are gone
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+
+    @property
+    def first_line(self):
+        '''
+        Number of the oldest line still available
+        '''
+        return self._forgotten
+
+
+    @property
+    def memory_first_line(self):
+        '''
+        Number of the oldest line in memory
+        '''
+        return self.n_lines - self._ring_count
+
+
+    def __len__(self):
+        return self.n_lines
+
+
+    def append(self, lines, meta=None):
+        '''
+        Append lines (an iterable of strings without newlines)
+
+        meta : sequence of ints or None
+            Metadata of the lines (see LineClassifier), kept only
+            for the lines in memory
+        '''
+        ring = self._ring
+        ring_meta = self._ring_meta
+        capacity = self.memory_lines
+        
+        if meta is None:
+            meta = itertools.repeat(0)
+
+        for line, line_meta in zip(lines, meta):
+            if self._ring_count == capacity:
+                self._evict(ring[self._ring_start])
+                i_ring = self._ring_start
+                self._ring_start = (self._ring_start + 1) % capacity
+            else:
+                i_ring = (self._ring_start + self._ring_count) % capacity
+                self._ring_count += 1
+            ring[i_ring] = line
+            ring_meta[i_ring] = line_meta
+            self.n_lines += 1
+
+
+    def memory(self):
+        '''
+        Returns the lines in memory and their metadata
+
+        Returns
+        -------
+        first : int
+            Line number of the first line
+        lines : list of strings
+        meta : array of ints
+        '''
+        start = self._ring_start
+        stop = start + self._ring_count
+        capacity = self.memory_lines
+        if stop <= capacity:
+            lines = self._ring[start:stop]
+            meta = self._ring_meta[start:stop]
+        else:
+            lines = self._ring[start:] + self._ring[:stop-capacity]
+            meta = self._ring_meta[start:] + self._ring_meta[:stop-capacity]
+        return self.memory_first_line, lines, meta
+
+
+    def _evict(self, line):
+        '''
+        A line leaves the memory ring
+        '''
+        if self.directory is None:
+            self._forgotten += 1
+            return
+
+        if not self._spill:
+            self._spill_first = self.n_lines - self._ring_count
+        self._spill.append(line)
+        if len(self._spill) >= self.block_lines:
+            self._write_block()
+
+
+    def _file_path(self, i_file):
+        return self._paths[i_file]
+
+
+    def _write_block(self):
+        '''
+        Compress the spill buffer as one block to the current file
+        '''
+        if not self._spill:
+            return
+
+        if self._file is None or self._file_size >= self.max_file_bytes:
+            self._rotate()
+
+        text = '\n'.join(self._spill)
+        data = zlib.compress(text.encode('utf-8'))
+        self._file.write(data)
+        self._file.flush()
+
+        self._block_first.append(self._spill_first)
+        self._blocks.append((len(self._spill), self._files[-1], self._file_size, len(data)))
+        self._block_grams.append(_gram_bitmap(text))
+        self._file_size += len(data)
+
+        self._spill = []
+
+
+    def _rotate(self):
+        '''
+        Start a new spill file, deleting the oldest if there are too many
+        '''
+        if self._file is not None:
+            self._file.close()
+
+        i_file = self._files[-1] + 1 if self._files else 0
+        self._files.append(i_file)
+        fd, self._paths[i_file] = tempfile.mkstemp(suffix='.z',
+                prefix='{}.{}.'.format(self.basename, i_file), dir=self.directory)
+        self._file = os.fdopen(fd, 'wb')
+        self._file_size = 0
+
+        while len(self._files) > self.max_files:
+            i_old = self._files.pop(0)
+            os.remove(self._paths.pop(i_old))
+
+            n_old = 0
+            while self._blocks and self._blocks[0][1] == i_old:
+                n_old += 1
+                self._blocks.pop(0)
+                self._block_grams.pop(0)
+            first = self._block_first[n_old] if n_old < len(self._block_first) else self._spill_first
+            del self._block_first[:n_old]
+            self._forgotten = first
+
+
+    def _read_block(self, i_block):
+        n, i_file, offset, size = self._blocks[i_block]
+        with open(self._file_path(i_file), 'rb') as fp:
+            fp.seek(offset)
+            data = fp.read(size)
+        return zlib.decompress(data).decode('utf-8').split('\n')
+
+
+    def _iter_chunks(self, start=0, skip_block=None):
+        '''
+        Yields (first_line_number, lines) chunks from the start line
+        onwards, one block at a time. The disk blocks for which
+        skip_block(i_block) returns True are not read nor yielded.
+        '''
+        start = max(start, self.first_line)
+
+        if self._blocks and start < self._spill_first_or_memory():
+            i_block = max(0, bisect.bisect_right(self._block_first, start) - 1)
+            for i_block in range(i_block, len(self._blocks)):
+                if skip_block is not None and skip_block(i_block):
+                    continue
+                yield self._block_first[i_block], self._read_block(i_block)
+
+        if self._spill:
+            yield self._spill_first, self._spill
+
+        skip = max(0, start - self.memory_first_line)
+        capacity = self.memory_lines
+        ring = self._ring
+        yield self.memory_first_line + skip, [ring[(self._ring_start+i) % capacity]
+                for i in range(skip, self._ring_count)]
+
+
+    def _spill_first_or_memory(self):
+        if self._spill:
+            return self._spill_first
+        return self.memory_first_line
+
+
+    def get(self, start, stop=None):
+        '''
+        Returns the lines from start to stop (not included) that are
+        still available.
+        '''
+        if stop is None:
+            stop = self.n_lines
+        start = max(start, self.first_line)
+        stop = min(stop, self.n_lines)
+
+        lines = []
+        for first, chunk in self._iter_chunks(start):
+            if first >= stop:
+                break
+            lines.extend(chunk[max(0, start-first):stop-first])
+            start = max(start, first + len(chunk))
+            if start >= stop:
+                break
+        return lines
+
+
+    def line(self, number):
+        '''
+        Returns the line at the line number.
+        Raises IndexError if the line is not available.
+        '''
+        lines = self.get(number, number+1)
+        if not lines or number < 0:
+            raise IndexError('Line {} not available ({}-{})'.format(
+                number, self.first_line, self.n_lines-1))
+        return lines[0]
+
+
+    def search(self, pattern, start=0, max_results=None, flags=0):
+        '''
+        Search the whole available history, one block at a time.
+
+        Each block on disk has a bitmap of the character trigrams in
+        its lines. The blocks that cannot contain the literal text
+        required by the pattern (for example 'camera 3' in
+        r'camera 3: \\d+ frames') are skipped without reading them.
+        Patterns without such text, for example with alternatives
+        (a|b) on the top level, decompress and scan every block.
+
+        Arguments
+        ---------
+        pattern : string or compiled regex
+            Regular expression searched from each line
+        start : int
+            Line number where to start the search
+        max_results : int or None
+            Stop after finding this many lines
+        flags : int
+            Flags for re.compile if pattern is a string
+
+        Returns
+        -------
+        line_numbers : list of int
+            Numbers of the matching lines, ascending
+        '''
+        grams = set()
+        for literal in _required_literals(pattern, flags):
+            grams.update(_gram_hashes(literal))
+        
+        skip_block = None
+        if grams:
+            bitmaps = self._block_grams
+            def skip_block(i_block):
+                bitmap = bitmaps[i_block]
+                return not all(bitmap[bit >> 3] & (1 << (bit & 7)) for bit in grams)
+
+        if isinstance(pattern, str):
+            pattern = re.compile(pattern, flags)
+        search = pattern.search
+
+        results = []
+        for first, chunk in self._iter_chunks(start, skip_block):
+            for i_line, line in enumerate(chunk):
+                number = first + i_line
+                if number >= start and search(line):
+                    results.append(number)
+                    if max_results is not None and len(results) >= max_results:
+                        return results
+        return results
+
+
+    def close(self):
+        '''
+        Write the lines waiting to be spilled and close the spill file
+        '''
+        if self.directory is not None:
+            self._write_block()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
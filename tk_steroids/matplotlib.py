@@ -1,24 +1,49 @@
 '''
 Connecting matplotlib to plot on tkinter canvases.
-'''
 
-import numpy as np
+Numpy, matplotlib and its Tk backend are imported lazily, the first time
+a widget of this module is created (or when one of the names is accessed
+as a module attribute), so that importing this module stays cheap.
+'''
 
 import tkinter as tk
-import matplotlib.widgets
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from matplotlib.widgets import (
-        RectangleSelector,
-        PolygonSelector,
-        EllipseSelector
+import collections
+
+from .elements import notify_visibility
+from .lazyimport import lazy_imports
+
+_LAZY_NAMES = (
+        'np',
+        'matplotlib',
+        'Figure',
+        'FigureCanvasTkAgg',
+        'NavigationToolbar2Tk',
+        'RectangleSelector',
+        'PolygonSelector',
+        'EllipseSelector',
+        'proj3d',
         )
-import matplotlib.ticker
-from mpl_toolkits.mplot3d import proj3d
 
-import collections
 
-import matplotlib.patches
+def _load_matplotlib():
+    import numpy as np
+
+    import matplotlib.widgets
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+    from matplotlib.widgets import (
+            RectangleSelector,
+            PolygonSelector,
+            EllipseSelector
+            )
+    import matplotlib.ticker
+    import matplotlib.patches
+    from mpl_toolkits.mplot3d import proj3d
+    
+    names = locals()
+    return {name: names[name] for name in _LAZY_NAMES}
+
+_import_matplotlib, __getattr__ = lazy_imports(globals(), _LAZY_NAMES, _load_matplotlib)
 
 
 class ArrowSelector:
@@ -33,6 +58,8 @@ class ArrowSelector:
         auto_connect    Calls self.connect at initialization
         '''
 
+        _import_matplotlib()
+
         self.ax = ax
         self.callback = callback
 
@@ -170,6 +197,10 @@ class CanvasPlotter(tk.Frame):
     canvas : FigureCanvasTkAgg
     self.visibility_button : object
         A tkinter.Buttton to toggle show/hide
+
+    Drawing is postponed while the plotter is hidden (by hide or by
+    notify_visibility, for example on a hidden Tabs page), and done
+    once when it is shown again.
     '''
     
     def __init__(self, parent, text='', show=True, visibility_button=False,
@@ -189,6 +220,8 @@ class CanvasPlotter(tk.Frame):
             See projection keyword argument for matplotlib's Figure.add_subplot
         '''
 
+        _import_matplotlib()
+
         tk.Frame.__init__(self, parent)
         self.parent = parent
         
@@ -214,6 +247,9 @@ class CanvasPlotter(tk.Frame):
         self.canvas = FigureCanvasTkAgg(self.figure, master=self.frame)
         #self.canvas.get_tk_widget().grid(sticky='NEWS') 
         self.canvas.draw()
+        
+        self._parent_visible = True
+        self._pending_draw = False
         self.show()
         
         if toolbar:
@@ -264,7 +300,7 @@ class CanvasPlotter(tk.Frame):
             self.ax.clear()
         lines = self.ax.plot(*args, **kwargs)
         
-        self.canvas.draw()
+        self._draw()
         return lines
 
 
@@ -389,11 +425,42 @@ class CanvasPlotter(tk.Frame):
                 self._previous_roi_drawtype = roi_drawtype
 
         self._previous_shape = image.shape
-        self.canvas.draw()
+        self._draw()
         
         return self.imshow_obj
     
 
+    def _draw(self):
+        '''
+        Draw the canvas now if shown, otherwise when shown next time.
+        '''
+        if self.visible and self._parent_visible:
+            self.canvas.draw()
+            self._pending_draw = False
+        else:
+            self._pending_draw = True
+
+
+    def _notify_children(self):
+        '''
+        Propagates the effective visibility to the descendants
+        and draws if a draw was postponed.
+        '''
+        visible = self.visible and self._parent_visible
+        for child in self.frame.winfo_children():
+            notify_visibility(child, visible)
+        if visible and self._pending_draw:
+            self._draw()
+
+
+    def visibility_changed(self, visible):
+        '''
+        Called when a parent is shown or hidden (see notify_visibility)
+        '''
+        self._parent_visible = visible
+        self._notify_children()
+
+
     def hide(self):
         '''
         Hide the canvas widget.
@@ -401,6 +468,7 @@ class CanvasPlotter(tk.Frame):
         self.canvas.get_tk_widget().grid_forget()
         self.visible = False
         self.visibility_button.config(text='Show')
+        self._notify_children()
 
 
     def show(self):
@@ -411,13 +479,14 @@ class CanvasPlotter(tk.Frame):
         self.canvas.get_tk_widget().grid(row=1, column=0, sticky='NSWE')
         self.visible = True
         self.visibility_button.config(text='Hide')
+        self._notify_children()
     
 
     def update(self):
         '''
         Call if any changes has made to the axes.
         '''
-        self.canvas.draw()
+        self._draw()
 
     def update_size(self):
         '''
@@ -1,5 +1,63 @@
+'''
+Inspecting live functions for building settings widgets.
 
+The signatures and the inspection results are cached per function
+(weakly, so the functions can still be garbage collected). A cached
+result is dropped when the function's __signature__ attribute changes,
+for example by extend_keywords.
+'''
+
+import enum
+import typing
 import inspect
+import pathlib
+import weakref
+import collections
+
+
+# function -> {key: cached value}
+_CACHE = weakref.WeakKeyDictionary()
+
+
+def _cache_entry(function_or_method):
+    '''
+    Returns the cache dict of the callable, or None if the callable
+    cannot be cached (not hashable or weak referable).
+
+    Bound methods are cached by their underlying function (__func__),
+    so that the methods of all the instances share the entry.
+    '''
+    target = getattr(function_or_method, '__func__', function_or_method)
+    signature_attr = getattr(target, '__signature__', None)
+    try:
+        entry = _CACHE.get(target)
+        if entry is None or entry['__signature__'] is not signature_attr:
+            entry = {'__signature__': signature_attr}
+            _CACHE[target] = entry
+    except TypeError:
+        return None
+    return entry
+
+
+def get_signature(function_or_method):
+    '''Cached inspect.signature
+    '''
+    entry = _cache_entry(function_or_method)
+    if entry is None:
+        return inspect.signature(function_or_method)
+    
+    key = ('signature', hasattr(function_or_method, '__func__'))
+    signature = entry.get(key)
+    if signature is None:
+        signature = inspect.signature(function_or_method)
+        entry[key] = signature
+    return signature
+
+
+def clear_inspect_cache():
+    '''Forget all the cached signatures and inspection results
+    '''
+    _CACHE.clear()
 
 
 def inspect_types(types, function_or_method, exclude_keywords=[],
@@ -28,10 +86,17 @@ def inspect_types(types, function_or_method, exclude_keywords=[],
         See TickboxFrame for documentation.
 
     '''
+    entry = _cache_entry(function_or_method)
+    key = ('types', types, tuple(exclude_keywords), exclude_types,
+            hasattr(function_or_method, '__func__'))
+    if entry is not None and key in entry:
+        options, defaults = entry[key]
+        return list(options), list(defaults)
+
     options = []
     defaults = []
 
-    for name, param in inspect.signature(function_or_method).parameters.items():
+    for name, param in get_signature(function_or_method).parameters.items():
         if param.kind.name in ['POSITIONAL_OR_KEYWORD', 'KEYWORD_ONLY']:
             if isinstance(param.default, types) and name not in exclude_keywords:
                 
@@ -41,10 +106,157 @@ def inspect_types(types, function_or_method, exclude_keywords=[],
                 options.append(name)
                 defaults.append(param.default)
 
+    if entry is not None:
+        entry[key] = (tuple(options), tuple(defaults))
+
     return options, defaults
 
 
 
+def inspect_many(types, functions, exclude_keywords=[], exclude_types=()):
+    '''Like inspect_types but for many functions at once.
+
+    Arguments
+    ---------
+    types : class or tuple
+        See inspect_types
+    functions : iterable of callables
+        The functions to inspect
+    exclude_keywords, exclude_types
+        See inspect_types, applied to all the functions
+
+    Returns
+    -------
+    results : list
+        (options, defaults) of each function, in the same order
+    '''
+    return [inspect_types(types, function, exclude_keywords, exclude_types)
+            for function in functions]
+
+
+
+OptionSpec = collections.namedtuple('OptionSpec', ['name', 'kind', 'type', 'default', 'choices'])
+OptionSpec.__doc__ = '''One keyword argument in a settings schema (see inspect_schema)
+
+name : string
+    Keyword argument name
+kind : string
+    One of SCHEMA_KINDS
+type : class
+    The value type (for example int, pathlib.Path or an Enum class)
+default
+    The default value
+choices : tuple or None
+    The allowed values for the 'choice' kind
+'''
+
+SCHEMA_KINDS = ['bool', 'int', 'float', 'str', 'path', 'choice']
+
+_KIND_BY_TYPE = [
+        (bool, 'bool'),
+        (int, 'int'),
+        (float, 'float'),
+        (str, 'str'),
+        (pathlib.PurePath, 'path'),
+        ]
+
+
+def _unwrap_optional(annotation):
+    '''Optional[X] (Union[X, None]) -> X
+    '''
+    if typing.get_origin(annotation) is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _option_spec(name, annotation, default):
+    '''
+    Returns the OptionSpec of one parameter, or None if the
+    type cannot be worked out
+    '''
+    if annotation is inspect.Parameter.empty or isinstance(annotation, str):
+        if default is None or default is inspect.Parameter.empty:
+            return None
+        annotation = type(default)
+    annotation = _unwrap_optional(annotation)
+    
+    if default is inspect.Parameter.empty:
+        default = None
+
+    if typing.get_origin(annotation) is typing.Literal:
+        choices = typing.get_args(annotation)
+        if default not in choices:
+            default = choices[0]
+        return OptionSpec(name, 'choice', type(choices[0]), default, choices)
+    
+    if not isinstance(annotation, type):
+        return None
+
+    if issubclass(annotation, enum.Enum):
+        choices = tuple(annotation)
+        if default not in choices:
+            default = choices[0]
+        return OptionSpec(name, 'choice', annotation, default, choices)
+
+    for cls, kind in _KIND_BY_TYPE:
+        if issubclass(annotation, cls):
+            return OptionSpec(name, kind, annotation, default, None)
+    return None
+
+
+def inspect_schema(function_or_method, exclude_keywords=[]):
+    '''Inspect the keyword arguments and their types.
+
+    The type of a keyword argument comes from its annotation, or if it
+    has no annotation, from the type of its default value. Supported are
+    bool, int, float, str, pathlib.Path, typing.Literal and enum.Enum
+    (the last two become the 'choice' kind). Optional[X] is treated as X.
+    Other keyword arguments are left out.
+
+    The schema is cached per function like inspect_types, and can be
+    passed to SettingsManager.add_schema many times.
+
+    Arguments
+    ---------
+    function_or_method : callable
+        An callable on which we apply inspect.signature
+    exclude_keywords : list of strings
+        Keyword arguments to be excluded by their name.
+
+    Returns
+    -------
+    schema : tuple of OptionSpecs
+    '''
+    entry = _cache_entry(function_or_method)
+    key = ('schema', tuple(exclude_keywords), hasattr(function_or_method, '__func__'))
+    if entry is not None and key in entry:
+        return entry[key]
+
+    try:
+        hints = typing.get_type_hints(function_or_method)
+    except Exception:
+        # Unresolvable (string) annotations
+        hints = {}
+
+    schema = []
+    for name, param in get_signature(function_or_method).parameters.items():
+        if param.kind.name not in ['POSITIONAL_OR_KEYWORD', 'KEYWORD_ONLY']:
+            continue
+        if name in exclude_keywords or param.default is inspect.Parameter.empty:
+            continue
+        spec = _option_spec(name, hints.get(name, param.annotation), param.default)
+        if spec is not None:
+            schema.append(spec)
+
+    schema = tuple(schema)
+    if entry is not None:
+        entry[key] = schema
+    return schema
+
+
+
 def inspect_booleans(function_or_method, exclude_keywords=[]):
     '''
     Inspect and get boolean default keyword arguments from a live function
@@ -96,7 +308,7 @@ def extend_keywords(keyword_source):
     '''
     def extended(target_function):
         
-        target_signature = inspect.signature(target_function)
+        target_signature = get_signature(target_function)
         target_param_names = [name for name in target_signature.parameters]
 
         params_to_add = {}
@@ -111,7 +323,7 @@ def extend_keywords(keyword_source):
         
         # Parameters of the extension source function; Only POSITIONAL_OR_KEYWORD
         # arguments are taken and converted into KEYWORD_ONLY arguments
-        for name, param in inspect.signature(keyword_source).parameters.items():
+        for name, param in get_signature(keyword_source).parameters.items():
             if param.kind.name in ['POSITIONAL_OR_KEYWORD'] and name not in target_param_names:
                 params_to_add[name] = param.replace(kind=inspect.Parameter.KEYWORD_ONLY)
 
@@ -0,0 +1,152 @@
+'''
+Running slow functions outside the tkinter thread.
+
+The results are delivered back on the tkinter thread by polling the
+futures with after, only while something is running.
+'''
+
+import concurrent.futures
+
+
+EXECUTORS = ['thread', 'process']
+
+
+class ComputeRunner:
+    '''Runs a function in a thread or process pool and calls back with
+    the result on the tkinter thread.
+
+    Each submit supersedes the earlier runs: runs that have not started
+    are cancelled and the results of the runs that were already running
+    are discarded. Only the result of the latest submit is delivered.
+
+    Attributes
+    ----------
+    widget : object
+        Tkinter widget whose after method is used
+    function : callable
+        The function to run. Has to be picklable for the process pool.
+    callback : callable
+        Called with the result of the latest run
+    error_callback : callable or None
+        Called with the exception if the latest run fails. If None, the
+        exception is reported by the report_callback_exception of the
+        widget's root (tk.Tk).
+    arguments : callable or None
+        Returns the (args, kwargs) for run
+    generation : int
+        Number of the latest submit
+    '''
+
+    def __init__(self, widget, function, callback, error_callback=None,
+            arguments=None, executor='thread', max_workers=1, poll_interval=20):
+        '''
+        widget : object
+            Tkinter widget for scheduling the polling
+        function, callback, error_callback, arguments
+            See the class attributes
+        executor : string or object
+            'thread', 'process' or a concurrent.futures.Executor. A given
+            executor is not shut down by the runner.
+        max_workers : int
+            Number of workers of the created pool
+        poll_interval : int
+            Milliseconds between checking the running futures
+        '''
+        if isinstance(executor, str):
+            if executor not in EXECUTORS:
+                raise ValueError('Unknown executor {}. Use {} or an Executor'.format(
+                    executor, EXECUTORS))
+            if executor == 'thread':
+                executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+            else:
+                executor = concurrent.futures.ProcessPoolExecutor(max_workers)
+            self._owns_executor = True
+        else:
+            self._owns_executor = False
+
+        self.widget = widget
+        self.function = function
+        self.callback = callback
+        self.error_callback = error_callback
+        self.arguments = arguments
+        self.executor = executor
+        self.poll_interval = poll_interval
+
+        self.generation = 0
+        self._futures = {}      # future -> generation
+        self._after_id = None
+
+
+    @property
+    def running(self):
+        '''
+        True if the latest run has not been delivered yet
+        '''
+        return self.generation in self._futures.values()
+
+
+    def submit(self, *args, **kwargs):
+        '''
+        Run the function with the arguments, superseding earlier runs
+        '''
+        self.cancel()
+        future = self.executor.submit(self.function, *args, **kwargs)
+        self._futures[future] = self.generation
+
+        if self._after_id is None:
+            self._after_id = self.widget.after(self.poll_interval, self._poll)
+        return future
+
+
+    def run(self, *ignored):
+        '''
+        Submit with the arguments given by the arguments callable.
+        Any arguments to run are ignored, so that run can be used
+        directly as a callback.
+        '''
+        args, kwargs = self.arguments()
+        return self.submit(*args, **kwargs)
+
+
+    def cancel(self):
+        '''
+        Cancel the runs that have not started and discard the results
+        of the runs that have
+        '''
+        self.generation += 1
+        for future in self._futures:
+            future.cancel()
+
+
+    def _poll(self):
+        self._after_id = None
+
+        for future in [future for future in self._futures if future.done()]:
+            generation = self._futures.pop(future)
+            if generation != self.generation or future.cancelled():
+                continue
+
+            exception = future.exception()
+            if exception is None:
+                self.callback(future.result())
+            elif self.error_callback is not None:
+                self.error_callback(exception)
+            else:
+                self.widget._root().report_callback_exception(
+                        type(exception), exception, exception.__traceback__)
+
+        if self._futures:
+            self._after_id = self.widget.after(self.poll_interval, self._poll)
+
+
+    def shutdown(self):
+        '''
+        Cancel everything, stop polling and shut down the created pool
+        '''
+        self.cancel()
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self._futures = {}
+        if self._owns_executor:
+            self.executor.shutdown(wait=False)
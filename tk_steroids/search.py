@@ -0,0 +1,235 @@
+'''
+Fast, incremental filtering of long lists of strings.
+
+Used by the widgets that have a search box (Listbox, TickSelect...)
+but does not depend on tkinter itself.
+'''
+
+import re
+
+from .logstore import _required_literals
+
+
+SEARCH_MODES = ['prefix', 'substring', 'fuzzy', 'regex']
+
+# Characters that separate words in the prefix mode
+_SEPARATORS = re.compile(r'[^\w\n]|_')
+
+# The same for ASCII text, for the much faster str.translate
+_ASCII_SEPARATORS = {code: ' ' for code in range(128)
+        if _SEPARATORS.match(chr(code))}
+
+
+class SearchIndex:
+    '''Precomputed index for filtering a list of strings.
+
+    The lowercased items are precomputed at the init, the words
+    (for the prefix mode) at the init if the mode is given, otherwise
+    at the first prefix search. When a query extends the previous one
+    (the user types more), only the previous matches are searched again.
+
+    With 100 000 items, a prefix or substring search takes a few
+    milliseconds. The fuzzy and regex modes test every candidate with
+    a regular expression in Python and take tens of milliseconds
+    while most items still match (short fuzzy queries). A regex is first
+    narrowed down by the literal text it requires (for example 'chan_1'
+    in 'chan_1[0-9]'), but a regex can not be narrowed from the previous
+    result, since a longer pattern can match more ('a' and 'a|b').
+
+    Search modes
+    ------------
+    prefix
+        The item or any of its words starts with the query
+    substring
+        The query is found anywhere in the item
+    fuzzy
+        The characters of the query are found in the item in the
+        same order, but not necessarily next to each other
+    regex
+        The query is a regular expression (re.search)
+
+    Attributes
+    ----------
+    items : list of strings
+        The items being searched
+    case_sensitive : bool
+        If False (default), letter case is ignored
+    '''
+
+    def __init__(self, items, case_sensitive=False, mode=None):
+        '''
+        items : list of strings
+            Items to search from
+        case_sensitive : bool
+            If False, ignore letter case
+        mode : string or None
+            The search mode mostly used. With 'prefix', the words are
+            built right away so that the first keystroke is fast.
+        '''
+        if mode is not None and mode not in SEARCH_MODES:
+            raise ValueError('Unknown search mode {}. Use {}'.format(
+                mode, SEARCH_MODES))
+
+        self.items = items
+        self.case_sensitive = case_sensitive
+
+        if case_sensitive:
+            self._keys = list(items)
+        else:
+            self._keys = [item.lower() for item in items]
+
+        self._words = None
+        self._ascii = None
+        if mode == 'prefix':
+            self._build_words()
+
+        self._last_mode = None
+        self._last_query = None
+        self._last_result = None
+
+
+    def _build_words(self):
+        '''Keys with word separators replaced by spaces, each starting
+        with a space, so that a word prefix is a substring " prefix".
+        '''
+        text = '\n'.join(key.replace('\n', ' ') for key in self._keys)
+        if text.isascii():
+            text = text.translate(_ASCII_SEPARATORS)
+        else:
+            text = _SEPARATORS.sub(' ', text)
+        self._words = (' ' + text.replace('\n', '\n ')).split('\n')
+
+
+    def _normalize(self, query):
+        if self.case_sensitive:
+            return query
+        return query.lower()
+
+
+    def search(self, query, mode='substring'):
+        '''Returns the indices of the matching items, in the items order.
+
+        An empty query matches all the items. In the regex mode,
+        an invalid (for example half typed) pattern returns the
+        previous result.
+
+        Arguments
+        ---------
+        query : string
+            The search string
+        mode : string
+            One of SEARCH_MODES (see the class documentation)
+        '''
+        if mode not in SEARCH_MODES:
+            raise ValueError('Unknown search mode {}. Use {}'.format(
+                mode, SEARCH_MODES))
+
+        if not query:
+            result = list(range(len(self._keys)))
+        elif mode == 'regex':
+            result = self._search_regex(query)
+        else:
+            key = self._normalize(query)
+            if (mode == self._last_mode and self._last_query
+                    and key.startswith(self._last_query)):
+                candidates = self._last_result
+            else:
+                candidates = None
+
+            if mode == 'prefix':
+                result = self._search_prefix(key, candidates)
+            elif mode == 'substring':
+                result = self._search_substring(key, candidates)
+            else:
+                result = self._search_fuzzy(key, candidates)
+            query = key
+
+        self._last_mode = mode
+        self._last_query = query
+        self._last_result = result
+        return result
+
+
+    def filter(self, query, mode='substring'):
+        '''Like search but returns the matching items.
+        '''
+        return [self.items[i_item] for i_item in self.search(query, mode)]
+
+
+    def _search_prefix(self, key, candidates=None):
+        if self._words is None:
+            self._build_words()
+        
+        words = self._words
+        key = ' ' + _SEPARATORS.sub(' ', key)
+        if candidates is None:
+            return [i for i, item_words in enumerate(words) if key in item_words]
+        return [i for i in candidates if key in words[i]]
+
+
+    def _search_substring(self, key, candidates=None):
+        keys = self._keys
+        if candidates is None:
+            return [i for i, item_key in enumerate(keys) if key in item_key]
+        return [i for i in candidates if key in keys[i]]
+
+
+    def _search_fuzzy(self, key, candidates=None):
+        if len(key) == 1:
+            return self._search_substring(key, candidates)
+
+        # a[^b]*b[^c]*c... matches without backtracking
+        pattern = re.escape(key[0]) + ''.join(
+                '[^{0}]*{0}'.format(re.escape(char)) for char in key[1:])
+        search = re.compile(pattern).search
+
+        keys = self._keys
+        if candidates is None:
+            return [i for i, item_key in enumerate(keys) if search(item_key)]
+        return [i for i in candidates if search(keys[i])]
+
+
+    def _search_regex(self, query):
+        flags = 0 if self.case_sensitive else re.IGNORECASE
+        try:
+            pattern = re.compile(query, flags)
+        except re.error:
+            if self._last_result is None:
+                return list(range(len(self.items)))
+            return self._last_result
+
+        search = pattern.search
+        items = self.items
+        
+        candidates = self._regex_candidates(pattern)
+        if candidates is None:
+            return [i for i, item in enumerate(items) if search(item)]
+        return [i for i in candidates if search(items[i])]
+
+
+    def _regex_candidates(self, pattern):
+        '''The items containing the longest literal text required by
+        the compiled pattern, or None if it cannot be used
+        '''
+        if pattern.flags & re.IGNORECASE:
+            if self.case_sensitive:
+                return None
+            # Non-ASCII characters can match ASCII ones ignoring the
+            # case (for example the Kelvin sign and k) but lower
+            # differently
+            if self._ascii is None:
+                self._ascii = all(key.isascii() for key in self._keys)
+            if not self._ascii:
+                return None
+
+        literals = _required_literals(pattern)
+        if not literals:
+            return None
+        literal = max(literals, key=len)
+        if len(literal) < 2:
+            # Would not narrow down much
+            return None
+        if not self.case_sensitive:
+            literal = literal.lower()
+        return self._search_substring(literal)
+
@@ -2,18 +2,261 @@
 Widgets to let the user manage a program's settings.
 '''
 
+import os
+import json
+import math
+import enum
+import pathlib
+import tempfile
 import tkinter as tk
 
 
 from .routines import (
         inspect_booleans,
-        inspect_types
+        inspect_types,
+        inspect_schema,
         )
 from .elements import (
+        Debouncer,
         TickboxFrame,
         SliderFrame,
+        EntryFrame,
         Tabs,
         )
+from .runner import ComputeRunner
+from .search import SearchIndex, SEARCH_MODES
+
+
+def _merge_diffs(pending, diff):
+    '''
+    Coalesce {group: {option: value}} diffs, the newer values winning
+    '''
+    if pending is None:
+        pending = {}
+    for group, changes in diff.items():
+        pending.setdefault(group, {}).update(changes)
+    return pending
+
+
+def _slider_value(value, span, resolution):
+    '''
+    The value a tkinter Scale gives after setting it to value: rounded
+    to the resolution, limited to the range, and an int if the
+    resolution has no decimals
+    '''
+    if resolution > 0:
+        value = math.floor(value / resolution + 0.5) * resolution
+    value = min(max(value, min(span)), max(span))
+    
+    digits = max(0, -math.floor(math.log10(resolution))) if resolution > 0 else 0
+    text = '{:.{}f}'.format(value, digits)
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _entry_value(value, value_type, option_choices):
+    '''
+    The value an EntryFrame gives after setting it to value
+    '''
+    if option_choices:
+        option_choices = list(option_choices)
+        texts = [EntryFrame._choice_text(choice) for choice in option_choices]
+        if value is not None and EntryFrame._choice_text(value) in texts:
+            return option_choices[texts.index(EntryFrame._choice_text(value))]
+        return option_choices[0]
+    
+    text = '' if value is None else str(value)
+    if text == '' and value_type is not str:
+        return None
+    try:
+        return value_type(text)
+    except (ValueError, TypeError):
+        return value
+
+
+def _initial_values(element_class, options, kwargs):
+    '''
+    The values an element would have after its init, without creating
+    it. Used for the groups whose widgets are not built yet.
+    '''
+    n_options = len(options)
+    defaults = kwargs.get('defaults') or [None] * n_options
+
+    if element_class is TickboxFrame:
+        if kwargs.get('single_select'):
+            selected = defaults.index(True) if True in defaults else 0
+            return {option: i_option == selected for i_option, option in enumerate(options)}
+        return {option: bool(default) for option, default in zip(options, defaults)}
+
+    if element_class is SliderFrame:
+        ranges = kwargs.get('ranges') or [None] * n_options
+        resolutions = kwargs.get('resolutions') or [None] * n_options
+        default_range = kwargs.get('default_range', (0, 1))
+        default_resolution = kwargs.get('default_resolution', 0.01)
+        values = {}
+        for option, default, span, resolution in zip(options, defaults, ranges, resolutions):
+            span = span or default_range
+            values[option] = _slider_value(span[0] if default is None else default,
+                    span, resolution or default_resolution)
+        return values
+
+    types = kwargs.get('types') or [None] * n_options
+    choices = kwargs.get('choices') or [None] * n_options
+    return {option: _entry_value(default, value_type or str, option_choices)
+            for option, default, value_type, option_choices
+            in zip(options, defaults, types, choices)}
+
+
+def _option_widget(element, option):
+    '''
+    The widget of one option in a TickboxFrame, SliderFrame or EntryFrame
+    '''
+    i_option = list(element.states).index(option)
+    for attribute in ['checkbuttons', 'sliders', 'widgets']:
+        widgets = getattr(element, attribute, None)
+        if widgets is not None:
+            return widgets[i_option]
+    return element
+
+
+
+class _GroupFrame(tk.Frame):
+    '''
+    Collapsible group: a header button and a body frame that
+    is shown when expanded
+    '''
+
+    def __init__(self, parent, text, on_expand):
+        tk.Frame.__init__(self, parent)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.text = text
+        self.expanded = False
+        self._on_expand = on_expand
+
+        self.button = tk.Button(self, text='\u25b8 '+text, anchor='w',
+                relief=tk.FLAT, command=self.toggle)
+        self.button.grid(row=0, column=0, sticky='WE')
+
+        self.body = tk.Frame(self)
+        self.body.grid_columnconfigure(0, weight=1)
+
+
+    def expand(self):
+        if self.expanded:
+            return
+        self._on_expand()
+        self.body.grid(row=1, column=0, sticky='NSWE', padx=(10,0))
+        self.button.config(text='\u25be '+self.text)
+        self.expanded = True
+
+
+    def collapse(self):
+        if not self.expanded:
+            return
+        self.body.grid_remove()
+        self.button.config(text='\u25b8 '+self.text)
+        self.expanded = False
+
+
+    def toggle(self):
+        if self.expanded:
+            self.collapse()
+        else:
+            self.expand()
+
+
+
+def _json_default(value):
+    '''
+    JSON encoding of the setting values that json does not know.
+    They are restored from the text by the widgets (see EntryFrame).
+    '''
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, pathlib.PurePath):
+        return str(value)
+    raise TypeError('Cannot save {!r} of type {}'.format(value, type(value).__name__))
+
+
+class SettingsStore:
+    '''Saves and loads settings ({group: {option: value}}) as JSON.
+
+    The file has a version number. When an older file is loaded, the
+    migrations are applied one after another to bring the settings to
+    the current version. Saving writes a temporary file first and then
+    replaces the old file, so a crash never leaves a half written file.
+
+    Typical use, where the stored values are given to the widgets when
+    they are created:
+
+        store = SettingsStore('settings.json')
+        manager = SettingsManager(root, preset=store.load())
+        ...
+        store.save(manager.get_current())
+
+    Attributes
+    ----------
+    filename : string
+        The JSON file
+    version : int
+        The current settings version
+    migrations : dict
+        {version: function}, where the function takes the settings
+        of that version and returns the settings of the next version
+    '''
+
+    def __init__(self, filename, version=1, migrations=None):
+        self.filename = filename
+        self.version = version
+        self.migrations = migrations or {}
+
+
+    def load(self, default=None):
+        '''
+        Returns the stored settings, migrated to the current version,
+        or default (or an empty dict) if the file does not exist.
+        '''
+        try:
+            with open(self.filename, 'r') as fp:
+                data = json.load(fp)
+        except FileNotFoundError:
+            return {} if default is None else default
+
+        version = data.get('version', 1)
+        settings = data.get('settings', {})
+        
+        if version > self.version:
+            raise ValueError('{} has settings version {}, newer than {}'.format(
+                self.filename, version, self.version))
+        
+        while version < self.version:
+            if version not in self.migrations:
+                raise ValueError('No migration from settings version {}'.format(version))
+            settings = self.migrations[version](settings)
+            version += 1
+        return settings
+
+
+    def save(self, settings):
+        '''
+        Atomically write the settings to the file
+        '''
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as fp:
+                json.dump({'version': self.version, 'settings': settings}, fp,
+                        indent=1, default=_json_default)
+                fp.flush()
+                os.fsync(fp.fileno())
+            os.replace(temp_path, self.filename)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
 
 
 class SettingsManager(tk.Frame):
@@ -23,34 +266,332 @@ class SettingsManager(tk.Frame):
     values that can be controlled by
         - tickboxes (add_tickboxes)
         - sliders (add_sliders)
+        - entries and dropdown menus (add_entries)
+    or all of these from a schema of typed keyword arguments (add_schema).
+
+    The current values are mirrored in Python, kept up to date by
+    variable traces on the elements, so get_current does not need to
+    read the widgets. Changes can be listened with add_change_listener.
+
+    Groups made with add_group are collapsible and their widgets are
+    built only when the group is expanded for the first time (or shown
+    with show_option). Until then, the add_* methods only record the
+    options and their values are held in the mirror, so get_current,
+    set_current and the runners work the same for all the groups.
 
     Attributes
     ----------
     elements : dict of lists
         The keys are group names and the items are lists that contain
-        TickboxFrame and SliderFrame objects (tk_steroids.elements).
+        TickboxFrame, SliderFrame and EntryFrame objects
+        (tk_steroids.elements).
+    version : int
+        Incremented on every change of the settings; comparing it is
+        the cheapest way to poll for changes.
+    inspected : dict of lists
+        The keys are group names and the items are the functions
+        inspected with the add_*_inspect methods to the group
+    runners : list
+        ComputeRunners made by add_runner
+    preset : dict
+        {group: {option: value}} used instead of the defaults when the
+        widgets of the group are created
+    groups : dict
+        Collapsible group frames made by add_group
     '''
 
-    def __init__(self, parent):
+    def __init__(self, parent, preset=None):
         '''
         Options
         -------
         parent : object
             Tkinter parent widget
+        preset : dict or None
+            {group: {option: value}}, for example from SettingsStore.load.
+            The values are given to the widgets when they are created,
+            so restoring them costs nothing extra.
         '''
 
         tk.Frame.__init__(self, parent)
         self.grid_columnconfigure(0, weight=1)
 
         self.elements = {}
+        self.version = 0
+
+        self.inspected = {}
+        self.runners = []
+        self.preset = {group: dict(values) for group, values in (preset or {}).items()}
+
+        self.groups = {}
 
         self._container = self
+        self._containers = {}   # group -> parent of the group's widgets
+        self._pending = {}      # group -> elements to create when built
+        self._names = []        # (group, option, fancyname) for search
+        self._search_index = None
+        self._values = {}
+        self._change_listeners = []
+        self._debouncers = []
+        self._batch = None
 
 
     def _add_setting(self, group, element):
-        if group not in self.elements:
-            self.elements[group] = []
-        self.elements[group].append(element)
+        self.elements.setdefault(group, []).append(element)
+        values = self._values.setdefault(group, {})
+        
+        # The values held before the group was built are replaced by the
+        # element's, and any differences notified as changes
+        states = element.states
+        values.update({option: value for option, value in states.items()
+            if option not in values})
+        self._on_change(group, states)
+        element.add_listener(lambda changes, group=group: self._on_change(group, changes))
+
+
+    def _preset_defaults(self, group, options, defaults, missing=None):
+        '''
+        The defaults for new widgets, with the preset values replacing
+        the given defaults
+        '''
+        preset = self.preset.get(group)
+        if not preset:
+            return defaults
+        if defaults is None:
+            defaults = [missing] * len(options)
+        return [preset.get(option, default) for option, default in zip(options, defaults)]
+
+
+    def _new_group(self, group):
+        '''
+        Called when an add_* method sees the group for the first time.
+        Subclasses can defer the group here (see _defer_group).
+        '''
+        pass
+
+
+    def _defer_group(self, group, container):
+        '''
+        Create the widgets of the group in the container only
+        when build_group is called
+        '''
+        self._pending[group] = []
+        self._containers[group] = container
+        self._values.setdefault(group, {})
+
+
+    def _add_element(self, group, element_class, options, kwargs):
+        '''
+        Create an element for the group, or if the group is not built
+        yet, record it and put its initial values to the mirror
+        '''
+        if group not in self.elements and group not in self._values:
+            self._new_group(group)
+
+        fancynames = kwargs.get('fancynames') or [None] * len(options)
+        self._names.extend((group, option, fancyname or option)
+                for option, fancyname in zip(options, fancynames))
+        self._search_index = None
+
+        if group in self._pending:
+            self._pending[group].append((element_class, options, kwargs))
+            self._values[group].update(self._pending_values(group, element_class,
+                options, kwargs))
+            return None
+        return self._create_element(group, element_class, options, kwargs)
+
+
+    def _pending_values(self, group, element_class, options, kwargs):
+        '''
+        Values of an element not created yet, as the element would
+        have them with the current preset
+        '''
+        return _initial_values(element_class, options, dict(kwargs,
+            defaults=self._preset_defaults(group, options, kwargs.get('defaults'))))
+
+
+    def _create_element(self, group, element_class, options, kwargs):
+        kwargs = dict(kwargs)
+        kwargs['defaults'] = self._preset_defaults(group, options, kwargs.get('defaults'),
+                missing=False if element_class is TickboxFrame else None)
+        
+        element = element_class(self._containers.get(group, self._container),
+                options, **kwargs)
+        element.grid(sticky='NSWE')
+
+        self._add_setting(group, element)
+        return element
+
+
+    def add_group(self, group, fancyname=None, expanded=False):
+        '''Add a collapsible group
+
+        The widgets added to the group later are created only when the
+        group is expanded for the first time, so adding many groups
+        stays fast.
+
+        Options
+        -------
+        group : string
+            Group name
+        fancyname : string or None
+            Name shown in the group's header
+        expanded : bool
+            If True, expand (and build) the group right away
+
+        Returns
+        -------
+        frame : object
+            The group's frame (in the groups attribute)
+        '''
+        if group in self.elements or group in self._values:
+            raise ValueError('Group {} already has settings'.format(group))
+
+        frame = _GroupFrame(self._container, fancyname or group,
+                lambda: self.build_group(group))
+        frame.grid(sticky='NSWE')
+        self.groups[group] = frame
+
+        self._defer_group(group, frame.body)
+        if expanded:
+            frame.expand()
+        return frame
+
+
+    def build_group(self, group):
+        '''
+        Create the widgets of a group that has not been built yet
+        '''
+        pending = self._pending.pop(group, None)
+        if pending is None:
+            return
+        for element_class, options, kwargs in pending:
+            self._create_element(group, element_class, options, kwargs)
+
+
+    def is_built(self, group):
+        '''
+        True if the widgets of the group have been created
+        '''
+        return group not in self._pending
+
+
+    def search(self, query, mode='substring'):
+        '''Search the options by their names and fancy names
+
+        Also the options of the groups not built yet are searched.
+
+        Options
+        -------
+        query : string
+        mode : string
+            One of tk_steroids.search.SEARCH_MODES
+
+        Returns
+        -------
+        matches : list of tuples
+            (group, option) pairs, in the order the options were added
+        '''
+        if self._search_index is None:
+            self._search_index = SearchIndex(
+                    ['{} {}'.format(fancyname, option) if fancyname != option else option
+                        for group, option, fancyname in self._names])
+        return [self._names[i_name][:2] for i_name in self._search_index.search(query, mode)]
+
+
+    def show_option(self, group, option=None):
+        '''Build and expand the group and focus the option's widget
+
+        Returns
+        -------
+        widget : object or None
+            The option's widget
+        '''
+        self.build_group(group)
+        if group in self.groups:
+            self.groups[group].expand()
+        
+        widget = None
+        if option is not None:
+            for element in self.elements.get(group, []):
+                if option in element.states:
+                    widget = _option_widget(element, option)
+                    widget.focus_set()
+                    break
+        return widget
+
+
+    def _add_inspected(self, group, function_or_method):
+        functions = self.inspected.setdefault(group, [])
+        if function_or_method not in functions:
+            functions.append(function_or_method)
+
+
+    def _on_change(self, group, changes):
+        '''
+        An element's values changed; update the mirror and notify
+        '''
+        values = self._values[group]
+        diff = {option: value for option, value in changes.items()
+                if option not in values or values[option] != value}
+        if not diff:
+            return
+        values.update(diff)
+        self.version += 1
+
+        if self._batch is not None:
+            _merge_diffs(self._batch, {group: diff})
+            return
+        
+        for listener in list(self._change_listeners):
+            listener({group: diff})
+
+
+    def add_change_listener(self, callback):
+        '''Call callback(diff) when settings change
+
+        Options
+        -------
+        callback : callable
+            Called with {group: {option: new value}} containing only
+            the changed options
+        '''
+        self._change_listeners.append(callback)
+
+
+    def remove_change_listener(self, callback):
+        self._change_listeners.remove(callback)
+        if callback in self._debouncers:
+            callback.cancel()
+            self._debouncers.remove(callback)
+
+
+    def add_change_callback(self, callback, debounce=150, throttle=None):
+        '''Call callback(diff) once after the settings stop changing
+
+        The changes of all the controls made during the wait are
+        coalesced into one diff, so that an expensive computation runs
+        once after the user stops dragging or typing.
+
+        Options
+        -------
+        callback : callable
+            Called with {group: {option: new value}} of the changed options
+        debounce : int
+            Milliseconds without changes before calling
+        throttle : int or None
+            If given, call at least this often (ms) while the
+            changes continue
+
+        Returns
+        -------
+        debouncer : object
+            The listener (a tk_steroids.elements.Debouncer); can be
+            flushed, cancelled or passed to remove_change_listener
+        '''
+        debouncer = Debouncer(self, callback, debounce, throttle, merge=_merge_diffs)
+        self.add_change_listener(debouncer)
+        self._debouncers.append(debouncer)
+        return debouncer
 
 
     def add_tickboxes(self, group, options, **kwargs):
@@ -66,14 +607,11 @@ class SettingsManager(tk.Frame):
        
         Returns
         -------
-        tickboxes : object
+        tickboxes : object or None
+            The tk_steroids' TickboxFrame object, or None if the group
+            is not built yet (see add_group)
         '''
-        tickboxes = TickboxFrame(self._container, options, **kwargs)
-        tickboxes.grid(sticky='NSWE')
-
-        self._add_setting(group, tickboxes)
-
-        return tickboxes
+        return self._add_element(group, TickboxFrame, options, kwargs)
 
 
     def add_tickboxes_inspect(self, group, function_or_method,
@@ -98,6 +636,7 @@ class SettingsManager(tk.Frame):
             The tk_steroids' TickboxFrame object
         '''
         options, defaults = inspect_booleans(function_or_method, exclude_keywords)
+        self._add_inspected(group, function_or_method)
         return self.add_tickboxes(group, options, defaults=defaults, **kwargs)
 
     
@@ -115,15 +654,11 @@ class SettingsManager(tk.Frame):
 
         Returns
         -------
-        sliders : object
-            The tk_steroids' SliderFrame object
+        sliders : object or None
+            The tk_steroids' SliderFrame object, or None if the group
+            is not built yet
         '''
-        sliders = SliderFrame(self._container, options, **kwargs)
-        sliders.grid(sticky='NSWE')
-
-        self._add_setting(group, sliders)
-
-        return sliders
+        return self._add_element(group, SliderFrame, options, kwargs)
 
     
     def add_sliders_inspect(self, group, function_or_method,
@@ -143,59 +678,398 @@ class SettingsManager(tk.Frame):
         '''
         options, defaults = inspect_types((int, float), function_or_method,
                 exclude_keywords, exclude_types=bool)
+        self._add_inspected(group, function_or_method)
         return self.add_sliders(group, options, defaults=defaults, **kwargs)
 
 
+    def add_entries(self, group, options, **kwargs):
+        '''Add typed text entries and dropdown menus
+
+        Options
+        -------
+        group : string
+            Group name
+        options : list
+            Names of the variables that the entries control
+        **kwargs
+            Keyword arguments to EntryFrame
+
+        Returns
+        -------
+        entries : object or None
+            The tk_steroids' EntryFrame object, or None if the group
+            is not built yet
+        '''
+        return self._add_element(group, EntryFrame, options, kwargs)
+
+
+    def add_schema(self, group, schema, ranges=None, fancynames=None):
+        '''Add the widgets for a schema (see tk_steroids.routines.inspect_schema)
+
+        The bool options become tickboxes, the int and float options
+        that have a range become sliders, and the rest become entries
+        or dropdown menus (choices). The same schema can be used for
+        many panels without inspecting again.
+
+        Options
+        -------
+        group : string
+            Group name
+        schema : sequence of OptionSpecs
+            From inspect_schema
+        ranges : dict or None
+            {name: (min, max)} for the numerical options to show as sliders
+        fancynames : dict or None
+            {name: fancyname} names to show to the user
+
+        Returns
+        -------
+        elements : list
+            The created TickboxFrame, SliderFrame and EntryFrame objects
+            (empty if the group is not built yet)
+        '''
+        ranges = ranges or {}
+        fancynames = fancynames or {}
+
+        tickboxes = []
+        sliders = []
+        entries = []
+        for spec in schema:
+            if spec.kind == 'bool':
+                tickboxes.append(spec)
+            elif spec.kind in ['int', 'float'] and spec.name in ranges:
+                sliders.append(spec)
+            else:
+                entries.append(spec)
+        
+        elements = []
+        if tickboxes:
+            elements.append(self.add_tickboxes(group, [spec.name for spec in tickboxes],
+                defaults=[bool(spec.default) for spec in tickboxes],
+                fancynames=[fancynames.get(spec.name, spec.name) for spec in tickboxes]))
+        if sliders:
+            elements.append(self.add_sliders(group, [spec.name for spec in sliders],
+                defaults=[spec.default for spec in sliders],
+                fancynames=[fancynames.get(spec.name) for spec in sliders],
+                ranges=[ranges[spec.name] for spec in sliders],
+                resolutions=[1 if spec.kind == 'int' else None for spec in sliders]))
+        if entries:
+            elements.append(self.add_entries(group, [spec.name for spec in entries],
+                defaults=[spec.default for spec in entries],
+                fancynames=[fancynames.get(spec.name) for spec in entries],
+                types=[spec.type for spec in entries],
+                choices=[spec.choices for spec in entries]))
+        return [element for element in elements if element is not None]
+
+
+    def add_schema_inspect(self, group, function_or_method,
+            exclude_keywords=[], **kwargs):
+        '''Add widgets by inspecting the types of the keyword arguments
+
+        Options
+        -------
+        group : string
+            Group name
+        function_or_method : callable
+        exclude_keywords : list
+        **kwargs
+            Keyword arguments to add_schema
+
+        See add_schema for documentation.
+        '''
+        schema = inspect_schema(function_or_method, exclude_keywords)
+        self._add_inspected(group, function_or_method)
+        return self.add_schema(group, schema, **kwargs)
+
+
+    def add_runner(self, function, callback, args=(), groups=None,
+            debounce=150, run_now=True, **kwargs):
+        '''Run the function in the background when the settings change
+
+        The function is called with args and the current values of the
+        groups as keyword arguments in a thread or process pool (see
+        tk_steroids.runner.ComputeRunner). A new run supersedes a stale
+        one, and callback gets the result of the latest run on the
+        tkinter thread.
+
+        Options
+        -------
+        function : callable
+            The function, typically one added with an add_*_inspect method
+        callback : callable
+            Called with the result
+        args : tuple
+            Positional arguments to the function (for example the data)
+        groups : list of strings or None
+            Groups whose values are passed to the function. If None, the
+            groups where the function was inspected, or if it was not
+            inspected, all the groups.
+        debounce : int
+            Milliseconds without changes before starting a new run
+        run_now : bool
+            If True, start the first run right away
+        **kwargs
+            Keyword arguments to ComputeRunner (error_callback,
+            executor, max_workers...)
+
+        Returns
+        -------
+        runner : object
+            The ComputeRunner; its run method starts a run with the
+            current settings
+        '''
+        if groups is None:
+            groups = [group for group, functions in self.inspected.items()
+                    if function in functions]
+        
+        def arguments():
+            keywords = {}
+            for group in (groups or list(self._values)):
+                keywords.update(self._values.get(group, {}))
+            return args, keywords
+        
+        runner = ComputeRunner(self, function, callback, arguments=arguments, **kwargs)
+        self.add_change_callback(runner.run, debounce=debounce)
+        self.runners.append(runner)
+
+        if run_now:
+            runner.run()
+        return runner
+
+
+    def destroy(self):
+        '''
+        Cancel the pending change callbacks and shut down the runners
+        '''
+        for debouncer in self._debouncers:
+            debouncer.cancel()
+        for runner in self.runners:
+            runner.shutdown()
+        tk.Frame.destroy(self)
+
+
     def get_current(self):
         '''Get current settings
 
+        Returns a copy of the Python side mirror, without reading
+        the widgets.
+
         Returns
         -------
         settings : dict
             {group: {option: value, ...}}
         '''
-        settings = {}
-
-        for group in self.elements:
-
-            settings[group] = {}
-            for element in self.elements[group]:
-                settings[group].update(element.states)
-
-        return settings
+        return {group: dict(values) for group, values in self._values.items()}
 
 
     def set_current(self, settings):
         '''Set current settings
+
+        Only the given groups and options are set, the others keep
+        their values. The values of the groups that have no widgets yet
+        are added to the preset, and to the current values if the group
+        is known but not built (see add_group). The change listeners
+        get all the changes as one diff.
         
         Options
         -------
         settings : dict
             {group: {option: value, ...}}
         '''
-        for group in self.elements:
-            for element in self.elements[group]:
-                element.states = settings[group]
+        self._batch = {}
+        try:
+            for group, values in settings.items():
+                if group in self.elements and group not in self._pending:
+                    for element in self.elements[group]:
+                        element.states = values
+                else:
+                    preset = self.preset.setdefault(group, {})
+                    preset.update(values)
+                    
+                    # Normalized like the widgets will hold them when built
+                    for element_class, options, kwargs in self._pending.get(group, []):
+                        normalized = {option: value for option, value
+                                in self._pending_values(group, element_class,
+                                    options, kwargs).items() if option in values}
+                        preset.update(normalized)
+                        self._on_change(group, normalized)
+        finally:
+            batch, self._batch = self._batch, None
+
+        if batch:
+            for listener in list(self._change_listeners):
+                listener(batch)
+
+
+
+class GroupedSettingsManager(SettingsManager):
+    '''Settings widget for programs with very many settings
+
+    The settings are in collapsible groups (add_group) inside a
+    scrollable area, with a search box on the top. Pressing Enter in
+    the search box shows the next matching option, building and
+    expanding its group if needed. The widgets of a group are created
+    only when it is expanded for the first time, so the cost of opening
+    the settings does not grow with the number of options.
+
+    Attributes
+    ----------
+    canvas : object
+        Tkinter Canvas that scrolls the groups
+    frame : object
+        Frame inside the canvas, holding the groups
+    search_mode : string
+        One of tk_steroids.search.SEARCH_MODES
+    '''
+
+    def __init__(self, parent, preset=None, height=400, search_mode='substring'):
+        '''
+        Options
+        -------
+        parent : object
+            Tkinter parent widget
+        preset : dict or None
+            See SettingsManager
+        height : int
+            Height of the scrollable area in pixels
+        search_mode : string
+            One of tk_steroids.search.SEARCH_MODES
+        '''
+        if search_mode not in SEARCH_MODES:
+            raise ValueError('Unknown search mode {}. Use {}'.format(
+                search_mode, SEARCH_MODES))
+        super().__init__(parent, preset)
+        self.search_mode = search_mode
+        self.grid_rowconfigure(1, weight=1)
+
+        search_frame = tk.Frame(self)
+        search_frame.grid(row=0, column=0, columnspan=2, sticky='WE')
+        search_frame.grid_columnconfigure(1, weight=1)
+        tk.Label(search_frame, text='Search').grid(row=0, column=0)
+        
+        self.search_variable = tk.StringVar(self)
+        self.search_entry = tk.Entry(search_frame, textvariable=self.search_variable)
+        self.search_entry.grid(row=0, column=1, sticky='WE')
+        self.search_entry.bind('<Return>', self._on_search)
+        self.search_entry.bind('<Shift-Return>', lambda event: self._on_search(event, -1))
+        self.match_label = tk.Label(search_frame)
+        self.match_label.grid(row=0, column=2)
+
+        self.canvas = tk.Canvas(self, height=height, highlightthickness=0)
+        self.canvas.grid(row=1, column=0, sticky='NSWE')
+        scrollbar = tk.Scrollbar(self, orient='vertical', command=self.canvas.yview)
+        scrollbar.grid(row=1, column=1, sticky='NS')
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+
+        self.frame = tk.Frame(self.canvas)
+        self.frame.grid_columnconfigure(0, weight=1)
+        window = self.canvas.create_window((0,0), window=self.frame, anchor='nw')
+        
+        # Scrollregion follows the size of the frame, width the canvas
+        self.frame.bind('<Configure>', lambda event: self.canvas.config(
+            scrollregion=(0, 0, self.frame.winfo_reqwidth(), self.frame.winfo_reqheight())))
+        self.canvas.bind('<Configure>', lambda event: self.canvas.itemconfigure(
+            window, width=event.width))
+
+        self._container = self.frame
+        self._matches = []
+        self._i_match = -1
+        self._last_query = None
+
+
+    def _on_search(self, event=None, step=1):
+        '''
+        Show the next (or previous) option matching the search box
+        '''
+        query = self.search_variable.get()
+        if query != self._last_query:
+            self._matches = self.search(query, self.search_mode) if query else []
+            self._last_query = query
+            self._i_match = -1 if step > 0 else 0
+
+        if not self._matches:
+            self.match_label.config(text='No matches' if query else '')
+            return
+        
+        self._i_match = (self._i_match + step) % len(self._matches)
+        self.match_label.config(text='{}/{}'.format(self._i_match+1, len(self._matches)))
+        self.show_option(*self._matches[self._i_match])
+        self.search_entry.focus_set()
+
+
+    def show_option(self, group, option=None):
+        '''Like SettingsManager.show_option, and scroll the option
+        (or the group) into the view
+        '''
+        widget = super().show_option(group, option)
+        target = widget if widget is not None else self.groups.get(group)
+        if target is not None:
+            self.see(target)
+        return widget
+
+
+    def see(self, widget):
+        '''
+        Scroll the widget (inside the groups) into the view
+        '''
+        self.update_idletasks()
+        height = self.frame.winfo_reqheight()
+        if height <= 0:
+            return
+        top = widget.winfo_rooty() - self.frame.winfo_rooty()
+        bottom = top + widget.winfo_height()
+        
+        view_top, view_bottom = [fraction * height for fraction in self.canvas.yview()]
+        if top < view_top or bottom > view_bottom:
+            self.canvas.yview_moveto(max(0, top - self.canvas.winfo_height() / 3) / height)
 
 
 
 class PagedSettingsManager(SettingsManager):
     '''Diplay user a settings widget with multiple pages (tabs)
     
+    In the lazy mode, the widgets of the groups on the other pages
+    than the shown one are created when their page is first shown.
+
     Attributes
     ----------
     tabs : object
         tk_steroids' Tabs object
+    lazy : bool
+        If True, build the pages' widgets only when shown
     '''
 
-    def __init__(self, parent, page_names):
-        super().__init__(parent)
+    def __init__(self, parent, page_names, preset=None, lazy=False):
+        super().__init__(parent, preset)
+        self.lazy = lazy
         
-        self.tabs = Tabs(self, page_names)
+        self.tabs = Tabs(self, page_names, on_select_callback=self._on_select)
         self.tabs.grid(sticky='NSWE')
         
         self._container = self.tabs.pages[0]
 
+
+    def _new_group(self, group):
+        if self.lazy and self._container is not self.tabs.pages[self.tabs.i_current]:
+            self._defer_group(group, self._container)
+
+
+    def _on_select(self, i_page):
+        page = self.tabs.pages[i_page]
+        for group, container in list(self._containers.items()):
+            if container is page:
+                self.build_group(group)
+
+
+    def show_option(self, group, option=None):
+        '''Like SettingsManager.show_option, and select the page
+        of the group
+        '''
+        container = self._containers.get(group)
+        if container in self.tabs.pages:
+            self.tabs.set_page(self.tabs.pages.index(container))
+        return super().show_option(group, option)
+
     
     @property
     def active_page(self):
@@ -203,12 +1077,10 @@ class PagedSettingsManager(SettingsManager):
 
         Note. Do not confuse with tab selection
         '''
-        return self.tabs.buttons[ self.tabs.i_current ].cget('text')
+        return self.tabs.buttons[ self.tabs.pages.index(self._container) ].cget('text')
 
     @active_page.setter
     def active_page(self, page_name):
 
         page_names = [button.cget('text') for button in self.tabs.buttons]
-        self.cotainer = self.tabs.pages[ page_names.index(page_name) ]
-
-
+        self._container = self.tabs.pages[ page_names.index(page_name) ]